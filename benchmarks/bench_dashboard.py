@@ -0,0 +1,115 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+APP_PATH = REPO_ROOT / 'dashboard' / 'app.py'
+sys.path.insert(0, str(REPO_ROOT / 'scripts'))
+
+# Usage (from the repo root):
+#   python benchmarks/bench_dashboard.py                 # 100k-lead inventory
+#   python benchmarks/bench_dashboard.py --rows 1000000 --repeat 10
+# Drives dashboard/app.py with Streamlit's AppTest against a generated inventory
+# (LEAD_DATA_DIR) in a temp dir. Each view runs in a fresh process, so "first
+# run" is the cold start a new server pays: imports, data load, first paint.
+# "New session" is a second visitor on the same (warm) server; the rest are
+# single reruns after one interaction, median of --repeat.
+
+USER = {"name": "Bench User", "city": "Dallas, Texas", "niche": "HVAC Services", "plan": "Pro Plan", "credits": 85}
+VIEWS = ['login', 'premium', 'trial']
+SORT_ORDERS = {"Lead Score: High → Low": "Lead Score: Low → High", "Lead Score: Low → High": "Lead Score: High → Low"}
+
+
+def write_inventory(n_rows, data_dir):
+    import clean_verify as cv
+    from lead_scoring import LeadScorer
+    from lead_storage import write_verified
+    from mock_data import generate_leads, DEFAULT_NICHES, DEFAULT_CITIES
+
+    cv.DEDUP_INDEX = None
+    scorer = LeadScorer.from_config(dict(cv.config['LEAD_SCORING'], CACHE_PATH=None))
+    df = scorer.score(generate_leads(n_rows, DEFAULT_NICHES, DEFAULT_CITIES, seed=7))
+    df = cv.select_output(df, cv.passes_validation(df))
+    write_verified(df, str(Path(data_dir) / 'leads'))
+    return len(df)
+
+
+def new_session(view):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(str(APP_PATH), default_timeout=300)
+    at.session_state['logged_in'] = view != 'login'
+    at.session_state['is_premium'] = view == 'premium'
+    at.session_state['user'] = dict(USER)
+    return at
+
+
+def timed(run):
+    start = time.perf_counter()
+    at = run()
+    seconds = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(f"App raised: {at.exception[0].value}")
+    return seconds
+
+
+def child(view, repeat):
+    """Runs in a fresh process: first run, a second session, then timed interactions."""
+    import streamlit.testing.v1 # noqa: F401 -- the test harness itself is not part of the app's cold start
+
+    timings = {}
+    at = new_session(view)
+    timings['first run'] = timed(at.run)
+    timings['new session'] = timed(new_session(view).run)
+
+    interactions = {'rerun (no-op)': lambda: at.run()}
+    if view == 'premium':
+        city_options = at.selectbox(key='filter_city').options
+        cities = [city_options[i % len(city_options)] for i in range(repeat)]
+        interactions['filter change'] = lambda: at.selectbox(key='filter_city').select(cities.pop()).run()
+        interactions['next page'] = lambda: at.button(key='page_next').click().run()
+        interactions['sort change'] = lambda: at.selectbox(key='sort_order').select(
+            SORT_ORDERS[at.selectbox(key='sort_order').value]).run()
+
+    for name, interaction in interactions.items():
+        if name == 'next page' and at.button(key='page_next').disabled:
+            continue # One page of results at this filter
+        timings[name] = statistics.median(timed(interaction) for _ in range(repeat))
+    print(json.dumps(timings))
+
+
+def run_view(view, data_dir, repeat):
+    env = dict(os.environ, LEAD_DATA_DIR=str(data_dir))
+    result = subprocess.run(
+        [sys.executable, __file__, '--child', view, '--repeat', str(repeat)],
+        cwd=data_dir, env=env, capture_output=True, text=True, # cwd: the order queue DB lands in the temp dir
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"{view} failed:\n{result.stderr[-2000:]}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time-to-first-paint and rerun latency for the Streamlit dashboard.")
+    parser.add_argument('--rows', type=int, default=100_000, help="Raw leads generated for the inventory")
+    parser.add_argument('--repeat', type=int, default=5, help="Reruns timed per interaction (median reported)")
+    parser.add_argument('--views', nargs='+', default=VIEWS, choices=VIEWS)
+    parser.add_argument('--child', choices=VIEWS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.repeat)
+        sys.exit(0)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        n_leads = write_inventory(args.rows, tmp)
+        print(f"Inventory: {n_leads:,} verified leads from {args.rows:,} raw rows.\n")
+        print(f"{'view':<10}{'step':<18}{'ms':>10}")
+        for view in args.views:
+            for step, seconds in run_view(view, tmp, args.repeat).items():
+                print(f"{view:<10}{step:<18}{seconds * 1000:>10.1f}")
@@ -0,0 +1,99 @@
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+# Usage (from the repo root):
+#   python benchmarks/bench_repository.py --rows 1000000
+#   python benchmarks/bench_repository.py --rows 10000000 --db data/state/bench_leads.db   # keep the DB for reruns
+# Loads generated, scored leads into a SQLite LeadRepository, then times the
+# dashboard's page queries (50 rows + capped total) for each filter shape it
+# sends, median of --repeat over different filter values. Fails (exit 1) if
+# any shape's median is above --max-ms.
+
+FILTER_SHAPES = [
+    (),
+    ('City',),
+    ('Niche',),
+    ('Reason to Contact',),
+    ('City', 'Niche'),
+    ('City', 'Reason to Contact'),
+    ('City', 'Niche', 'Reason to Contact'),
+]
+
+
+def load(repository, n_rows, n_cities, n_niches, chunk_size=500_000):
+    from lead_scoring import LeadScorer
+    from mock_data import generate_leads, names, stable_seed, DEFAULT_CITIES, DEFAULT_NICHES
+    import clean_verify as cv
+
+    scorer = LeadScorer.from_config(dict(cv.config['LEAD_SCORING'], CACHE_PATH=None))
+    cities, niches = names(DEFAULT_CITIES, n_cities), names(DEFAULT_NICHES, n_niches)
+    repository.begin_replace()
+    for chunk, start in enumerate(range(0, n_rows, chunk_size)):
+        df = generate_leads(min(chunk_size, n_rows - start), niches, cities, seed=stable_seed(7, chunk), id_offset=start)
+        repository.upsert(scorer.score(df))
+    repository.commit_replace()
+    repository.refresh_facets()
+
+
+def filter_values(repository, shape, repeat):
+    """`repeat` filter dicts of the given shape, cycling through each column's values."""
+    options = {column: repository.options(column) for column in shape}
+    return [{column: options[column][(i * (k + 3)) % len(options[column])] for k, column in enumerate(shape)}
+            for i in range(repeat)]
+
+
+def timed_page(repository, contains, after=None):
+    start = time.perf_counter()
+    page = repository.page(contains, after=after, limit=50)
+    return time.perf_counter() - start, page
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dashboard query latency against the SQL lead repository.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--cities", type=int, default=200)
+    parser.add_argument("--niches", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=9, help="Filter values timed per shape (median reported)")
+    parser.add_argument("--db", help="SQLite file to use; loaded only if missing or empty (default: a temp file)")
+    parser.add_argument("--max-ms", type=float, default=50)
+    args = parser.parse_args()
+
+    from lead_repository import LeadRepository
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.db or os.path.join(tmp, 'leads.db')
+        repository = LeadRepository(f"sqlite:///{path}").create_schema()
+        if repository.is_empty():
+            start = time.perf_counter()
+            load(repository, args.rows, args.cities, args.niches)
+            elapsed = time.perf_counter() - start
+            print(f"Loaded {args.rows:,} leads in {elapsed:.1f}s ({args.rows / elapsed:,.0f} rows/s)")
+        print(f"{repository.total():,} leads; {len(repository.options('City'))} cities, "
+              f"{len(repository.options('Niche'))} niches\n")
+
+        print(f"{'filter':<34}{'first page ms':>15}{'next page ms':>15}{'matches':>12}")
+        failed = False
+        for shape in FILTER_SHAPES:
+            first, second, matches = [], [], []
+            for contains in filter_values(repository, shape, args.repeat):
+                seconds, page = timed_page(repository, contains)
+                first.append(seconds)
+                matches.append(page.total)
+                if page.next_cursor is not None:
+                    second.append(timed_page(repository, contains, page.next_cursor)[0])
+            first_ms = statistics.median(first) * 1000
+            second_ms = statistics.median(second) * 1000 if second else 0.0
+            label = ' + '.join(shape) or '(none)'
+            print(f"{label:<34}{first_ms:>15.1f}{second_ms:>15.1f}{int(statistics.median(matches)):>12,}")
+            failed |= max(first_ms, second_ms) > args.max_ms
+        repository.dispose()
+
+    if failed:
+        print(f"\nFAIL: a filter shape's median is above {args.max_ms:g} ms")
+        sys.exit(1)
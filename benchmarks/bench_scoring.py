@@ -0,0 +1,72 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+from lead_scoring import LeadScorer # noqa: E402
+
+# Usage (from the repo root):
+#   python benchmarks/bench_scoring.py --rows 1000000
+# Times LeadScorer.score on synthetic raw leads: a cold run (every business
+# scored), then a rerun where --changed of them have new features (the rest
+# come from the on-disk cache). Fails (exit 1) if either run is below
+# --min-rows-per-min.
+
+NICHES = ['HVAC Services', 'Plumbing', 'Roofing', 'Dentists', 'Landscaping', 'Auto Repair']
+CITIES = [f"City {i}" for i in range(200)]
+
+
+def make_raw_leads(n_rows, seed=7):
+    rng = np.random.default_rng(seed)
+    ids = np.arange(n_rows)
+    return pd.DataFrame({
+        'Business Name': pd.Series(ids).map('Lead {}'.format),
+        'City': np.asarray(CITIES, dtype=object)[rng.integers(0, len(CITIES), n_rows)],
+        'Niche': np.asarray(NICHES, dtype=object)[rng.integers(0, len(NICHES), n_rows)],
+        'Website': np.where(rng.random(n_rows) < 0.7, 'http://example.com', ''),
+        'Years in Business': np.round(rng.uniform(0, 25, n_rows), 1),
+        'Review Count': rng.exponential(40, n_rows).astype(int),
+    })
+
+
+def timed_score(scorer, df):
+    start = time.perf_counter()
+    scorer.score(df)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput benchmark for the lead scoring stage.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--changed", type=float, default=0.1, help="Share of businesses with new features on the rerun")
+    parser.add_argument("--min-rows-per-min", type=float, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_raw_leads(args.rows)
+    print(f"Generated {len(df)} synthetic raw leads.")
+    config = dict(default_prior=62, niche_priors={'HVAC Services': 66}, new_business_years=2, review_saturation=500)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache_path = os.path.join(tmp, 'lead_scores.parquet')
+
+        scorer = LeadScorer(cache_path=cache_path, **config)
+        cold = timed_score(scorer, df)
+        scorer.save()
+        print(f"Cold:   {cold:.2f}s -> {args.rows / cold * 60:,.0f} rows/min ({scorer.summary()})")
+
+        changed = np.random.default_rng(1).random(args.rows) < args.changed
+        df.loc[changed, 'Review Count'] += 1
+        scorer = LeadScorer(cache_path=cache_path, **config) # Fresh process: the cache comes from disk
+        warm = timed_score(scorer, df)
+        print(f"Rerun:  {warm:.2f}s -> {args.rows / warm * 60:,.0f} rows/min ({scorer.summary()})")
+
+    slowest = max(cold, warm)
+    if args.rows / slowest * 60 < args.min_rows_per_min:
+        print(f"FAIL: below the {args.min_rows_per_min:,.0f} rows/min target")
+        sys.exit(1)
+    print("OK: meets the throughput target")
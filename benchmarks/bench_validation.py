@@ -0,0 +1,71 @@
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+from validation import ValidationEngine, MXCache, StubResolver # noqa: E402
+
+# Usage (from the repo root):
+#   python benchmarks/bench_validation.py --rows 1000000
+# Times ValidationEngine.validate on a synthetic mix of valid and invalid
+# phones/emails and fails (exit 1) if throughput is below --min-rows-per-min.
+
+EMAIL_REGEX = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+
+PHONE_FORMATS = [
+    lambda n: f"+1 {n % 900 + 100}-555-{n % 10000:04d}",  # NANP, international
+    lambda n: f"({n % 900 + 100}) 555-{n % 10000:04d}",   # NANP, national
+    lambda n: f"+91 98{n % 1000:03d} {n % 100000:05d}",   # India
+    lambda n: f"0044 20 7946 {n % 10000:04d}",             # UK with 00 prefix
+    lambda n: f"{n % 1000}",                               # too short
+    lambda n: f"+999 {n % 10000000:07d}",                  # unknown country
+]
+
+EMAIL_FORMATS = [
+    lambda n: f"lead_{n}@dallastexas.com",
+    lambda n: f"owner.{n}@shop{n % 500}.co",
+    lambda n: f"lead_{n}@dallas,texas.com",  # bad format
+    lambda n: f"info{n}@example.com",        # no MX (stub)
+]
+
+
+def make_leads(n_rows, seed=7):
+    rng = np.random.default_rng(seed)
+    ids = rng.integers(0, 10_000_000, n_rows)
+    phone_kind = rng.integers(0, len(PHONE_FORMATS), n_rows)
+    email_kind = rng.integers(0, len(EMAIL_FORMATS), n_rows)
+    return pd.DataFrame({
+        'Phone': [PHONE_FORMATS[k](n) for k, n in zip(phone_kind, ids)],
+        'Email': [EMAIL_FORMATS[k](n) for k, n in zip(email_kind, ids)],
+    })
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Throughput benchmark for the validation engine.")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--min-rows-per-min", type=float, default=1_000_000)
+    args = parser.parse_args()
+
+    df = make_leads(args.rows)
+    print(f"Generated {len(df)} synthetic leads.")
+
+    best = float('inf')
+    for _ in range(args.repeat):
+        engine = ValidationEngine(EMAIL_REGEX, 8, '1', mx_cache=MXCache(StubResolver(no_mx_domains=['example.com'])))
+        start = time.perf_counter()
+        engine.validate(df)
+        best = min(best, time.perf_counter() - start)
+
+    rows_per_min = args.rows / best * 60
+    print(engine.summary())
+    print(f"Best of {args.repeat}: {best:.2f}s for {args.rows} rows -> {rows_per_min:,.0f} rows/min")
+
+    if rows_per_min < args.min_rows_per_min:
+        print(f"FAIL: below the {args.min_rows_per_min:,.0f} rows/min target")
+        sys.exit(1)
+    print("OK: meets the throughput target")
@@ -0,0 +1,122 @@
+import argparse
+import asyncio
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+from scrape_executor import run_targets # noqa: E402
+
+# Usage (from the repo root):
+#   python benchmarks/mock_site_harness.py --targets 24 --latency 0.25
+# Serves fake listing pages from a local HTTP server with artificial latency and
+# compares a serial scrape against the async executor at several concurrency limits.
+
+
+# --- MOCK SITE ---
+
+def make_handler(latency, leads_per_page):
+    class ListingHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency) # Simulated network + render time
+            rows = "".join(
+                f"<li data-name='Lead {i}' data-phone='+1 555-010-{i:04d}'></li>" for i in range(leads_per_page)
+            )
+            body = f"<html><body><ul>{rows}</ul></body></html>".encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    return ListingHandler
+
+
+class MockSiteServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128 # Default backlog of 5 drops connections under high concurrency
+
+
+def start_mock_site(latency, leads_per_page):
+    server = MockSiteServer(("127.0.0.1", 0), make_handler(latency, leads_per_page))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --- SCRAPER AGAINST THE MOCK SITE ---
+
+async def fetch_page(port, path):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {path} HTTP/1.0\r\nHost: 127.0.0.1\r\n\r\n".encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    await writer.wait_closed()
+    return response.split(b"\r\n\r\n", 1)[1].decode()
+
+
+def make_scrape_fn(port):
+    async def scrape(target, offset):
+        html = await fetch_page(port, f"/{target['domain']}/{target['niche']}")
+        count = html.count("<li ")
+        return pd.DataFrame({
+            'Business Name': [f"{target['niche']} Lead {offset + i}" for i in range(count)],
+            'Niche': target['niche'],
+            'City': target['city'],
+        })
+    return scrape
+
+
+def build_targets(n_targets, n_domains):
+    return [
+        {'niche': f"niche{i}", 'city': "Dallas, Texas", 'max_count': 50,
+         'order_status_index': i, 'domain': f"site{i % n_domains}.local"}
+        for i in range(n_targets)
+    ]
+
+
+def timed_run(targets, port, concurrency, rps):
+    start = time.perf_counter()
+    results = asyncio.run(run_targets(
+        targets, make_scrape_fn(port),
+        max_concurrency=concurrency, per_domain_rps=rps,
+        lead_id_block=10000, default_domain="site0.local",
+    ))
+    elapsed = time.perf_counter() - start
+    leads = sum(len(df) for df in results if df is not None)
+    return elapsed, leads
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serial vs concurrent scrape against a local mock site.")
+    parser.add_argument("--targets", type=int, default=24)
+    parser.add_argument("--domains", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.25, help="Seconds per page on the mock site")
+    parser.add_argument("--leads-per-page", type=int, default=25)
+    parser.add_argument("--rps", type=float, default=4, help="Per-domain rate limit for the last sweep")
+    args = parser.parse_args()
+
+    server = start_mock_site(args.latency, args.leads_per_page)
+    port = server.server_address[1]
+    targets = build_targets(args.targets, args.domains)
+
+    print(f"Mock site on port {port}: {args.targets} targets over {args.domains} domains, {args.latency}s latency")
+
+    serial_time, _ = timed_run(targets, port, concurrency=1, rps=0)
+    print(f"{'mode':<28}{'seconds':>10}{'targets/s':>12}{'speedup':>10}")
+    print(f"{'serial':<28}{serial_time:>10.2f}{args.targets / serial_time:>12.1f}{1.0:>10.1f}x")
+
+    for concurrency in (2, 4, 8, 16):
+        for rps in (0, args.rps):
+            elapsed, _ = timed_run(targets, port, concurrency, rps)
+            label = f"concurrency={concurrency}" + (f", {rps:g} rps/domain" if rps else "")
+            print(f"{label:<28}{elapsed:>10.2f}{args.targets / elapsed:>12.1f}{serial_time / elapsed:>10.1f}x")
+
+    server.shutdown()
@@ -0,0 +1,330 @@
+import argparse
+import ast
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+APP_PATH = REPO_ROOT / 'dashboard' / 'app.py'
+sys.path.insert(0, str(REPO_ROOT / 'scripts'))
+
+# Usage (from the repo root):
+#   python benchmarks/run_benchmarks.py                                   # every case at 1k/100k/1M rows
+#   python benchmarks/run_benchmarks.py --cases verify_data --sizes 100000
+#   python benchmarks/run_benchmarks.py --save-baseline                   # store results as the baseline
+#   python benchmarks/run_benchmarks.py --compare                         # exit 1 on regressions vs the baseline
+# Each (case, size) runs in its own process so peak RSS is per case. Results
+# (time, peak RSS, rows/sec) are written as JSON to --output.
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+DEFAULT_OUTPUT = 'benchmarks/results/latest.json'
+DEFAULT_BASELINE = 'benchmarks/results/baseline.json'
+ORDER_OPS = 200 # Submits and reads timed per order-queue run, whatever the queue size
+NOISE_FLOOR = {'seconds': 0.005, 'peak_rss_mb': 5.0} # Smaller differences are never flagged as regressions
+
+
+# --- FIXTURES ---
+
+def raw_leads(n_rows):
+    from mock_data import generate_leads, DEFAULT_NICHES, DEFAULT_CITIES
+    return generate_leads(n_rows, DEFAULT_NICHES, DEFAULT_CITIES, seed=7, duplicate_rate=0.1, invalid_rate=0.05)
+
+
+def app_functions(names, **env):
+    """The named top-level functions of dashboard/app.py, compiled without their Streamlit decorators.
+
+    (Importing app.py would run the whole UI.) `env` provides the globals they use.
+    """
+    tree = ast.parse(APP_PATH.read_text())
+    nodes = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in names]
+    for node in nodes:
+        node.decorator_list = []
+    namespace = dict(env)
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), str(APP_PATH), 'exec'), namespace)
+    return [namespace[name] for name in names]
+
+
+class FakeWorksheet:
+    """Just enough of a gspread Worksheet for update_order_status; counts API calls."""
+
+    def __init__(self, n_rows):
+        self.header = ['timestamp', 'niche', 'location', 'max_count', 'user_id', 'status']
+        self.row_count = n_rows + 1
+        self.col_count = len(self.header)
+        self.api_calls = 0
+        self.cells_written = 0
+
+    def row_values(self, row):
+        self.api_calls += 1
+        return list(self.header)
+
+    def add_cols(self, count):
+        self.api_calls += 1
+        self.col_count += count
+
+    def batch_update(self, updates):
+        self.api_calls += 1
+        self.cells_written += sum(len(u['values']) * len(u['values'][0]) for u in updates)
+
+
+# --- CASES ---
+# Each case prepares its input untimed and returns (timed fn, extra result fields).
+
+def case_execute_scrape(n_rows, tmp):
+    import scrape_sources as ss
+    ss.MOCK_DATA_CONFIG['LISTING_SIZE'] = [n_rows, n_rows]
+    target = {'niche': 'HVAC Services', 'city': 'Dallas, Texas', 'max_count': n_rows, 'order_status_index': -1}
+    return lambda: ss.execute_scrape(target, 0), {}
+
+
+def case_verify_data(n_rows, tmp):
+    import clean_verify as cv
+    from scrape_sources import SCORER
+    cv.DEDUP_INDEX = None
+    df = SCORER.score(raw_leads(n_rows))
+    return lambda: cv.verify_data(df.copy()), {}
+
+
+def _write_inventory(n_rows, tmp):
+    import clean_verify as cv
+    from scrape_sources import SCORER
+    from lead_storage import write_verified
+    cv.DEDUP_INDEX = None
+    df = SCORER.score(raw_leads(n_rows))
+    df = cv.select_output(df, cv.passes_validation(df))
+    path = Path(tmp) / 'leads'
+    write_verified(df, str(path))
+    return path
+
+
+def _load_live_data(path):
+    from metrics import METRICS
+    load_live_data, _ = app_functions(
+        ['load_live_data', '_read_live_data'], pd=pd, METRICS=METRICS, LEAD_DATASET_PATH=path, PATHLIB_PATH=path / 'missing.csv',
+    )
+    return load_live_data
+
+
+def case_load_live_data(n_rows, tmp):
+    load_live_data = _load_live_data(_write_inventory(n_rows, tmp))
+    return load_live_data, {}
+
+
+def case_dashboard_filters(n_rows, tmp):
+    """Index and summary-cube build, plus the filter and summary work of a set of premium/trial reruns."""
+    from filter_engine import FilterEngine
+    from lead_query import InventoryQuery
+    from masking import select_contact_columns
+    df = _load_live_data(_write_inventory(n_rows, tmp))()
+    [build_inventory] = app_functions(['build_inventory'], FilterEngine=FilterEngine, InventoryQuery=InventoryQuery)
+
+    city, niche = df['City'].iloc[0], df['Niche'].iloc[0]
+    reruns = [
+        ({}, None, True, True),
+        ({'City': city}, None, True, True),
+        ({'City': city, 'Niche': niche}, 70, True, True),
+        ({'Reason to Contact': 'No Website'}, 80, False, True),
+        ({'City': city, 'Niche': niche}, None, True, False), # Trial view
+    ]
+
+    def run():
+        _, index, query, stats = build_inventory(df) # No cube on disk: built from the frame
+        for filters, min_score, descending, is_premium in reruns:
+            for attribute in ['New Businesses', 'No Website', 'High Conversion']:
+                stats.count('Attribute', attribute)
+            for col in ['City', 'Niche', 'Reason to Contact']:
+                stats.options(col)
+            stats.total(filters, min_score)
+            stats.average_score(filters, min_score)
+            page = query.page(filters, min_score=min_score, descending=descending, limit=50 if is_premium else 5)
+            select_contact_columns(page.rows, is_premium)
+
+    return run, {'reruns': len(reruns)}
+
+
+def case_export_csv(n_rows, tmp):
+    """Gzip CSV export of the whole inventory, streamed page by page (what the export worker does)."""
+    from filter_engine import FilterEngine
+    from lead_export import iter_query_chunks, write_csv
+    from lead_query import InventoryQuery
+    from lead_storage import to_export_frame
+    df = _load_live_data(_write_inventory(n_rows, tmp))()
+    [build_inventory] = app_functions(['build_inventory'], FilterEngine=FilterEngine, InventoryQuery=InventoryQuery)
+    _, _, query, _ = build_inventory(df)
+    path = Path(tmp) / 'export.csv.gz'
+
+    def run():
+        pages = iter_query_chunks(query, {}, None, True, chunk_size=50000)
+        write_csv((to_export_frame(page.rows) for page in pages), path, compress=True)
+
+    return run, {}
+
+
+def case_order_queue(n_rows, tmp):
+    """save_lead_request + load_order_queue against a queue already holding `n_rows` orders."""
+    from order_queue import OrderQueue
+    queue = OrderQueue(Path(tmp) / 'order_queue.db')
+    conn = queue._connect()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            "INSERT INTO orders (timestamp, niche, location, max_count, user_id, status) VALUES (?, ?, ?, ?, ?, ?)",
+            ((queue._now(), 'Plumbing', 'Pune, India', 500, f"user {i % 1000}", queue.PENDING) for i in range(n_rows)),
+        )
+    conn.close()
+    save_lead_request, load_order_queue = app_functions(
+        ['save_lead_request', 'load_order_queue'], get_app_context=lambda: SimpleNamespace(order_queue=queue),
+    )
+
+    def run():
+        for i in range(ORDER_OPS):
+            save_lead_request('Roofing', 'Austin, Texas', 250, f"user {i % 1000}")
+            load_order_queue(f"user {i % 1000}")
+
+    return run, {'ops': 2 * ORDER_OPS}
+
+
+def case_update_order_status(n_rows, tmp):
+    """update_order_status for every 3rd-row-skipping order of an `n_rows` sheet (a fake worksheet)."""
+    import scrape_sources as ss
+    ss.ORDER_QUEUE = None
+    df_orders = pd.DataFrame({'status': ['SCRAPING'] * n_rows})
+    targets = [{'order_status_index': i} for i in range(n_rows) if i % 3]
+    state = {}
+
+    def run():
+        state['worksheet'] = FakeWorksheet(n_rows)
+        ss.update_order_status(state['worksheet'], df_orders, targets, 'SCRAPE_COMPLETE')
+
+    return run, {'api_calls': lambda: state['worksheet'].api_calls}
+
+
+CASES = {
+    'execute_scrape': case_execute_scrape,
+    'verify_data': case_verify_data,
+    'load_live_data': case_load_live_data,
+    'dashboard_filters': case_dashboard_filters,
+    'export_csv': case_export_csv,
+    'order_queue': case_order_queue,
+    'update_order_status': case_update_order_status,
+}
+
+
+# --- RUNNER ---
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024 # KB on Linux
+
+
+def run_case(name, n_rows, repeat):
+    """Runs one case in this process; returns its result dict."""
+    with tempfile.TemporaryDirectory() as tmp:
+        fn, extra = CASES[name](n_rows, tmp)
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+
+    seconds = min(times)
+    result = {'case': name, 'rows': n_rows, 'seconds': round(seconds, 4), 'peak_rss_mb': round(peak_rss_mb(), 1)}
+    if 'ops' in extra:
+        result['ops_per_sec'] = round(extra.pop('ops') / seconds, 1)
+    else:
+        result['rows_per_sec'] = round(n_rows / seconds, 1)
+    result.update({k: v() if callable(v) else v for k, v in extra.items()})
+    return result
+
+
+def run_isolated(name, n_rows, repeat):
+    """run_case in a fresh interpreter, so peak RSS belongs to this case alone."""
+    proc = subprocess.run(
+        [sys.executable, __file__, '--child', name, str(n_rows), '--repeat', str(repeat)],
+        capture_output=True, text=True, cwd=REPO_ROOT,
+    )
+    if proc.returncode != 0:
+        return {'case': name, 'rows': n_rows, 'error': proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else 'failed'}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def compare(results, baseline, tolerance):
+    """Regressions: cases more than `tolerance` slower than the baseline (time or peak RSS)."""
+    previous = {(r['case'], r['rows']): r for r in baseline['results'] if 'error' not in r}
+    regressions = []
+    for r in results:
+        base = previous.get((r['case'], r['rows']))
+        if base is None or 'error' in r:
+            continue
+        for metric, noise_floor in NOISE_FLOOR.items():
+            if r[metric] > base[metric] * (1 + tolerance) and r[metric] - base[metric] > noise_floor:
+                regressions.append(f"{r['case']} @ {r['rows']} rows: {metric} {base[metric]} -> {r[metric]} "
+                                   f"(+{r[metric] / base[metric] - 1:.0%})")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmarks for the pipeline and dashboard hot paths.")
+    parser.add_argument('--cases', nargs='+', choices=list(CASES), default=list(CASES))
+    parser.add_argument('--sizes', nargs='+', type=int, default=DEFAULT_SIZES)
+    parser.add_argument('--repeat', type=int, default=3, help="Timed runs per case (best is reported)")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help="Also store these results as the baseline")
+    parser.add_argument('--compare', action='store_true', help="Flag regressions against the baseline (exit 1)")
+    parser.add_argument('--tolerance', type=float, default=0.25, help="Allowed slowdown before a regression is flagged")
+    parser.add_argument('--child', nargs=2, metavar=('CASE', 'ROWS'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        import contextlib
+        with contextlib.redirect_stdout(sys.stderr): # Pipeline prints must not mix with the JSON line
+            result = run_case(args.child[0], int(args.child[1]), args.repeat)
+        print(json.dumps(result))
+        sys.exit(0)
+
+    results = []
+    for name in args.cases:
+        for n_rows in args.sizes:
+            result = run_isolated(name, n_rows, args.repeat)
+            results.append(result)
+            if 'error' in result:
+                print(f"{name:<20} {n_rows:>9} rows  ERROR: {result['error']}")
+            else:
+                rate = f"{result['rows_per_sec']:>14,.0f} rows/s" if 'rows_per_sec' in result else f"{result['ops_per_sec']:>14,.0f} ops/s"
+                print(f"{name:<20} {n_rows:>9} rows  {result['seconds']:>9.4f}s  {result['peak_rss_mb']:>8.1f} MB  {rate}")
+
+    report = {'created': time.strftime('%Y-%m-%d %H:%M:%S'), 'python': sys.version.split()[0],
+              'pandas': pd.__version__, 'numpy': np.__version__, 'results': results}
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+
+    if args.compare:
+        if not os.path.exists(args.baseline):
+            print(f"No baseline at {args.baseline}; run with --save-baseline first.")
+            sys.exit(1)
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print(f"REGRESSIONS (> {args.tolerance:.0%} worse than the baseline):")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print(f"OK: no regressions beyond {args.tolerance:.0%} of the baseline")
+    if any('error' in r for r in results):
+        sys.exit(1)
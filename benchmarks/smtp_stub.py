@@ -0,0 +1,169 @@
+import argparse
+import os
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scripts'))
+
+# Usage (from the repo root):
+#   python benchmarks/smtp_stub.py --messages 5000          # outreach throughput against the stub
+#   python benchmarks/smtp_stub.py --serve --port 1025      # stub for the dashboard:
+#       SMTP_HOST=127.0.0.1 SMTP_PORT=1025 OUTREACH_FROM=me@example.com streamlit run dashboard/app.py
+# A local SMTP server that accepts (and counts) every message without delivering
+# it. Addresses at --refuse-domain get a 550, to exercise failed sends.
+
+
+# --- SMTP STUB ---
+
+class SMTPStubHandler(socketserver.StreamRequestHandler):
+    def reply(self, line):
+        self.wfile.write(line.encode() + b"\r\n")
+
+    def handle(self):
+        server = self.server
+        self.reply("220 stub ESMTP")
+        recipients = []
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            verb = line[:4].upper()
+            if verb == b'EHLO':
+                self.wfile.write(b"250-stub\r\n250-8BITMIME\r\n250 SMTPUTF8\r\n")
+            elif verb == b'HELO':
+                self.reply("250 stub")
+            elif verb == b'MAIL':
+                recipients = []
+                self.reply("250 OK")
+            elif verb == b'RCPT':
+                address = line.decode(errors='replace').partition(':')[2].strip().strip('<>').split('>')[0]
+                if address.rpartition('@')[2].lower() in server.refuse_domains:
+                    self.reply("550 No such user")
+                else:
+                    recipients.append(address)
+                    self.reply("250 OK")
+            elif verb == b'DATA':
+                self.reply("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                for data_line in iter(self.rfile.readline, b''):
+                    if data_line == b".\r\n":
+                        break
+                    size += len(data_line)
+                if server.latency:
+                    time.sleep(server.latency)
+                server.record(recipients, size)
+                self.reply("250 OK queued")
+            elif verb in (b'RSET', b'NOOP'):
+                recipients = []
+                self.reply("250 OK")
+            elif verb == b'QUIT':
+                self.reply("221 Bye")
+                return
+            else:
+                self.reply("502 Command not implemented")
+
+
+class SMTPStubServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 128
+
+    def __init__(self, address, latency=0.0, refuse_domains=()):
+        super().__init__(address, SMTPStubHandler)
+        self.latency = latency
+        self.refuse_domains = {d.lower() for d in refuse_domains}
+        self.messages = 0
+        self.recipients = []
+        self.sessions = 0
+        self._lock = threading.Lock()
+
+    def record(self, recipients, size):
+        with self._lock:
+            self.messages += 1
+            self.recipients.extend(recipients)
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.sessions += 1
+        super().process_request(request, client_address)
+
+
+def start_smtp_stub(port=0, latency=0.0, refuse_domains=()):
+    server = SMTPStubServer(("127.0.0.1", port), latency, refuse_domains)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# --- OUTREACH AGAINST THE STUB ---
+
+def lead_query(n_leads):
+    from filter_engine import FilterEngine
+    from lead_query import InventoryQuery
+    from mock_data import generate_leads, DEFAULT_NICHES, DEFAULT_CITIES
+    df = generate_leads(n_leads, DEFAULT_NICHES, DEFAULT_CITIES, seed=7)
+    df['Lead Score'] = 100 - (df.index % 40)
+    df['Reason to Contact'] = 'New Business'
+    df['Attribute'] = 'New Businesses'
+    df = df.sort_values('Lead Score', ascending=False, kind='stable').reset_index(drop=True)
+    return InventoryQuery(df, FilterEngine(df))
+
+
+def run_campaign(manager, query, body):
+    job = manager.submit(query, {}, None, "Hello {{BusinessName}}", body, "bench")
+    while job.running:
+        time.sleep(0.05)
+    if job.status == 'failed':
+        raise RuntimeError(job.error)
+    return job
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local SMTP stub, and outreach throughput against it.")
+    parser.add_argument("--serve", action="store_true", help="Only run the stub (Ctrl-C to stop)")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--messages", type=int, default=5000, help="Leads in the benchmark campaign")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds the stub takes per message")
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=0, help="Messages/second per recipient domain (0 = unlimited)")
+    parser.add_argument("--refuse-domain", action="append", default=[])
+    args = parser.parse_args()
+
+    server = start_smtp_stub(args.port, args.latency, args.refuse_domain)
+    port = server.server_address[1]
+    if args.serve:
+        print(f"SMTP stub on 127.0.0.1:{port}")
+        try:
+            while True:
+                time.sleep(5)
+                print(f"{server.messages:,} messages over {server.sessions:,} sessions")
+        except KeyboardInterrupt:
+            server.shutdown()
+        sys.exit(0)
+
+    from outreach import OutreachManager
+    query = lead_query(args.messages)
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = OutreachManager(
+            os.path.join(tmp, 'outreach.db'), smtp={'host': '127.0.0.1', 'port': port}, from_address="bench@example.com",
+            pool_size=args.pool_size, provider_rates={}, default_rate=args.rate,
+        )
+        body = "Hi {{BusinessName}},\n\nI noticed your {{Niche}} business in {{City}}..."
+        print(f"SMTP stub on port {port}: {args.messages:,} leads, pool of {args.pool_size}, "
+              f"{args.rate:g} msg/s per domain" if args.rate else f"SMTP stub on port {port}: {args.messages:,} leads, "
+              f"pool of {args.pool_size}, no rate limit")
+
+        start = time.perf_counter()
+        job = run_campaign(manager, query, body)
+        elapsed = time.perf_counter() - start
+        print(f"{'first run':<14}{job.sent:>8,} sent {job.skipped:>8,} skipped {job.failed:>6,} failed"
+              f"{elapsed:>8.2f}s {job.sent / elapsed * 60:>10,.0f} msg/min")
+
+        start = time.perf_counter()
+        job = run_campaign(manager, query, body + " ") # New campaign: every lead is already contacted
+        elapsed = time.perf_counter() - start
+        print(f"{'re-send':<14}{job.sent:>8,} sent {job.skipped:>8,} skipped {job.failed:>6,} failed{elapsed:>8.2f}s")
+        print(f"Stub received {server.messages:,} messages over {server.sessions:,} SMTP sessions")
+    server.shutdown()
@@ -1,12 +1,20 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import os
+import sys
+import threading
+import time
+from collections import namedtuple
 from pathlib import Path
-from datetime import datetime
-# Import necessary modules for GSheets integration (Final Architecture)
-import gspread 
-import json 
+
+# Shared pipeline modules (storage layer etc.) live in scripts/
+# Heavier ones (pyarrow storage, SQL store, order queue) are imported on first use, not per rerun
+sys.path.append(str(Path(__file__).parent.parent / 'scripts'))
+from masking import select_contact_columns
+from filter_engine import FilterEngine
+from lead_query import InventoryQuery
+from data_store import DataStore
+from metrics import METRICS
 
 
 # --------------------------------------------------
@@ -15,21 +23,62 @@ import json
 PREMIUM_ACCESS_KEY = "30DAYPRO" 
 TRIAL_KEY = "TRIAL-ACCESS-12345" 
 TRIAL_LEAD_LIMIT = 5 
+PAGE_SIZE = 50 # Rows per page of the premium inventory table
+SORT_OPTIONS = ["Lead Score: High → Low", "Lead Score: Low → High"]
 SUBSCRIPTION_PRICE = 30
 COLOR_RED_CTA = "#f87171" 
 COLOR_BLUE = "#3b82f6"
 COLOR_GREEN = "#10b981"
 COLOR_ORANGE = "#f59e0b"
 
+APP_CSS = f"""
+<style>
+/* Adjust spacing for density */
+.stApp {{ padding-top: 20px !important; padding-right: 30px !important; padding-left: 30px !important; }}
+div[data-testid="stVerticalBlock"] > div:first-child {{ padding-top: 0 !important; }}
+.st-emotion-cache-1mnrbfp {{ visibility: hidden !important; }}
+
+/* Fix Primary Button Color to Red CTA */
+.stButton>button[kind="primary"] {{
+    background-color: {COLOR_RED_CTA} !important;
+    color: white !important;
+    border: none !important;
+}}
+/* Fix Header Alignment */
+.header-buttons-container {{ display: flex; align-items: center; height: 100%; }}
+
+/* Fix Title Font Size */
+h1.st-emotion-cache-18nn76w {{ font-size: 24px !important; }}
+</style>
+"""
+
 # --- EXTERNAL URLS (Mockup) ---
 PAYPAL_TRIAL_LINK = "https://www.paypal.com/instant-key-checkout-0dollar" 
 EXTERNAL_UPGRADE_URL = "https://yourstripe.com/checkout/premium" 
 EXTERNAL_REFERRAL_URL = "https://yourapp.com/ref/ravi" 
 
 # --- PATHS (Connects to the GitHub Action output) ---
-REQUEST_QUEUE_PATH = Path('data/requests/order_queue.csv') # Keep for local debugging
+REQUEST_QUEUE_PATH = Path('data/requests/order_queue.csv') # Legacy CSV queue, imported once into the DB below
+ORDER_QUEUE_DB_PATH = Path('data/requests/order_queue.db') # SQLite (WAL) order queue, also read by the scraper
 RELATIVE_LEAD_PATH = 'data/verified/verified_leads.csv'
-PATHLIB_PATH = Path(__file__).parent.parent / RELATIVE_LEAD_PATH
+LEAD_DATA_DIR = Path(os.environ.get('LEAD_DATA_DIR', Path(__file__).parent.parent / 'data/verified')) # Overridable for load tests
+PATHLIB_PATH = LEAD_DATA_DIR / 'verified_leads.csv'
+LEAD_DATASET_PATH = LEAD_DATA_DIR / 'leads' # Partitioned Parquet (City/Niche)
+LEAD_STATS_PATH = LEAD_DATA_DIR / 'inventory_stats.parquet' # Summary cube written by the verifier
+DATA_POLL_SECONDS = 5 # How often the shared store checks the verified files for changes
+LEAD_DB_URL = os.environ.get('LEAD_DB_URL') # If set, query the SQL lead store instead of the files
+EXPORT_DIR = Path('data/exports') # Finished downloads, reused for the same filters + data version
+EXPORT_CHUNK_SIZE = 50000 # Rows serialized (or pushed to Sheets) per step
+EXPORT_MAX_FILES = 20 # Older exports are deleted
+EXPORT_SHEET_NAME = "Micro Lead Export" # Title prefix: each Sheets export is its own spreadsheet, shared with the
+# customer's Google account (entered next to the format picker). The service account creates them in the Drive
+# folder EXPORT_SHEETS_FOLDER_ID (shared with it as editor) if set, else in its own Drive
+EXPORT_SHEETS_FOLDER_ID = os.environ.get('EXPORT_SHEETS_FOLDER_ID')
+DOWNLOAD_FORMATS = ['csv', 'csv.gz', 'xlsx']
+OUTREACH_LOG_PATH = Path('data/state/outreach.db') # Campaigns + every address emailed (dedup across campaigns)
+OUTREACH_DEFAULT_SUBJECT = "High-Conversion Pitch"
+OUTREACH_DEFAULT_BODY = "Hi {{BusinessName}}, I noticed..."
+METRICS.configure_from_file('dashboard') # Span timers for data loads (no-op unless METRICS is enabled)
 
 # --------------------------------------------------
 # SESSION STATE AND AUTH FUNCTIONS
@@ -81,17 +130,6 @@ def go_to_url(url):
 # DATA LOADING AND HELPER FUNCTIONS
 # --------------------------------------------------
 
-def mask_email(email):
-    if '@' in email and len(email.split('@')[0]) > 4:
-        username, domain = email.split('@')
-        return f"{username[:2]}****@{domain}"
-    return email
-
-def mask_phone(phone):
-    if len(phone) > 8:
-        return f"{phone[:8]}***-{phone[-4:]}"
-    return phone
-
 def render_hero_card(col, title, deal, count, color):
     with col.container(border=True, height=140):
         st.markdown(
@@ -101,115 +139,224 @@ def render_hero_card(col, title, deal, count, color):
         st.markdown(f"**{deal}**", unsafe_allow_html=True)
         st.markdown(f"**{count}** Leads Available", help="Count of leads available for this segment.")
 
-def save_lead_request(niche, location, max_count, user_name):
-    """Saves the user's custom order (Local CSV Placeholder)."""
-    # This function should be replaced by the GSheets implementation
-    
-    new_request = pd.DataFrame({
-        'timestamp': [datetime.now().strftime('%Y-%m-%d %H:%M:%S')],
-        'niche': [niche],
-        'location': [location],
-        'max_count': [max_count],
-        'user_id': [user_name],
-        'status': ['PENDING_SCRAPE']
-    })
-    
-    os.makedirs(REQUEST_QUEUE_PATH.parent, exist_ok=True)
-    
-    if REQUEST_QUEUE_PATH.exists():
-        new_request.to_csv(REQUEST_QUEUE_PATH, mode='a', header=False, index=False)
+def render_export_status(polling):
+    """This session's latest export: progress while the worker runs, then the download.
+    
+    Runs as a fragment; while an export is in progress it reruns every second
+    on its own, and hands back to a full rerun once the export is finished.
+    """
+    job = get_app_context().exports.job(st.session_state.get('export_job'))
+    if job is None:
+        return
+    if job.running:
+        done = f"{job.rows_written:,}" + (f" / {job.rows_total:,}" if job.rows_total else "")
+        st.progress(job.progress, text=f"Preparing {job.label} export: {done} leads")
+    elif polling:
+        st.rerun() # Finished: redraw without the poll timer
+    elif job.status == 'failed':
+        st.error(f"{job.label} export failed: {job.error}")
+    elif job.fmt == 'sheet' and job.available():
+        st.link_button("📊 Open the export in Google Sheets", job.url)
+        if job.share_with:
+            st.caption(f"Shared with {job.share_with}")
+    elif job.available():
+        rows = f" ({job.rows_written:,} leads)" if job.rows_written is not None else ""
+        st.download_button(f"💾 Save {job.label}{rows}", data=job.read_bytes, file_name=job.file_name,
+                           mime=job.mime, key="export_download", on_click="ignore")
     else:
-        new_request.to_csv(REQUEST_QUEUE_PATH, index=False)
-        
+        st.caption("That export has expired. Click Download again to rebuild it.")
+
+def render_outreach_status(polling):
+    """This session's latest outreach campaign, polled like render_export_status."""
+    job = get_app_context().outreach.job(st.session_state.get('outreach_job'))
+    if job is None:
+        return
+    counts = f"{job.sent:,} sent · {job.skipped:,} skipped · {job.failed:,} failed"
+    if job.running:
+        st.progress(job.progress, text=f"Sending: {counts}" + (f" of {job.total:,} leads" if job.total else ""))
+    elif polling:
+        st.rerun() # Finished: redraw without the poll timer
+    elif job.status == 'failed':
+        st.error(f"Outreach stopped: {job.error}" + (f" ({counts})" if job.sent or job.skipped or job.failed else ""))
+    else:
+        st.success(f"Outreach finished: {counts}")
+
+def save_lead_request(niche, location, max_count, user_name):
+    """Queues the user's custom order as PENDING_SCRAPE (one short SQLite transaction)."""
+    get_app_context().order_queue.submit(niche, location, max_count, user_name)
     return True
 
-def load_order_queue():
-    """Safely loads the order queue."""
-    if not REQUEST_QUEUE_PATH.exists():
-        return pd.DataFrame(columns=['timestamp', 'niche', 'location', 'max_count', 'user_id', 'status'])
-    try:
-        return pd.read_csv(REQUEST_QUEUE_PATH)
-    except Exception: 
-        return pd.DataFrame(columns=['timestamp', 'niche', 'location', 'max_count', 'user_id', 'status'])
+def load_order_queue(user_id, limit=3):
+    """The user's most recent orders, oldest first (indexed by user_id)."""
+    return get_app_context().order_queue.orders_for_user(user_id, limit)
 
 
-@st.cache_data(ttl=600)
-def load_live_data():
-    """Reads CSV from the pipeline and adds enrichment columns required by the UI."""
+def load_live_data(cities=None, niches=None):
+    """Reads the verified inventory and adds enrichment columns required by the UI.
     
-    if not PATHLIB_PATH.exists():
-        return pd.DataFrame()
+    Prefers the typed Parquet dataset, opening only the City/Niche partitions
+    asked for (None = all); falls back to the CSV export. Raw and masked
+    contact columns are both kept: the plan picks one per page at render time.
+    """
     
-    try:
-        df = pd.read_csv(PATHLIB_PATH)
-        if df.empty:
-            return pd.DataFrame()
+    with METRICS.span('load_live_data') as span:
+        df = _read_live_data(cities, niches)
+        span.set(rows=len(df))
+    METRICS.flush()
+    return df
 
-        # --- ENRICHMENT LOGIC (Uses columns from the clean CSV) ---
-        df['City'] = df['City'].fillna('N/A')
-        df['Niche'] = df['Niche'].fillna('N/A')
-        
-        # Create the 'city_state' column required by the filter
-        df['city_state'] = df['City'].astype(str)
-        
-        # Apply Masking 
-        is_premium = st.session_state.get('is_premium', False)
-        
-        # FIX: The CSV contains the clean PII data; we apply the mask ONLY for the trial user
-        # We must load the PII data first, then mask it.
-        # This requires the CSV to contain the UNMASKED data.
-        
-        df['Phone'] = df.apply(lambda row: mask_phone(row['Phone']) if not is_premium else row['Phone'], axis=1)
-        df['Email'] = df.apply(lambda row: mask_email(row['Email']) if not is_premium else row['Email'], axis=1)
-        
-        # Ensure all columns required by the UI are present before returning
-        required_cols = ['Business Name', 'Phone', 'Email', 'City', 'Niche', 'Lead Score', 'Reason to Contact', 'Attribute']
-        if not all(col in df.columns for col in required_cols):
-             st.error("Data schema mismatch. Please run pipeline again.")
-             return pd.DataFrame()
-        
-        return df.sort_values(by='Lead Score', ascending=False).reset_index(drop=True)
 
-    except Exception as e:
-        st.error(f"Error reading or processing live data: '{e}'")
+def _read_live_data(cities, niches):
+    """load_live_data without the timing span."""
+    from lead_storage import read_verified, verified_exists # pyarrow: only needed when (re)loading
+    
+    if verified_exists(LEAD_DATASET_PATH):
+        df = read_verified(str(LEAD_DATASET_PATH), cities=cities, niches=niches)
+    elif PATHLIB_PATH.exists():
+        df = pd.read_csv(PATHLIB_PATH)
+    else:
+        return pd.DataFrame()
+    
+    if df.empty:
         return pd.DataFrame()
 
+    # --- ENRICHMENT LOGIC (Uses columns from the clean CSV) ---
+    df['City'] = df['City'].fillna('N/A')
+    df['Niche'] = df['Niche'].fillna('N/A')
+    
+    # Create the 'city_state' column required by the filter
+    df['city_state'] = df['City'].astype(str)
+    
+    # Ensure all columns required by the UI are present before returning
+    required_cols = ['Business Name', 'Phone', 'Email', 'City', 'Niche', 'Lead Score', 'Reason to Contact', 'Attribute']
+    if not all(col in df.columns for col in required_cols):
+        raise ValueError("Data schema mismatch. Please run pipeline again.")
+    
+    return df.sort_values(by='Lead Score', ascending=False).reset_index(drop=True)
 
-# --------------------------------------------------
-# GLOBAL DATA LOAD 
-# --------------------------------------------------
-df_raw = load_live_data() 
-df_orders = load_order_queue()
 
-# Calculate KPIs from the live data
-leads_new_biz_count = len(df_raw[df_raw['Attribute'] == 'New Businesses']) if not df_raw.empty else 0
-leads_no_web_count = len(df_raw[df_raw['Attribute'] == 'No Website']) if not df_raw.empty else 0
-leads_high_conv_count = len(df_raw[df_raw['Attribute'] == 'High Conversion']) if not df_raw.empty else 0
+def build_inventory(df, cube=None):
+    """(frame, filter index, page query, summary stats) for one version of the verified data.
+    
+    Summary stats come from the verifier's cube; if there is none, or it does
+    not add up to this frame (written by an older run), they are built from
+    the frame once here.
+    """
+    from inventory_stats import InventoryStats
+    engine = FilterEngine(df)
+    stats = InventoryStats(cube) if cube is not None else None
+    if stats is None or stats.total() != len(df):
+        stats = InventoryStats.from_frame(df)
+    return df, engine, InventoryQuery(df, engine), stats
 
 
-# --------------------------------------------------
-# GLOBAL CSS INJECTION
-# --------------------------------------------------
-st.markdown(f"""
-<style>
-/* Adjust spacing for density */
-.stApp {{ padding-top: 20px !important; padding-right: 30px !important; padding-left: 30px !important; }}
-div[data-testid="stVerticalBlock"] > div:first-child {{ padding-top: 0 !important; }}
-.st-emotion-cache-1mnrbfp {{ visibility: hidden !important; }}
+def load_inventory():
+    from inventory_stats import read_stats
+    return build_inventory(load_live_data(), read_stats(str(LEAD_STATS_PATH)))
 
-/* Fix Primary Button Color to Red CTA */
-.stButton>button[kind="primary"] {{
-    background-color: {COLOR_RED_CTA} !important;
-    color: white !important;
-    border: none !important;
-}}
-/* Fix Header Alignment */
-.header-buttons-container {{ display: flex; align-items: center; height: 100%; }}
 
-/* Fix Title Font Size */
-h1.st-emotion-cache-18nn76w {{ font-size: 24px !important; }}
-</style>
-""", unsafe_allow_html=True)
+# One version of the inventory as the page needs it (index/query are the SQL store in SQL mode).
+# `stats` answers every summary widget (hero cards, option lists, earnings) from the cube.
+Inventory = namedtuple('Inventory', ['index', 'query', 'stats', 'empty', 'version', 'error'])
+
+
+class AppContext:
+    """Process-wide resources shared by every session, each created on first use.
+    
+    Nothing here is built until a page needs it (the login screen needs none
+    of it). Summary stats are loaded with each data version, never per rerun.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._order_queue = None
+        self._lead_store = None
+        self._lead_repository = None
+        self._empty_inventory = None
+        self._exports = None
+        self._outreach = None
+        self._sql_stats = (0.0, None, None) # (monotonic time read, InventoryStats, load version)
+    
+    def _lazy(self, attr, factory):
+        value = getattr(self, attr)
+        if value is None:
+            with self._lock:
+                value = getattr(self, attr)
+                if value is None:
+                    value = factory()
+                    setattr(self, attr, value)
+        return value
+    
+    @property
+    def order_queue(self):
+        """Transactional order queue (imports the old CSV queue once)."""
+        def create():
+            from order_queue import OrderQueue
+            queue = OrderQueue(ORDER_QUEUE_DB_PATH)
+            queue.import_csv(REQUEST_QUEUE_PATH)
+            return queue
+        return self._lazy('_order_queue', create)
+    
+    @property
+    def lead_store(self):
+        """In-memory inventory, reloaded in the background only when the verified
+        files change (see scripts/data_store.py): a pipeline push shows up within
+        DATA_POLL_SECONDS and no request ever waits on a reload.
+        """
+        return self._lazy('_lead_store', lambda: DataStore(
+            [LEAD_DATASET_PATH, PATHLIB_PATH, LEAD_STATS_PATH], load_inventory, poll_seconds=DATA_POLL_SECONDS
+        ).start())
+    
+    @property
+    def lead_repository(self):
+        """Pooled connection to the SQL lead store."""
+        def create():
+            from lead_repository import LeadRepository # Only needed in SQL mode
+            return LeadRepository(LEAD_DB_URL)
+        return self._lazy('_lead_repository', create)
+    
+    @property
+    def exports(self):
+        """Background export worker (scripts/lead_export.py), shared so repeat exports hit its cache."""
+        def create():
+            from lead_export import ExportManager
+            return ExportManager(EXPORT_DIR, EXPORT_CHUNK_SIZE, EXPORT_MAX_FILES, sheet_name=EXPORT_SHEET_NAME,
+                                 sheet_folder_id=EXPORT_SHEETS_FOLDER_ID,
+                                 service_account_json=os.environ.get('GSPREAD_SERVICE_ACCOUNT'))
+        return self._lazy('_exports', create)
+    
+    @property
+    def outreach(self):
+        """Background email sender (scripts/outreach.py); SMTP_* and OUTREACH_FROM come from the environment."""
+        def create():
+            from outreach import OutreachManager, smtp_settings
+            return OutreachManager(OUTREACH_LOG_PATH, smtp=smtp_settings(os.environ),
+                                   from_address=os.environ.get('OUTREACH_FROM') or os.environ.get('SMTP_USER'))
+        return self._lazy('_outreach', create)
+    
+    def inventory(self):
+        if LEAD_DB_URL:
+            # SQL mode: pages are indexed queries, no frame in memory; the cube and the
+            # repository's load version are re-read at most every DATA_POLL_SECONDS
+            repository = self.lead_repository
+            read_at, stats, version = self._sql_stats
+            if stats is None or time.monotonic() - read_at > DATA_POLL_SECONDS:
+                from inventory_stats import InventoryStats
+                stats, version = InventoryStats(repository.stats_cube()), repository.data_version()
+                self._sql_stats = (time.monotonic(), stats, version)
+            return Inventory(repository, repository, stats, stats.is_empty(), version, None)
+        
+        snapshot = self.lead_store.snapshot()
+        if snapshot is None:
+            _, index, query, stats = self._lazy('_empty_inventory', lambda: build_inventory(pd.DataFrame()))
+            return Inventory(index, query, stats, True, None, self.lead_store.last_error)
+        df, index, query, stats = snapshot.data
+        return Inventory(index, query, stats, df.empty, snapshot.version, None)
+
+
+@st.cache_resource
+def get_app_context():
+    return AppContext()
 
 
 # --------------------------------------------------
@@ -223,6 +370,14 @@ st.set_page_config(
 )
 
 
+# --------------------------------------------------
+# GLOBAL CSS INJECTION
+# --------------------------------------------------
+# Streamlit drops elements a rerun does not emit, so the <style> tag is sent every
+# run; the string itself is built once per process.
+st.markdown(APP_CSS, unsafe_allow_html=True)
+
+
 # --------------------------------------------------
 # --- AUTHENTICATION GATE (Not displayed when logged in) ---
 # --------------------------------------------------
@@ -231,6 +386,21 @@ if not st.session_state['logged_in']:
     st.stop()
 
 
+# --------------------------------------------------
+# GLOBAL DATA LOAD (after the gate: the login screen never touches the inventory)
+# --------------------------------------------------
+app_context = get_app_context()
+inventory = app_context.inventory()
+if inventory.error:
+    st.error(f"Error reading or processing live data: '{inventory.error}'")
+lead_query, inventory_stats, inventory_empty, data_version = inventory.query, inventory.stats, inventory.empty, inventory.version
+
+# KPIs from the summary cube (O(cube rows), memoized per data version)
+leads_new_biz_count = inventory_stats.count('Attribute', 'New Businesses')
+leads_no_web_count = inventory_stats.count('Attribute', 'No Website')
+leads_high_conv_count = inventory_stats.count('Attribute', 'High Conversion')
+
+
 # --------------------------------------------------
 # --- APPLICATION START: LOGGED IN USER VIEW ---
 # --------------------------------------------------
@@ -269,32 +439,62 @@ if 'filter_city' not in st.session_state: st.session_state['filter_city'] = st.s
 if 'filter_niche' not in st.session_state: st.session_state['filter_niche'] = st.session_state['user']['niche']
 if 'filter_score' not in st.session_state: st.session_state['filter_score'] = 70
 if 'filter_reason' not in st.session_state: st.session_state['filter_reason'] = 'All'
+if 'sort_order' not in st.session_state: st.session_state['sort_order'] = SORT_OPTIONS[0]
+if 'page_cursors' not in st.session_state: st.session_state['page_cursors'] = [None]
+
+def next_page(cursor):
+    st.session_state['page_cursors'].append(cursor)
+
+def prev_page():
+    if len(st.session_state['page_cursors']) > 1:
+        st.session_state['page_cursors'].pop()
 
 
 # --- DYNAMIC FILTERING LOGIC ---
-df_current_view = df_raw.copy() 
+# Filters are index lookups (posting-list intersections + a binary search on
+# Lead Score); only the rows of the current page are ever materialized.
 is_premium = st.session_state['is_premium']
+active_filters = {}
+min_score = None
 
 # APPLY FILTERS based on session state
 if is_premium:
     if st.session_state['filter_city'] != 'All': 
-        df_current_view = df_current_view[df_current_view['City'].str.contains(st.session_state['filter_city'], case=False, na=False)]
+        active_filters['City'] = st.session_state['filter_city']
     if st.session_state['filter_niche'] != 'All': 
-        df_current_view = df_current_view[df_current_view['Niche'].str.contains(st.session_state['filter_niche'], case=False, na=False)]
+        active_filters['Niche'] = st.session_state['filter_niche']
     if st.session_state['filter_score'] > 0: 
-        df_current_view = df_current_view[df_current_view['Lead Score'] >= st.session_state['filter_score']]
+        min_score = st.session_state['filter_score']
     if st.session_state['filter_reason'] != 'All':
-        df_current_view = df_current_view[df_current_view['Reason to Contact'].str.contains(st.session_state['filter_reason'], case=False, na=False)]
+        active_filters['Reason to Contact'] = st.session_state['filter_reason']
+    
+    # Back to page 1 whenever the filters, the sort order or the data version change
+    sort_descending = st.session_state['sort_order'] == SORT_OPTIONS[0]
+    page_key = (tuple(sorted(active_filters.items())), min_score, sort_descending, data_version)
+    if st.session_state.get('page_key') != page_key:
+        st.session_state['page_key'] = page_key
+        st.session_state['page_cursors'] = [None]
     
-    total_leads_for_display = len(df_current_view)
-    df_filtered_for_display = df_current_view
+    lead_page = lead_query.page(active_filters, min_score=min_score, descending=sort_descending,
+                                after=st.session_state['page_cursors'][-1], limit=PAGE_SIZE)
+    total_leads_for_display = lead_page.total
+    df_filtered_for_display = lead_page.rows
 else:
     # Trial Logic: Enforce Ravi's default niche and limit leads
-    df_current_view = df_current_view[df_current_view['City'].str.contains(st.session_state['user']['city'], case=False, na=False)]
-    df_current_view = df_current_view[df_current_view['Niche'].str.contains(st.session_state['user']['niche'], case=False, na=False)]
+    active_filters['City'] = st.session_state['user']['city']
+    active_filters['Niche'] = st.session_state['user']['niche']
     
-    total_leads_for_display = len(df_current_view) 
-    df_filtered_for_display = df_current_view.head(TRIAL_LEAD_LIMIT)
+    lead_page = lead_query.page(active_filters, limit=TRIAL_LEAD_LIMIT)
+    total_leads_for_display = lead_page.total 
+    df_filtered_for_display = lead_page.rows
+
+# Apply Masking on the visible page only: the verifier stores masked columns
+# next to the raw PII, so the trial view just points Phone/Email at them
+if not inventory_empty:
+    df_filtered_for_display = select_contact_columns(df_filtered_for_display, is_premium)
+
+# Premium earnings count every filtered lead, trial only the visible sample (both from the cube)
+leads_in_view = inventory_stats.total(active_filters, min_score) if is_premium else len(df_filtered_for_display)
 
 
 # --- LEFT COLUMN: HERO CARDS & TABLE ---
@@ -307,12 +507,38 @@ with main_content_cols[0]:
 
     # 5. ACTION BAR 
     action_buttons = st.columns([1.5, 2, 1.5, 1])
+    outreach_request = False
     
     if is_premium:
-        with action_buttons[0]: st.button("📥 Download CSV", key="act_csv")
-        with action_buttons[1]: st.button("📊 Open in Google Sheets", key="act_sheets")
-        with action_buttons[2]: st.button("✉️ Send Email", key="act_email")
+        # Exports of the current filters run in the background (scripts/lead_export.py)
+        from lead_export import EXPORT_FORMATS
+        export_fmt = st.session_state.get('export_format', DOWNLOAD_FORMATS[0])
+        export_request = None
+        with action_buttons[0]:
+            if st.button(f"📥 Download {EXPORT_FORMATS[export_fmt][0]}", key="act_csv"): export_request = export_fmt
+        with action_buttons[1]:
+            if st.button("📊 Open in Google Sheets", key="act_sheets"): export_request = 'sheet'
+        with action_buttons[2]:
+            if st.button("✉️ Send Email", key="act_email"): outreach_request = True # Sent with the Outreach Templates panel
         with action_buttons[3]: st.button("📞 Call", key="act_call")
+        
+        export_cols = st.columns([1.5, 2, 3])
+        export_cols[0].selectbox("Download format", DOWNLOAD_FORMATS, key="export_format", format_func=lambda f: EXPORT_FORMATS[f][0],
+                                 label_visibility="collapsed")
+        share_with = export_cols[1].text_input("Google account for Sheets exports", key="sheet_share_email",
+                                               placeholder="Google account for Sheets (you@gmail.com)", label_visibility="collapsed")
+        
+        if export_request == 'sheet' and '@' not in share_with:
+            export_cols[1].warning("Enter the Google account the sheet should be shared with.")
+        elif export_request:
+            export_job = app_context.exports.submit(lead_query, active_filters, min_score, sort_descending, export_request, data_version,
+                                                    share_with=share_with)
+            st.session_state['export_job'] = export_job.key
+        
+        with export_cols[2]:
+            current_export = app_context.exports.job(st.session_state.get('export_job'))
+            export_polling = current_export is not None and current_export.running
+            st.fragment(render_export_status, run_every=1.0 if export_polling else None)(export_polling)
     else:
         st.markdown("<p style='padding-top:15px; font-weight:bold; color:red;'>🔒 Upgrade required for bulk actions</p>", unsafe_allow_html=True)
     
@@ -321,9 +547,9 @@ with main_content_cols[0]:
     # 3. FILTER CONTROLS (FUNCTIONAL)
     st.markdown("### Filter Leads & Inventory")
     
-    city_options = df_raw['City'].unique().tolist() if not df_raw.empty else ['N/A']
-    niche_options = df_raw['Niche'].unique().tolist() if not df_raw.empty else ['N/A']
-    reason_options = ['All'] + df_raw['Reason to Contact'].unique().tolist() if not df_raw.empty else ['All']
+    city_options = inventory_stats.options('City') if not inventory_empty else ['N/A']
+    niche_options = inventory_stats.options('Niche') if not inventory_empty else ['N/A']
+    reason_options = ['All'] + inventory_stats.options('Reason to Contact') if not inventory_empty else ['All']
     
     city_index = city_options.index(st.session_state['user']['city']) if st.session_state['user']['city'] in city_options else 0
     niche_index = niche_options.index(st.session_state['user']['niche']) if st.session_state['user']['niche'] in niche_options else 0
@@ -365,6 +591,9 @@ with main_content_cols[0]:
     # 4. LEAD INVENTORY TABLE
     st.markdown("### Lead Inventory (High Priority)")
     
+    if is_premium:
+        st.selectbox("Sort", SORT_OPTIONS, key="sort_order", label_visibility="collapsed")
+    
     if total_leads_for_display == 0:
         st.warning("No leads found for your current criteria.")
     else:
@@ -376,25 +605,36 @@ with main_content_cols[0]:
                 "Lead Score": st.column_config.ProgressColumn("Lead Score", format="%d", min_value=0, max_value=100, color="red")
             }
         )
+        
+        if is_premium:
+            page_number = len(st.session_state['page_cursors'])
+            total_label = f"{total_leads_for_display:,}" if lead_page.total_is_exact else f"~{total_leads_for_display:,}"
+            page_cols = st.columns([1, 3, 1])
+            page_cols[0].button("◀ Prev", key="page_prev", on_click=prev_page, disabled=page_number == 1)
+            page_cols[1].caption(f"Page {page_number} · {total_label} leads")
+            page_cols[2].button("Next ▶", key="page_next", on_click=next_page, args=(lead_page.next_cursor,),
+                                disabled=lead_page.next_cursor is None)
 
 # Order Status Tracker (Moved to its own section in the final layout)
 st.markdown("## ⏳ My Order Status")
 
-# Logic to load order_queue.csv and filter by user
-df_orders = load_order_queue()
-
-if not df_orders.empty:
-    df_my_orders = df_orders[df_orders['user_id'] == st.session_state['user']['name']].tail(3)
+# Only this user's latest orders are read from the queue
+df_my_orders = load_order_queue(st.session_state['user']['name'])
 
+if not df_my_orders.empty:
     for index, row in df_my_orders.iterrows():
         status_emoji = "✅" if row['status'] == 'SCRAPE_COMPLETE' else "🔄"
         status_color = "green" if row['status'] == 'SCRAPE_COMPLETE' else "orange"
         
+        # Orders are filled over several runs when the scrape budget is shared
+        progress = f" ({row['fulfilled']:,}/{row['max_count']:,} listings scraped)" if row['status'] != 'SCRAPE_COMPLETE' and row['fulfilled'] else ""
         st.markdown(
             f"<span style='color:{status_color}; font-weight:bold;'>{status_emoji} {row['status']}</span> "
-            f"- {row['niche']} in {row['location']}",
+            f"- {row['niche']} in {row['location']}{progress}",
             unsafe_allow_html=True
         )
+    st.caption("Progress counts scraped listings. Verification then drops invalid and duplicate ones, "
+               "so a completed order can hold fewer verified leads than it asked for.")
 else:
     st.caption("No custom orders placed yet.")
 
@@ -407,15 +647,41 @@ with main_content_cols[1]:
         template_tab1, template_tab2, template_tab3 = st.tabs(["Email", "WhatsApp", "Call Scripts"])
         
         with template_tab1:
-            st.caption("Subject: High-Conversion Pitch (Jinja2 Supported)")
-            st.text_area("Template Preview", "Hi {{BusinessName}}, I noticed...", height=100, label_visibility="collapsed")
-            st.button("Generate & Send (Async)", use_container_width=True, key="send_gen") 
+            st.caption("Subject & body (Jinja2 Supported): {{BusinessName}}, {{City}}, {{Niche}}, {{ReasonToContact}}")
+            st.text_input("Subject", OUTREACH_DEFAULT_SUBJECT, key="outreach_subject", label_visibility="collapsed")
+            st.text_area("Template Preview", OUTREACH_DEFAULT_BODY, height=100, key="outreach_body", label_visibility="collapsed")
+            if st.button("Generate & Send (Async)", use_container_width=True, key="send_gen", disabled=not is_premium,
+                         help=None if is_premium else "Upgrade required for bulk actions"):
+                outreach_request = True
+            
+            if is_premium:
+                # Every lead matching the filters, sent in the background; leads this user already contacted are skipped
+                outreach = app_context.outreach
+                if not inventory_empty:
+                    # This user's campaigns a restart interrupted (once per user and process)
+                    resumed = outreach.resume(lead_query, st.session_state['user']['name'])
+                    if resumed and 'outreach_job' not in st.session_state:
+                        st.session_state['outreach_job'] = resumed[-1].key
+                if outreach_request:
+                    try:
+                        outreach_job = outreach.submit(
+                            lead_query, active_filters, min_score,
+                            st.session_state.get('outreach_subject', OUTREACH_DEFAULT_SUBJECT),
+                            st.session_state.get('outreach_body', OUTREACH_DEFAULT_BODY),
+                            st.session_state['user']['name'],
+                        )
+                        st.session_state['outreach_job'] = outreach_job.key
+                    except ValueError as e:
+                        st.error(f"Template error: {e}")
+                current_outreach = outreach.job(st.session_state.get('outreach_job'))
+                outreach_polling = current_outreach is not None and current_outreach.running
+                st.fragment(render_outreach_status, run_every=1.0 if outreach_polling else None)(outreach_polling)
 
     # 7. POTENTIAL EARNINGS TRACKER
     st.markdown("<br>", unsafe_allow_html=True)
     with st.container(border=True):
         st.markdown("##### Probabilistic Conversion Value")
-        st.markdown(f"### Estimated Income: **${len(df_filtered_for_display) * 75} Today**")
+        st.markdown(f"### Estimated Income: **${leads_in_view * 75} Today**")
         st.progress(70) 
         st.caption("Contact more leads to increase earnings!")
 
@@ -0,0 +1,193 @@
+import asyncio
+import time
+from collections import defaultdict
+from contextlib import asynccontextmanager
+
+from playwright.async_api import async_playwright
+
+# Chromium-only; other engines report 0 and fall back to page-count recycling
+JS_HEAP_SCRIPT = "() => (performance.memory ? performance.memory.usedJSHeapSize : 0)"
+
+
+class PooledContext:
+    """A warm browser context plus the single page it hands out on every lease."""
+
+    def __init__(self, context, page):
+        self.context = context
+        self.page = page
+        self.pages_served = 0
+        self.heap_bytes = 0
+
+
+class PageLease:
+    """What a target receives from `BrowserPool.lease()`: a page and a timed `goto`."""
+
+    def __init__(self, pool, page, label):
+        self.pool = pool
+        self.page = page
+        self.label = label
+
+    async def goto(self, url, **kwargs):
+        start = time.perf_counter()
+        response = await self.page.goto(url, **kwargs)
+        self.pool.load_times[self.label].append(time.perf_counter() - start)
+        return response
+
+
+class BrowserPool:
+    """Keeps N warm Playwright contexts on one browser and leases their pages to scrape targets.
+
+    Contexts are recycled after `max_pages_per_context` leases or once their JS
+    heap crosses `max_context_memory_mb`. Images, fonts and media are blocked at
+    the network layer. A lease is a hit when it lands on an already-warm context
+    and a miss when a recycled context has to be rebuilt first.
+    """
+
+    def __init__(self, size=4, max_pages_per_context=50, max_context_memory_mb=512,
+                 blocked_resource_types=('image', 'font', 'media'), headless=True):
+        self.size = size
+        self.max_pages_per_context = max_pages_per_context
+        self.max_context_bytes = max_context_memory_mb * 1024 * 1024
+        self.blocked_resource_types = set(blocked_resource_types)
+        self.headless = headless
+
+        self._playwright = None
+        self._browser = None
+        self._idle = asyncio.Queue()
+        self._live = []
+
+        self.stats = {'leases': 0, 'hits': 0, 'misses': 0, 'recycled_pages': 0, 'recycled_memory': 0, 'lease_wait_s': 0.0}
+        self.load_times = defaultdict(list)
+
+    @classmethod
+    def from_config(cls, pool_config):
+        return cls(
+            size=pool_config['SIZE'],
+            max_pages_per_context=pool_config['MAX_PAGES_PER_CONTEXT'],
+            max_context_memory_mb=pool_config['MAX_CONTEXT_MEMORY_MB'],
+            blocked_resource_types=pool_config['BLOCKED_RESOURCE_TYPES'],
+            headless=pool_config['HEADLESS'],
+        )
+
+    # --- LIFECYCLE ---
+
+    async def start(self):
+        self._playwright = await async_playwright().start()
+        self._browser = await self._playwright.chromium.launch(headless=self.headless)
+        for _ in range(self.size):
+            self._idle.put_nowait(await self._new_context())
+        return self
+
+    async def close(self):
+        for slot in self._live:
+            await slot.context.close()
+        self._live.clear()
+        if self._browser:
+            await self._browser.close()
+        if self._playwright:
+            await self._playwright.stop()
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def _new_context(self):
+        context = await self._browser.new_context()
+        await context.route("**/*", self._block_heavy_resources)
+        slot = PooledContext(context, await context.new_page())
+        self._live.append(slot)
+        return slot
+
+    async def _retire(self, slot):
+        if slot in self._live:
+            self._live.remove(slot)
+            await slot.context.close()
+
+    async def _block_heavy_resources(self, route):
+        if route.request.resource_type in self.blocked_resource_types:
+            await route.abort()
+        else:
+            await route.continue_()
+
+    # --- LEASE API ---
+
+    @asynccontextmanager
+    async def lease(self, label):
+        """Yields a `PageLease` for one target; the page goes back to the pool afterwards."""
+        wait_start = time.perf_counter()
+        slot = await self._idle.get()
+        self.stats['lease_wait_s'] += time.perf_counter() - wait_start
+        self.stats['leases'] += 1
+
+        try:
+            if slot is None:
+                # The previous holder recycled this context; rebuild it on demand
+                self.stats['misses'] += 1
+                slot = await self._new_context()
+            else:
+                self.stats['hits'] += 1
+                if slot.page.is_closed():
+                    slot.page = await slot.context.new_page()
+
+            yield PageLease(self, slot.page, label)
+            slot.pages_served += 1
+            slot = await self._release(slot)
+        except BaseException:
+            if slot is not None:
+                await self._retire(slot)
+            self._idle.put_nowait(None)
+            raise
+
+        self._idle.put_nowait(slot)
+
+    async def _release(self, slot):
+        """Returns the slot to reuse, or None if the context was recycled."""
+        try:
+            slot.heap_bytes = await slot.page.evaluate(JS_HEAP_SCRIPT)
+        except Exception:
+            slot.heap_bytes = 0
+
+        if slot.pages_served >= self.max_pages_per_context:
+            self.stats['recycled_pages'] += 1
+        elif self.max_context_bytes and slot.heap_bytes >= self.max_context_bytes:
+            self.stats['recycled_memory'] += 1
+        else:
+            await slot.page.goto("about:blank") # Drop the previous target's DOM before reuse
+            return slot
+
+        await self._retire(slot)
+        return None
+
+    # --- REPORTING ---
+
+    def report(self):
+        """Pool hit rate, recycling counts and per-target page-load timings."""
+        leases = self.stats['leases']
+        return {
+            'pool_size': self.size,
+            'leases': leases,
+            'hit_rate': round(self.stats['hits'] / leases, 3) if leases else 0.0,
+            'recycled_pages': self.stats['recycled_pages'],
+            'recycled_memory': self.stats['recycled_memory'],
+            'avg_lease_wait_s': round(self.stats['lease_wait_s'] / leases, 4) if leases else 0.0,
+            'page_loads': {
+                label: {
+                    'count': len(times),
+                    'mean_s': round(sum(times) / len(times), 4),
+                    'max_s': round(max(times), 4),
+                }
+                for label, times in self.load_times.items()
+            },
+        }
+
+    def print_report(self):
+        report = self.report()
+        print(
+            f"Browser pool: {report['leases']} leases, hit rate {report['hit_rate']:.0%}, "
+            f"recycled {report['recycled_pages']} (pages) / {report['recycled_memory']} (memory), "
+            f"avg lease wait {report['avg_lease_wait_s']}s"
+        )
+        for label, timing in report['page_loads'].items():
+            print(f"  {label}: {timing['count']} loads, mean {timing['mean_s']}s, max {timing['max_s']}s")
@@ -1,8 +1,18 @@
 import pandas as pd
+import numpy as np
 import re
 import yaml
 import os
+import argparse
 from datetime import datetime
+from lead_storage import (read_raw, iter_raw_chunks, read_verified, verified_exists, write_verified, append_verified,
+                          export_csv, VerifiedDatasetWriter, EXPORT_COLUMNS)
+from inventory_stats import STATS_DIMENSIONS, InventoryStatsWriter, build_stats, write_stats
+from validation import ValidationEngine
+from masking import add_masked_columns
+from dedup_index import DedupIndex
+from lead_repository import LeadRepository
+from metrics import METRICS
 
 # --- Load Configuration ---
 try:
@@ -12,83 +22,281 @@ except FileNotFoundError:
     print("Error: config/config.yaml not found.")
     exit(1)
 
-EMAIL_REGEX = config['VERIFICATION']['EMAIL_REGEX']
-# Setting to 5 to pass mock phone data
-MIN_PHONE_LEN = 5
+# Span timers / counters (no-ops unless METRICS is enabled)
+METRICS.configure(config['METRICS'], 'verify')
+
+# Pipeline hand-off paths (Parquet is the working format; CSV stays for customers)
+RAW_PARQUET_PATH = 'data/raw/latest_raw_scrape.parquet'
+RAW_CSV_PATH = 'data/raw/latest_raw_scrape.csv'
+VERIFIED_DATASET_PATH = 'data/verified/leads'
+VERIFIED_CSV_PATH = 'data/verified/verified_leads.csv'
+VERIFIED_STATS_PATH = 'data/verified/inventory_stats.parquet' # Summary cube for the dashboard (see inventory_stats.py)
+
+# Phone/email rules (EMAIL_REGEX, MIN_PHONE_LENGTH, country lengths, MX check) come from config
+VALIDATOR = ValidationEngine.from_config(config['VERIFICATION'])
+STREAM_CHUNK_SIZE = config['VERIFICATION']['STREAM_CHUNK_SIZE']
+
+# Dedup key: first occurrence of (Business Name, City) wins
+DEDUP_KEYS = ['Business Name', 'City']
+
+# Cross-run dedup (None = each run replaces the inventory, as before)
+DEDUP_INDEX = DedupIndex.from_config(config['DEDUP_INDEX']) if config['DEDUP_INDEX']['ENABLED'] else None
+
+# Optional SQL copy of the inventory for the dashboard (None = files only)
+LEAD_REPOSITORY = LeadRepository.from_config(config['LEAD_DB']).create_schema() if config['LEAD_DB']['ENABLED'] else None
+
+# List of all expected columns for the dashboard's enrichment
+EXPECTED_COLS = [
+    'Business Name', 'Phone', 'phone_e164', 'Email', 'City', 'Niche', 'Lead Score', 
+    'Reason to Contact', 'Attribute', 'source_url', 'scraped_date'
+]
+
+def passes_validation(df):
+    """Vectorized phone/email checks; returns the mask of rows that pass.
+    
+    Also adds the normalized 'phone_e164' column to `df`.
+    """
+    passed, df['phone_e164'] = VALIDATOR.validate(df)
+    return passed
+
+def select_output(df, mask):
+    """Final Output Filtering and Formatting: passing rows, expected columns only (one copy).
+    
+    Trial-view masks are computed here once, so the dashboard never masks per row.
+    """
+    cols_to_keep = [col for col in EXPECTED_COLS if col in df.columns]
+    return add_masked_columns(df.loc[mask, cols_to_keep])
+
+def record_run_metrics():
+    """Counters for the whole run: rejections by rule, cross-run duplicates by key, MX cache use."""
+    METRICS.inc_each('leads_rejected', VALIDATOR.rejections, 'rule')
+    if DEDUP_INDEX is not None:
+        METRICS.inc_each('leads_deduped', {k: v for k, v in DEDUP_INDEX.stats.items() if k != 'checked'}, 'key')
+    if VALIDATOR.mx_cache is not None:
+        METRICS.inc_each('mx_cache_requests', VALIDATOR.mx_cache.stats, 'result')
 
 def verify_data(df):
     print(f"Starting verification on {len(df)} records...")
+    rows_in = len(df)
+    METRICS.inc('leads_in', rows_in)
     
     # 1. Deduplication 
-    df.drop_duplicates(subset=['Business Name', 'City'], keep='first', inplace=True)
+    with METRICS.span('dedup', rows=rows_in):
+        df = df.drop_duplicates(subset=DEDUP_KEYS, keep='first')
+    METRICS.inc('leads_deduped', rows_in - len(df), key='in_run')
     
-    # 2. Basic Email Validation (Tier 1 - FINAL BYPASS)
-    # The error was here; this is the fix to remove the complexity
-    df['email_verified'] = True 
-    df_verified = df.copy() 
+    # 2-4. Validation and output selection
+    with METRICS.span('validate', rows=len(df)):
+        df_final = select_output(df, passes_validation(df))
     
-    # 3. Phone Cleanup & Validation (Guaranteed to pass with MIN_PHONE_LEN=5)
-    df_verified['phone_clean'] = df_verified['Phone'].astype(str).str.replace(r'[^0-9]', '', regex=True)
-    df_verified['phone_verified'] = df_verified['phone_clean'].str.len() >= MIN_PHONE_LEN
+    # 5. Cross-run dedup against leads already in the inventory
+    if DEDUP_INDEX is not None:
+        with METRICS.span('dedup_index', rows=len(df_final)):
+            df_final = DEDUP_INDEX.filter_new(df_final)
+        print(DEDUP_INDEX.summary())
     
-    # 4. Final Output Filtering and Formatting
-    df_final = df_verified[
-        (df_verified['phone_verified']) & 
-        (df_verified['email_verified'])
-    ].copy()
+    print(VALIDATOR.summary())
+    print(f"Final verified lead count: {len(df_final)}")
+    METRICS.inc('leads_verified', len(df_final))
+    record_run_metrics()
+    return df_final
+
+# --------------------------------------------------
+# STREAMING MODE (bounded memory for large backfills)
+# --------------------------------------------------
+
+def first_occurrences(df, seen_keys):
+    """Mask of rows whose dedup key was not seen earlier in this chunk or in any previous chunk.
     
-    # List of all expected columns for the dashboard's enrichment
-    expected_cols = [
-        'Business Name', 'Phone', 'Email', 'City', 'Niche', 'Lead Score', 
-        'Reason to Contact', 'Attribute', 'source_url', 'scraped_date'
-    ]
+    `seen_keys` holds 64-bit hashes of every key kept so far and is updated in place.
+    """
+    keys = pd.util.hash_pandas_object(df[DEDUP_KEYS], index=False).to_numpy()
+    mask = ~pd.Series(keys).duplicated().to_numpy()
+    mask &= np.fromiter((k not in seen_keys for k in keys.tolist()), dtype=bool, count=len(keys))
+    seen_keys.update(keys[mask].tolist())
+    return mask
+
+def verify_chunk(df_chunk, seen_keys):
+    """verify_data for one chunk of a larger input; `seen_keys` carries the dedup state across chunks."""
+    rows_in = len(df_chunk)
+    with METRICS.span('verify_chunk', rows=rows_in) as span:
+        df_chunk = df_chunk[first_occurrences(df_chunk, seen_keys)].copy()
+        METRICS.inc('leads_deduped', rows_in - len(df_chunk), key='in_run')
+        df_final = select_output(df_chunk, passes_validation(df_chunk))
+        if DEDUP_INDEX is not None:
+            df_final = DEDUP_INDEX.filter_new(df_final) # Caller add()s each chunk once written
+        span.set(rows_out=len(df_final))
+    METRICS.inc('leads_in', rows_in)
+    METRICS.inc('leads_verified', len(df_final))
+    return df_final
+
+def verify_stream(chunks):
+    """Verifies an iterable of raw chunks, yielding each chunk's verified rows as soon as it is done."""
+    seen_keys = set()
+    total_in = 0
+    total_out = 0
     
-    # Filter the final DataFrame to only include these columns
-    cols_to_keep = [col for col in expected_cols if col in df_final.columns]
-    df_final = df_final[cols_to_keep]
+    for df_chunk in chunks:
+        total_in += len(df_chunk)
+        df_final = verify_chunk(df_chunk, seen_keys)
+        total_out += len(df_final)
+        yield df_final
     
-    print(f"Final verified lead count: {len(df_final)}")
-    return df_final
+    if DEDUP_INDEX is not None:
+        print(DEDUP_INDEX.summary())
+    print(VALIDATOR.summary())
+    print(f"Streamed verification: {total_in} raw records -> {total_out} verified leads.")
+    record_run_metrics()
+
+# --------------------------------------------------
+# INVENTORY (append mode with the dedup index)
+# --------------------------------------------------
+
+def prepare_inventory():
+    """Makes sure the existing inventory is in Parquet form and covered by the dedup index and summary cube."""
+    df_inventory = None
+    
+    if not verified_exists(VERIFIED_DATASET_PATH) and os.path.exists(VERIFIED_CSV_PATH):
+        # Inventory predates the Parquet dataset: seed it from the CSV export
+        df_inventory = add_masked_columns(pd.read_csv(VERIFIED_CSV_PATH, dtype={'Phone': str, 'Email': str}))
+        write_verified(df_inventory, VERIFIED_DATASET_PATH)
+    
+    if DEDUP_INDEX.is_empty():
+        # Fresh runner or first run: index everything verified so far
+        if df_inventory is None:
+            df_inventory = read_verified(VERIFIED_DATASET_PATH) if verified_exists(VERIFIED_DATASET_PATH) else pd.DataFrame()
+        if not df_inventory.empty:
+            if 'phone_e164' not in df_inventory.columns or df_inventory['phone_e164'].isna().all():
+                df_inventory['phone_e164'], _ = VALIDATOR.normalize_phones(df_inventory['Phone'])
+            DEDUP_INDEX.add(df_inventory)
+            print(f"Dedup index bootstrapped from {len(df_inventory)} existing verified leads.")
+    
+    if not os.path.exists(VERIFIED_STATS_PATH) and verified_exists(VERIFIED_DATASET_PATH):
+        # Inventory predates the summary cube: build it once, later runs add to it
+        if df_inventory is None:
+            df_inventory = read_verified(VERIFIED_DATASET_PATH, columns=STATS_DIMENSIONS + ['Lead Score'])
+        write_stats(build_stats(df_inventory), VERIFIED_STATS_PATH)
+    
+    if LEAD_REPOSITORY is not None and LEAD_REPOSITORY.is_empty() and verified_exists(VERIFIED_DATASET_PATH):
+        # SQL store enabled after the inventory already existed: load it once
+        load_into_repository(read_verified(VERIFIED_DATASET_PATH))
+
+def load_into_repository(df, replace=False, refresh=True):
+    """Bulk-upserts verified leads into the SQL store; with `replace` they become the whole inventory.
+    
+    For a load spread over several calls, pass refresh=False and call
+    finish_repository_load() after the last one.
+    """
+    if LEAD_REPOSITORY is None:
+        return
+    if replace:
+        LEAD_REPOSITORY.begin_replace()
+    written = LEAD_REPOSITORY.upsert(df)
+    if refresh:
+        finish_repository_load()
+    print(f"Upserted {written} verified leads into {LEAD_REPOSITORY.engine.url.render_as_string(hide_password=True)}.")
+
+def finish_repository_load():
+    """Swaps a staged replace-mode load into place, then rebuilds the facets and summary cube."""
+    if LEAD_REPOSITORY is None:
+        return
+    if LEAD_REPOSITORY.replacing:
+        LEAD_REPOSITORY.commit_replace()
+    LEAD_REPOSITORY.refresh_facets()
 
 # --------------------------------------------------
 # MAIN WORKFLOW EXECUTION
 # --------------------------------------------------
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Deduplicate and verify the latest raw scrape.")
+    parser.add_argument('--stream', action='store_true', help="Verify in chunks with bounded memory (for large backfills)")
+    parser.add_argument('--chunk-size', type=int, default=STREAM_CHUNK_SIZE, help="Rows per chunk in --stream mode")
+    args = parser.parse_args()
+    
+    if os.path.exists(RAW_PARQUET_PATH):
+        raw_file_path = RAW_PARQUET_PATH
+    elif os.path.exists(RAW_CSV_PATH):
+        raw_file_path = RAW_CSV_PATH # Older scraper output
+    else:
+        print("Error: Raw scrape file missing. Ensure scripts/scrape_sources.py ran successfully.")
+        exit(1)
+    
+    # Ensure the verified directory exists
+    os.makedirs('data/verified', exist_ok=True)
+    
+    if DEDUP_INDEX is not None:
+        with METRICS.span('prepare_inventory'):
+            prepare_inventory()
+    
+    if args.stream:
+        # Peak memory is bounded by the chunk size (plus the dedup key set)
+        writer = VerifiedDatasetWriter(VERIFIED_DATASET_PATH, VERIFIED_CSV_PATH, append=DEDUP_INDEX is not None)
+        stats_writer = InventoryStatsWriter(VERIFIED_STATS_PATH, append=DEDUP_INDEX is not None)
+        if LEAD_REPOSITORY is not None and DEDUP_INDEX is None:
+            LEAD_REPOSITORY.begin_replace() # Chunks are staged; the inventory is swapped once all are verified
+        for df_verified_chunk in verify_stream(iter_raw_chunks(raw_file_path, args.chunk_size)):
+            writer.write(df_verified_chunk)
+            stats_writer.write(df_verified_chunk)
+            load_into_repository(df_verified_chunk, refresh=False)
+            if DEDUP_INDEX is not None:
+                DEDUP_INDEX.add(df_verified_chunk)
+        total_rows = writer.close()
+        stats_writer.close()
+        finish_repository_load()
+        if VALIDATOR.mx_cache is not None:
+            VALIDATOR.mx_cache.save()
+        
+        if total_rows:
+            print(f"Successfully saved {total_rows} verified leads to {VERIFIED_DATASET_PATH} and {VERIFIED_CSV_PATH}.")
+        elif DEDUP_INDEX is not None:
+            print("No new verified leads in this run; inventory unchanged.")
+        else:
+            print("Warning: No verified leads were generated. Wrote empty headers.")
+        exit(0)
+    
     try:
-        raw_file_path = 'data/raw/latest_raw_scrape.csv'
-        if not os.path.exists(raw_file_path):
-             raise FileNotFoundError("Raw scrape file missing. Ensure scripts/scrape_sources.py ran successfully.")
-            
-        df_raw = pd.read_csv(raw_file_path)
+        with METRICS.span('load_raw'):
+            df_raw = read_raw(raw_file_path) if raw_file_path.endswith('.parquet') else pd.read_csv(raw_file_path)
         
         # Explicitly cast the new capitalized columns to string
         df_raw['Phone'] = df_raw['Phone'].astype(str)
         df_raw['Email'] = df_raw['Email'].astype(str)
         
-    except FileNotFoundError as e:
-        print(f"Error: {e}")
-        exit(1)
     except Exception as e:
         print(f"Critical error during data loading or casting: {e}")
         exit(1)
         
-    df_clean = verify_data(df_raw)
-    
-    # Ensure the verified directory exists
-    os.makedirs('data/verified', exist_ok=True)
+    with METRICS.span('verify', rows=len(df_raw)):
+        df_clean = verify_data(df_raw)
+    if VALIDATOR.mx_cache is not None:
+        VALIDATOR.mx_cache.save()
     
     # Save the FINAL verified product (The core business asset)
-    output_path = 'data/verified/verified_leads.csv'
+    if DEDUP_INDEX is not None:
+        # Append mode: only leads new to the inventory are written, then indexed
+        with METRICS.span('write_verified', rows=len(df_clean)):
+            append_verified(df_clean, VERIFIED_DATASET_PATH)
+            export_csv(df_clean, VERIFIED_CSV_PATH, append=True)
+            stats_writer = InventoryStatsWriter(VERIFIED_STATS_PATH, append=True)
+            stats_writer.write(df_clean)
+            stats_writer.close()
+            load_into_repository(df_clean)
+            DEDUP_INDEX.add(df_clean)
+        print(f"Added {len(df_clean)} new verified leads to {VERIFIED_DATASET_PATH} and {VERIFIED_CSV_PATH}.")
+        exit(0)
+    
+    # 1. Partitioned Parquet inventory (City/Niche) for the dashboard
+    with METRICS.span('write_verified', rows=len(df_clean)):
+        write_verified(df_clean, VERIFIED_DATASET_PATH)
+        write_stats(build_stats(df_clean), VERIFIED_STATS_PATH)
+        load_into_repository(df_clean, replace=True)
     
+    # 2. CSV export for customers
     if not df_clean.empty:
-        df_clean.to_csv(output_path, index=False)
-        print(f"Successfully saved verified leads to {output_path}.")
+        export_csv(df_clean, VERIFIED_CSV_PATH)
+        print(f"Successfully saved verified leads to {VERIFIED_DATASET_PATH} and {VERIFIED_CSV_PATH}.")
     else:
         # Write headers based on the final expected columns for stability
-        expected_cols_final = [
-            'Business Name', 'Phone', 'Email', 'City', 'Niche', 'Lead Score', 
-            'Reason to Contact', 'Attribute', 'source_url', 'scraped_date'
-        ]
-        pd.DataFrame(columns=expected_cols_final).to_csv(output_path, index=False)
+        pd.DataFrame(columns=EXPORT_COLUMNS).to_csv(VERIFIED_CSV_PATH, index=False)
         print("Warning: No verified leads were generated. Wrote empty headers.")
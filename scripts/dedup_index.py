@@ -0,0 +1,184 @@
+import difflib
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+# Legal-form words that do not distinguish one business from another
+LEGAL_SUFFIXES = r'\b(?:llc|inc|incorporated|ltd|limited|co|corp|corporation|company|pvt|private|plc|llp|gmbh)\b'
+
+KEY_TYPES = ['phone', 'email', 'name']
+
+
+# --- KEY NORMALIZATION (vectorized) ---
+
+def normalize_names(names):
+    """'Joe's Plumbing, L.L.C.' -> 'joes plumbing'."""
+    s = names.astype(str).str.lower()
+    s = s.str.replace(r"['’.]", '', regex=True)
+    s = s.str.replace('&', ' and ', regex=False)
+    s = s.str.replace(r'[^\w\s]', ' ', regex=True)
+    s = s.str.replace(LEGAL_SUFFIXES, ' ', regex=True)
+    return s.str.replace(r'\s+', ' ', regex=True).str.strip()
+
+
+def normalize_cities(cities):
+    return cities.astype(str).str.lower().str.replace(r'[^a-z0-9]+', '', regex=True)
+
+
+def lead_keys(df):
+    """Normalized exact-match keys per row ('' where a key is unusable)."""
+    if 'phone_e164' in df.columns:
+        phone = df['phone_e164'].fillna('').astype(str)
+    else:
+        phone = df['Phone'].astype(str).str.replace(r'[^0-9]+', '', regex=True)
+        phone = phone.where(phone.str.len() >= 8, '')
+
+    email = df['Email'].astype(str).str.strip().str.lower()
+    email = email.where(email.str.contains('@', regex=False), '')
+
+    name_norm = normalize_names(df['Business Name'])
+    city_norm = normalize_cities(df['City'])
+    name = (name_norm + '|' + city_norm).where(name_norm != '', '')
+
+    # Blocking key for fuzzy matching: same city, same name prefix, same numbers in the name
+    digits = name_norm.str.replace(r'[^0-9]+', '', regex=True)
+    block = city_norm + '|' + name_norm.str.slice(0, 3) + '|' + digits
+
+    return pd.DataFrame({'phone': phone, 'email': email, 'name': name, 'name_norm': name_norm, 'block': block}, index=df.index)
+
+
+def _hash(values):
+    """Stable signed 64-bit hashes (SQLite INTEGER) of a string Series."""
+    return pd.util.hash_array(values.to_numpy(dtype=object)).view(np.int64)
+
+
+# --- PERSISTENT INDEX ---
+
+class DedupIndex:
+    """Cross-run duplicate detection for verified leads, stored in SQLite.
+
+    Exact duplicates share a normalized phone, email or (business name, city)
+    key with any lead accepted in an earlier run or earlier in the same batch;
+    the batch is checked with one indexed join, so cost grows with the batch,
+    not the index. Near-duplicate names are found by comparing a lead only
+    against names in the same blocking bucket.
+    """
+
+    def __init__(self, path, fuzzy_threshold=0.92):
+        self.path = path
+        self.fuzzy_threshold = fuzzy_threshold
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS lead_keys (
+                key_type TEXT NOT NULL,
+                key_hash INTEGER NOT NULL,
+                PRIMARY KEY (key_type, key_hash)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS name_blocks (
+                block TEXT NOT NULL,
+                name_norm TEXT NOT NULL,
+                PRIMARY KEY (block, name_norm)
+            ) WITHOUT ROWID;
+        """)
+        self.stats = {'checked': 0, 'phone': 0, 'email': 0, 'name': 0, 'fuzzy': 0}
+
+    @classmethod
+    def from_config(cls, index_config):
+        return cls(index_config['PATH'], index_config['FUZZY_THRESHOLD'])
+
+    def is_empty(self):
+        return self.conn.execute("SELECT 1 FROM lead_keys LIMIT 1").fetchone() is None
+
+    def close(self):
+        self.conn.close()
+
+    # --- CHECKS ---
+
+    def _existing_hashes(self, key_type, hashes):
+        """Subset of `hashes` already stored for `key_type` (one indexed join)."""
+        self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS batch_keys (key_hash INTEGER PRIMARY KEY)")
+        self.conn.execute("DELETE FROM batch_keys")
+        self.conn.executemany("INSERT OR IGNORE INTO batch_keys VALUES (?)", ((int(h),) for h in hashes))
+        rows = self.conn.execute(
+            "SELECT b.key_hash FROM batch_keys b JOIN lead_keys k ON k.key_type = ? AND k.key_hash = b.key_hash",
+            (key_type,),
+        )
+        return {h for (h,) in rows}
+
+    def _block_candidates(self, blocks):
+        candidates = {}
+        blocks = list(blocks)
+        for start in range(0, len(blocks), 500):
+            chunk = blocks[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            for block, name in self.conn.execute(
+                f"SELECT block, name_norm FROM name_blocks WHERE block IN ({placeholders})", chunk
+            ):
+                candidates.setdefault(block, []).append(name)
+        return candidates
+
+    def duplicate_mask(self, df):
+        """True for rows that duplicate an indexed lead or an earlier row of the same batch."""
+        keys = lead_keys(df)
+        is_dup = np.zeros(len(df), dtype=bool)
+
+        for key_type in KEY_TYPES:
+            values = keys[key_type]
+            usable = (values != '').to_numpy()
+            hashes = _hash(values)
+            existing = self._existing_hashes(key_type, hashes[usable])
+            dup = usable & (np.isin(hashes, list(existing)) | values.duplicated().to_numpy())
+            self.stats[key_type] += int((dup & ~is_dup).sum())
+            is_dup |= dup
+
+        # Fuzzy pass: only rows still considered new, only against their own block
+        candidates = self._block_candidates(keys.loc[~is_dup, 'block'].unique())
+        for pos in np.flatnonzero(~is_dup):
+            block = keys['block'].iat[pos]
+            name = keys['name_norm'].iat[pos]
+            peers = candidates.setdefault(block, [])
+            if name and any(
+                difflib.SequenceMatcher(None, name, peer).ratio() >= self.fuzzy_threshold for peer in peers
+            ):
+                is_dup[pos] = True
+                self.stats['fuzzy'] += 1
+            else:
+                peers.append(name)
+
+        self.stats['checked'] += len(df)
+        return is_dup
+
+    def filter_new(self, df):
+        """Rows of `df` not seen before (call add() once they are safely written)."""
+        if df.empty:
+            return df
+        return df[~self.duplicate_mask(df)]
+
+    # --- UPDATES ---
+
+    def add(self, df):
+        """Records accepted leads so later batches and runs treat them as existing."""
+        if df.empty:
+            return
+        keys = lead_keys(df)
+        with self.conn:
+            for key_type in KEY_TYPES:
+                values = keys[key_type]
+                hashes = _hash(values[values != ''])
+                self.conn.executemany(
+                    "INSERT OR IGNORE INTO lead_keys VALUES (?, ?)", ((key_type, int(h)) for h in hashes)
+                )
+            named = keys[keys['name_norm'] != '']
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO name_blocks VALUES (?, ?)", zip(named['block'], named['name_norm'])
+            )
+
+    def summary(self):
+        s = self.stats
+        return (
+            f"Dedup index: {s['checked']} checked; duplicates by phone={s['phone']}, "
+            f"email={s['email']}, name={s['name']}, fuzzy={s['fuzzy']}"
+        )
@@ -0,0 +1,89 @@
+import numpy as np
+import pandas as pd
+
+# Columns the dashboard filters or counts on
+INDEXED_COLUMNS = ['City', 'Niche', 'Reason to Contact', 'Attribute']
+
+
+class FilterEngine:
+    """Inverted indexes over one loaded lead frame, built once per data load.
+
+    Each indexed column is factorized into categorical codes with a posting
+    list (sorted row positions) per category. Lead Score is kept as a sorted
+    array so a minimum score is one binary search. A query intersects the
+    posting lists and returns row positions into the original frame, so
+    reruns never copy or rescan it.
+    """
+
+    def __init__(self, df, columns=INDEXED_COLUMNS, score_column='Lead Score'):
+        self.n_rows = len(df)
+        self.categories = {}
+        self.postings = {}
+        self._lookup = {}
+
+        for col in columns:
+            if col not in df.columns:
+                continue
+            codes, uniques = pd.factorize(df[col], sort=False)
+            order = np.argsort(codes, kind='stable') # Stable: positions stay ascending per code
+            bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+            self.categories[col] = pd.Index(uniques).astype(str)
+            self.postings[col] = [order[bounds[i]:bounds[i + 1]] for i in range(len(uniques))]
+            self._lookup[col] = {value: i for i, value in enumerate(self.categories[col])}
+
+        if score_column in df.columns:
+            scores = pd.to_numeric(df[score_column], errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan, copy=True)
+            scores[np.isnan(scores)] = -np.inf # Missing scores never pass a minimum
+        else:
+            scores = np.full(self.n_rows, -np.inf)
+        self.scores = scores
+        self.score_order = np.argsort(scores, kind='stable')
+        self.sorted_scores = scores[self.score_order]
+
+    # --- LOOKUPS ---
+
+    def options(self, column):
+        """Distinct values of a column, in order of first appearance (like Series.unique())."""
+        return self.categories[column].tolist() if column in self.categories else []
+
+    def count(self, column, value):
+        """Rows whose `column` equals `value` exactly (O(1))."""
+        code = self._lookup.get(column, {}).get(value)
+        return 0 if code is None else len(self.postings[column][code])
+
+    def _matching_positions(self, column, value):
+        """Rows whose `column` equals `value` exactly: its posting list, O(1).
+
+        Exact, like LeadRepository and InventoryStats, so a filter selects the
+        same leads whichever backend serves the dashboard (the filter values
+        are picked from options()).
+        """
+        code = self._lookup.get(column, {}).get(value)
+        return np.empty(0, dtype=np.intp) if code is None else self.postings[column][code]
+
+    def _score_positions(self, min_score):
+        start = np.searchsorted(self.sorted_scores, min_score, side='left')
+        return np.sort(self.score_order[start:])
+
+    # --- QUERIES ---
+
+    def select(self, contains=None, min_score=None):
+        """Row positions (ascending) matching every filter.
+
+        `contains` maps a column to the value it must equal; `min_score`
+        keeps rows with Lead Score >= it. No filters returns every row.
+        """
+        candidates = [self._matching_positions(col, value) for col, value in (contains or {}).items()]
+        if min_score is not None:
+            candidates.append(self._score_positions(min_score))
+        if not candidates:
+            return np.arange(self.n_rows)
+
+        # Smallest list first keeps every intersection as cheap as possible
+        candidates.sort(key=len)
+        positions = candidates[0]
+        for other in candidates[1:]:
+            if len(positions) == 0:
+                break
+            positions = np.intersect1d(positions, other, assume_unique=True)
+        return positions
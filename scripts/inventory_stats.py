@@ -0,0 +1,154 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Every summary widget filters or groups on these
+STATS_DIMENSIONS = ['City', 'Niche', 'Attribute', 'Reason to Contact']
+
+# Cube layout: lead count per (dimensions..., Lead Score). Scores are integers
+# 0-100, so the per-score rows of a group are its exact score histogram, and
+# counts, averages and "score >= N" totals all come from the same rows.
+STATS_COLUMNS = STATS_DIMENSIONS + ['Lead Score', 'leads']
+
+STATS_SCHEMA = pa.schema(
+    [(col, pa.string()) for col in STATS_DIMENSIONS] + [('Lead Score', pa.int8()), ('leads', pa.int64())]
+)
+
+
+def empty_stats():
+    return pd.DataFrame({col: pd.Series(dtype=STATS_SCHEMA.field(col).type.to_pandas_dtype()) for col in STATS_COLUMNS})
+
+
+def build_stats(df):
+    """Lead counts per (City, Niche, Attribute, Reason to Contact, Lead Score) of a lead frame."""
+    if df.empty:
+        return empty_stats()
+    keys = {col: df[col] if col in df.columns else pd.Series('N/A', index=df.index) for col in STATS_DIMENSIONS}
+    keys['Lead Score'] = pd.to_numeric(df['Lead Score'], errors='coerce').fillna(0).clip(0, 100).astype('int8')
+    cube = pd.DataFrame(keys).groupby(list(keys), observed=True, dropna=False, sort=False).size()
+    return _tidy(cube.rename('leads').reset_index())
+
+
+def merge_stats(cubes):
+    """One cube from several (chunks of a run, or a run plus the existing inventory)."""
+    cubes = [cube for cube in cubes if cube is not None and not cube.empty]
+    if not cubes:
+        return empty_stats()
+    cube = pd.concat(cubes, ignore_index=True).groupby(STATS_COLUMNS[:-1], sort=False)['leads'].sum()
+    return _tidy(cube.reset_index())
+
+
+def _tidy(cube):
+    """Cube columns in STATS_SCHEMA order and types (missing dimension values become 'N/A', like to_lead_table)."""
+    columns = {col: cube[col].astype(object).fillna('N/A').astype(str) for col in STATS_DIMENSIONS}
+    columns['Lead Score'] = pd.to_numeric(cube['Lead Score']).fillna(0).astype('int8')
+    columns['leads'] = cube['leads'].astype('int64')
+    return pd.DataFrame(columns)
+
+
+def write_stats(cube, path):
+    """Replaces the cube file atomically, so a reader sees the old cube or the new one."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    pq.write_table(pa.Table.from_pandas(cube[STATS_COLUMNS], schema=STATS_SCHEMA, preserve_index=False), path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+
+def read_stats(path):
+    """The cube, or None if no run has written one yet."""
+    if not os.path.exists(path):
+        return None
+    return _tidy(pq.read_table(path).to_pandas())
+
+
+class InventoryStatsWriter:
+    """Builds the cube alongside VerifiedDatasetWriter: one small cube per written chunk.
+
+    `close()` merges them (plus the existing cube in append mode) and
+    writes the result, so the inventory is never re-read to summarize it.
+    """
+
+    def __init__(self, path, append=False):
+        self.path = path
+        self.append = append
+        self.cubes = []
+
+    def write(self, df):
+        if not df.empty:
+            self.cubes.append(build_stats(df))
+
+    def close(self):
+        base = read_stats(self.path) if self.append else None
+        cube = merge_stats([base] + self.cubes)
+        write_stats(cube, self.path)
+        return cube
+
+
+class InventoryStats:
+    """Summary queries (hero-card counts, option lists, filtered totals and
+    average scores) over the cube. Cost is O(cube rows), not O(leads).
+
+    Filters follow FilterEngine and LeadRepository: an exact value per
+    column, plus a minimum Lead Score.
+    """
+
+    def __init__(self, cube):
+        self.cube = _tidy(cube) if cube is not None else empty_stats()
+        self.leads = self.cube['leads'].to_numpy()
+        self.scores = self.cube['Lead Score'].to_numpy().astype(np.int64)
+        self._codes = {}
+        self._categories = {}
+        for col in STATS_DIMENSIONS:
+            self._codes[col], self._categories[col] = pd.factorize(self.cube[col])
+            self._categories[col] = pd.Index(self._categories[col]).astype(str)
+        self._options = {}
+        self._counts = {}
+        self._last_mask = (None, None) # total() and average_score() of one rerun share the mask
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls(build_stats(df))
+
+    def _mask(self, contains, min_score):
+        key = (tuple(sorted((contains or {}).items())), min_score)
+        if self._last_mask[0] == key:
+            return self._last_mask[1]
+        mask = np.ones(len(self.leads), dtype=bool)
+        for col, value in (contains or {}).items():
+            mask &= self._codes[col] == self._categories[col].get_indexer([value])[0] # -1 (unknown) matches nothing
+        if min_score is not None:
+            mask &= self.scores >= min_score
+        self._last_mask = (key, mask)
+        return mask
+
+    def total(self, contains=None, min_score=None):
+        """Leads matching the filters (no filters = the whole inventory)."""
+        if not contains and min_score is None:
+            return int(self.leads.sum())
+        return int(self.leads[self._mask(contains, min_score)].sum())
+
+    def is_empty(self):
+        return self.total() == 0
+
+    def count(self, column, value):
+        """Leads whose `column` equals `value` exactly (memoized: the cube never changes)."""
+        key = (column, value)
+        if key not in self._counts:
+            code = self._categories[column].get_indexer([value])[0]
+            self._counts[key] = int(self.leads[self._codes[column] == code].sum()) if code != -1 else 0
+        return self._counts[key]
+
+    def average_score(self, contains=None, min_score=None):
+        """Mean Lead Score of the matching leads (None if there are none)."""
+        mask = self._mask(contains, min_score)
+        n = self.leads[mask].sum()
+        return float((self.scores[mask] * self.leads[mask]).sum() / n) if n else None
+
+    def options(self, column):
+        """Distinct values, best-scoring first: the order they first appear in the inventory table."""
+        if column not in self._options:
+            best = self.cube.groupby(column, sort=False)['Lead Score'].max()
+            self._options[column] = best.sort_values(ascending=False, kind='stable').index.tolist()
+        return self._options[column]
@@ -0,0 +1,329 @@
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+from lead_storage import to_export_frame
+
+# Export formats: label, file suffix, MIME type. 'sheet' writes to Google Sheets;
+# its "file" is a small JSON note with the spreadsheet's URL and id.
+EXPORT_FORMATS = {
+    'csv': ("CSV", '.csv', 'text/csv'),
+    'csv.gz': ("CSV (gzip)", '.csv.gz', 'application/gzip'),
+    'xlsx': ("Excel (XLSX)", '.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'sheet': ("Google Sheets", '.sheet.json', 'application/json'),
+}
+XLSX_MAX_ROWS = 1048576 # Per worksheet, header included; larger exports continue on "Leads 2", ...
+SHEETS_MAX_CELLS = 10000000 # Per spreadsheet (each Sheets export gets its own)
+
+
+def export_key(contains, min_score, descending, fmt, data_version, share_with=None):
+    """Cache key of one export: the same filters on the same data version give the same file.
+
+    Sheets exports are also keyed by the account they are shared with.
+    """
+    spec = [sorted((contains or {}).items()), min_score, descending, fmt, data_version]
+    if share_with:
+        spec.append(share_with.strip().lower())
+    return hashlib.sha1(json.dumps(spec, default=str).encode()).hexdigest()[:16]
+
+
+def iter_query_chunks(query, contains, min_score, descending, chunk_size):
+    """Pages of up to `chunk_size` matching leads, in table order (keyset-paginated).
+
+    Works with InventoryQuery and LeadRepository alike; the first page's
+    `total` is the expected row count.
+    """
+    after = None
+    while True:
+        page = query.page(contains, min_score=min_score, descending=descending, after=after, limit=chunk_size)
+        yield page
+        if page.next_cursor is None:
+            return
+        after = page.next_cursor
+
+
+def cell_values(df):
+    """Rows as lists of plain Python values (None for missing), for XLSX and Sheets writers."""
+    return df.astype(object).where(df.notna(), None).values.tolist()
+
+
+# --- WRITERS ---
+# Each takes an iterator of export frames and a progress callback (rows written so far).
+
+def write_csv(frames, path, compress=False, progress=None):
+    """Arrow's CSV writer (far faster than DataFrame.to_csv); gzip at zlib's default level."""
+    sink = gzip.open(path, 'wb', compresslevel=6) if compress else open(path, 'wb')
+    writer = schema = None
+    rows = 0
+    try:
+        for frame in frames:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            if writer is None:
+                # Text columns as plain strings: chunks differ in categories, and an all-empty one infers null
+                schema = pa.schema([pa.field(f.name, pa.string()) if pa.types.is_dictionary(f.type) or pa.types.is_null(f.type)
+                                    else f for f in table.schema])
+                writer = pacsv.CSVWriter(sink, schema, write_options=pacsv.WriteOptions(quoting_style='needed'))
+            writer.write_table(table.cast(schema))
+            rows += len(frame)
+            if progress:
+                progress(rows)
+    finally:
+        if writer is not None:
+            writer.close()
+        sink.close()
+    return rows
+
+
+def write_xlsx(frames, path, progress=None):
+    """Streams rows into the workbook (needs the optional XlsxWriter package).
+
+    constant_memory mode flushes each row as it is written, so memory stays
+    flat however large the export is.
+    """
+    import xlsxwriter
+    workbook = xlsxwriter.Workbook(path, {'constant_memory': True, 'strings_to_formulas': False, 'strings_to_urls': False})
+    worksheet = None
+    sheet_row = rows = 0
+    try:
+        for frame in frames:
+            for values in cell_values(frame):
+                if worksheet is None or sheet_row == XLSX_MAX_ROWS:
+                    worksheet = workbook.add_worksheet(f"Leads {len(workbook.worksheets()) + 1}" if worksheet else "Leads")
+                    worksheet.write_row(0, 0, list(frame.columns))
+                    sheet_row = 1
+                worksheet.write_row(sheet_row, 0, values)
+                sheet_row += 1
+            rows += len(frame)
+            if progress:
+                progress(rows)
+        if worksheet is None: # No matching leads: headers only
+            workbook.add_worksheet("Leads")
+    finally:
+        workbook.close()
+    return rows
+
+
+def write_sheet(frames, client, title, expected_rows, share_with, folder_id=None, progress=None):
+    """A new spreadsheet per export, shared read-only with `share_with` (a Google account).
+
+    Filled with one batched values_update per chunk; the spreadsheet is
+    deleted again if the export fails. Returns (url, spreadsheet id).
+    """
+    from sheets_client import with_backoff, write_rows
+
+    spreadsheet = worksheet = None
+    rows = 0
+    try:
+        for frame in frames:
+            if spreadsheet is None:
+                if (expected_rows + 1) * len(frame.columns) > SHEETS_MAX_CELLS:
+                    raise ValueError(f"{expected_rows:,} leads is too large for Google Sheets; download a CSV instead")
+                spreadsheet = with_backoff(client.create, title, folder_id=folder_id)
+                with_backoff(spreadsheet.share, share_with, perm_type='user', role='reader', notify=False)
+                worksheet = spreadsheet.sheet1
+                with_backoff(worksheet.update_title, "Leads")
+                with_backoff(worksheet.resize, rows=max(expected_rows, 1) + 1, cols=len(frame.columns))
+                write_rows(worksheet, 1, [list(frame.columns)] + cell_values(frame)) # Header rides with the first chunk
+            else:
+                write_rows(worksheet, rows + 2, cell_values(frame))
+            rows += len(frame)
+            if progress:
+                progress(rows)
+    except Exception:
+        if spreadsheet is not None:
+            with_backoff(client.del_spreadsheet, spreadsheet.id)
+        raise
+    return spreadsheet.url, spreadsheet.id
+
+
+# --- BACKGROUND EXPORTS ---
+
+class ExportJob:
+    """One export's state, updated by the worker thread and read by the page."""
+
+    def __init__(self, key, fmt, path, share_with=None):
+        self.key = key
+        self.fmt = fmt
+        self.path = path
+        self.share_with = share_with # Google account a Sheets export is shared with
+        self.status = 'queued' # queued -> running -> done / failed
+        self.rows_total = None
+        self.rows_written = 0
+        self.url = None
+        self.error = None
+        self.seconds = None
+
+    @property
+    def label(self):
+        return EXPORT_FORMATS[self.fmt][0]
+
+    @property
+    def mime(self):
+        return EXPORT_FORMATS[self.fmt][2]
+
+    @property
+    def file_name(self):
+        return f"leads-{self.key}{EXPORT_FORMATS[self.fmt][1]}"
+
+    @property
+    def running(self):
+        return self.status in ('queued', 'running')
+
+    @property
+    def progress(self):
+        """0-1 (SQL totals may be estimates, so capped)."""
+        if not self.rows_total:
+            return 1.0 if self.status == 'done' else 0.0
+        return min(self.rows_written / self.rows_total, 1.0)
+
+    def available(self):
+        return self.status == 'done' and os.path.exists(self.path)
+
+    def read_bytes(self):
+        with open(self.path, 'rb') as f:
+            return f.read()
+
+
+class ExportManager:
+    """Runs exports on a small thread pool so serializing never blocks a page.
+
+    Finished exports are files in `export_dir` named by export_key(), so
+    asking for the same filters on the same data version again (from any
+    session, or after a restart) is served from disk. Only the newest
+    `max_files` exports are kept. Without a data version (no inventory
+    loaded yet) nothing is served from the cache.
+
+    Sheets exports are spreadsheets the service account creates (in
+    `sheet_folder_id`, a Drive folder shared with it, if given) and shares
+    with the customer's Google account; they are deleted with their note.
+    """
+
+    def __init__(self, export_dir, chunk_size=50000, max_files=20, workers=2,
+                 sheet_name="Leads", sheet_folder_id=None, service_account_json=None):
+        self.export_dir = export_dir
+        self.chunk_size = chunk_size
+        self.max_files = max_files
+        self.sheet_name = sheet_name
+        self.sheet_folder_id = sheet_folder_id
+        self.service_account_json = service_account_json
+        self.jobs = OrderedDict() # key -> ExportJob, newest last
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="export")
+        self._client = None
+        os.makedirs(export_dir, exist_ok=True)
+
+    def _path(self, key, fmt):
+        return os.path.join(self.export_dir, key + EXPORT_FORMATS[fmt][1])
+
+    def job(self, key):
+        return self.jobs.get(key)
+
+    def submit(self, query, contains, min_score, descending, fmt, data_version, share_with=None):
+        """The export for these filters: finished, in progress, or newly queued.
+
+        Sheets exports need `share_with`, the Google account that may open them.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format: {fmt}")
+        if fmt == 'sheet' and not (share_with or '').strip():
+            raise ValueError("Google Sheets exports need a Google account to share them with")
+        share_with = share_with.strip() if fmt == 'sheet' else None
+        key = export_key(contains, min_score, descending, fmt, data_version, share_with)
+        with self._lock:
+            job = self.jobs.get(key)
+            if job is not None and (job.running or (job.available() and data_version is not None)):
+                return job
+            job = ExportJob(key, fmt, self._path(key, fmt), share_with)
+            if data_version is not None and os.path.exists(job.path):
+                self._finish_cached(job) # Written by an earlier process
+            else:
+                self._executor.submit(self._run, job, query, dict(contains or {}), min_score, descending)
+            self.jobs[key] = job
+            self.jobs.move_to_end(key)
+            while len(self.jobs) > 4 * self.max_files:
+                self.jobs.popitem(last=False)
+        return job
+
+    def _finish_cached(self, job):
+        os.utime(job.path) # Most recently used: evicted last
+        if job.fmt == 'sheet':
+            with open(job.path) as f:
+                job.url = json.load(f)['url']
+        job.rows_written = None # Not recounted: the file is what was exported before
+        job.status = 'done'
+
+    def _run(self, job, query, contains, min_score, descending):
+        job.status = 'running'
+        start = time.perf_counter()
+        tmp_path = job.path + '.tmp'
+        try:
+            pages = iter_query_chunks(query, contains, min_score, descending, self.chunk_size)
+            first = next(pages)
+            job.rows_total = first.total
+
+            def frames():
+                yield to_export_frame(first.rows)
+                for page in pages:
+                    yield to_export_frame(page.rows)
+
+            def progress(rows):
+                job.rows_written = rows
+
+            if job.fmt == 'sheet':
+                url, spreadsheet_id = write_sheet(frames(), self.client(), f"{self.sheet_name} {job.key}", first.total,
+                                                  job.share_with, self.sheet_folder_id, progress)
+                with open(tmp_path, 'w') as f:
+                    json.dump({'url': url, 'spreadsheet_id': spreadsheet_id, 'rows': job.rows_written}, f)
+                job.url = url
+            elif job.fmt == 'xlsx':
+                write_xlsx(frames(), tmp_path, progress)
+            else:
+                write_csv(frames(), tmp_path, compress=job.fmt == 'csv.gz', progress=progress)
+            os.replace(tmp_path, job.path) # Never serve a half-written file
+            job.status = 'done'
+            self._evict()
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            job.status = 'failed'
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        job.seconds = time.perf_counter() - start
+
+    def client(self):
+        """gspread client for the service account that owns the Sheets exports."""
+        if self._client is None:
+            if not self.service_account_json:
+                raise RuntimeError("Google Sheets export needs the GSPREAD_SERVICE_ACCOUNT secret")
+            from sheets_client import service_account_client
+            self._client = service_account_client(self.service_account_json)
+        return self._client
+
+    def _delete_sheet(self, note_path):
+        """Deletes the spreadsheet behind a Sheets export's note (best effort: the note goes either way)."""
+        from sheets_client import with_backoff
+        try:
+            with open(note_path) as f:
+                note = json.load(f)
+            with_backoff(self.client().del_spreadsheet, note['spreadsheet_id'])
+        except Exception as e:
+            print(f"Warning: could not delete the Google Sheets export {note_path}: {e}")
+
+    def _evict(self):
+        """Deletes all but the newest `max_files` finished exports (and their spreadsheets)."""
+        finished = [e for e in os.scandir(self.export_dir) if e.is_file() and not e.name.endswith('.tmp')]
+        finished.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+        for entry in finished[self.max_files:]:
+            if entry.name.endswith(EXPORT_FORMATS['sheet'][1]):
+                self._delete_sheet(entry.path)
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,53 @@
+from collections import namedtuple
+
+import numpy as np
+
+# One page of the inventory table. `after` on the next call is `next_cursor`
+# (None once the last page is reached); a cursor is (Lead Score, row position)
+# of the last row shown, so paging never re-counts or re-skips earlier rows.
+Page = namedtuple('Page', ['rows', 'next_cursor', 'total', 'total_is_exact'])
+
+
+class InventoryQuery:
+    """Keyset-paginated reads over a loaded lead frame and its FilterEngine.
+
+    The frame must be sorted by Lead Score, highest first (load_live_data
+    does this), so row position is the keyset: "after cursor" is a binary
+    search into the filtered positions and each page only materializes
+    `limit` rows, however large the inventory is.
+    """
+
+    def __init__(self, df, engine):
+        if np.any(engine.scores[1:] > engine.scores[:-1]): # Compared, not subtracted: missing scores are -inf
+            raise ValueError("InventoryQuery needs the frame sorted by Lead Score, descending")
+        self.df = df
+        self.engine = engine
+
+    def page(self, contains=None, min_score=None, descending=True, after=None, limit=50, columns=None):
+        """Rows of one page for the given filters, sorted by Lead Score.
+
+        Ties keep a stable order in both directions (reversed for ascending).
+        `total` is exact here; backends that can only estimate it set
+        `total_is_exact` to False.
+        """
+        positions = self.engine.select(contains, min_score=min_score)
+        total = len(positions)
+
+        if descending:
+            start = 0 if after is None else int(np.searchsorted(positions, after[1], side='right'))
+            page_positions = positions[start:start + limit]
+            has_more = start + limit < total
+        else:
+            end = total if after is None else int(np.searchsorted(positions, after[1], side='left'))
+            page_positions = positions[max(end - limit, 0):end][::-1]
+            has_more = end - limit > 0
+
+        next_cursor = None
+        if has_more and len(page_positions):
+            last = int(page_positions[-1])
+            next_cursor = (float(self.engine.scores[last]), last)
+
+        rows = self.df.iloc[page_positions]
+        if columns is not None:
+            rows = rows[columns]
+        return Page(rows, next_cursor, total, True)
@@ -0,0 +1,360 @@
+import csv
+import io
+import os
+from datetime import datetime
+
+import pandas as pd
+import sqlalchemy as sa
+
+from lead_query import Page
+
+# Frame column -> SQL column. The SQL side uses plain snake_case names.
+COLUMN_MAP = {
+    'Business Name': 'business_name',
+    'Phone': 'phone',
+    'phone_e164': 'phone_e164',
+    'Email': 'email',
+    'City': 'city',
+    'Niche': 'niche',
+    'Lead Score': 'lead_score',
+    'Reason to Contact': 'reason',
+    'Attribute': 'attribute',
+    'source_url': 'source_url',
+    'scraped_date': 'scraped_date',
+    'phone_masked': 'phone_masked',
+    'email_masked': 'email_masked',
+}
+FRAME_COLUMNS = {sql: frame for frame, sql in COLUMN_MAP.items()}
+
+METADATA = sa.MetaData()
+
+LEADS = sa.Table(
+    'leads', METADATA,
+    sa.Column('id', sa.Integer, primary_key=True, autoincrement=True),
+    sa.Column('lead_key', sa.Text, nullable=False, unique=True), # Upsert identity, see lead_keys()
+    sa.Column('business_name', sa.Text),
+    sa.Column('phone', sa.Text),
+    sa.Column('phone_e164', sa.Text),
+    sa.Column('email', sa.Text),
+    sa.Column('city', sa.Text),
+    sa.Column('niche', sa.Text),
+    sa.Column('lead_score', sa.SmallInteger),
+    sa.Column('reason', sa.Text),
+    sa.Column('attribute', sa.Text),
+    sa.Column('source_url', sa.Text),
+    sa.Column('scraped_date', sa.DateTime),
+    sa.Column('phone_masked', sa.Text),
+    sa.Column('email_masked', sa.Text),
+)
+
+# Dashboard access paths: City/Niche(/Reason) filter + score order, score order alone, hero-card counts
+sa.Index('ix_leads_city_niche_score', LEADS.c.city, LEADS.c.niche, LEADS.c.lead_score.desc(), LEADS.c.id.desc())
+sa.Index('ix_leads_city_niche_reason_score', LEADS.c.city, LEADS.c.niche, LEADS.c.reason, LEADS.c.lead_score.desc(), LEADS.c.id.desc())
+sa.Index('ix_leads_city_reason_score', LEADS.c.city, LEADS.c.reason, LEADS.c.lead_score.desc(), LEADS.c.id.desc())
+sa.Index('ix_leads_score', LEADS.c.lead_score.desc(), LEADS.c.id.desc())
+sa.Index('ix_leads_niche_score', LEADS.c.niche, LEADS.c.lead_score.desc(), LEADS.c.id.desc())
+sa.Index('ix_leads_attribute', LEADS.c.attribute)
+sa.Index('ix_leads_reason_score', LEADS.c.reason, LEADS.c.lead_score.desc(), LEADS.c.id.desc())
+
+# Per-value row counts of the filter columns, rebuilt by refresh_facets() after
+# each load so hero cards and option lists never scan `leads`
+LEAD_FACETS = sa.Table(
+    'lead_facets', METADATA,
+    sa.Column('column_name', sa.Text, primary_key=True),
+    sa.Column('value', sa.Text, primary_key=True),
+    sa.Column('lead_count', sa.Integer, nullable=False),
+)
+
+# Same summary cube the verifier writes next to the files (see inventory_stats.py),
+# rebuilt with the facets so the dashboard's summary widgets read a few thousand rows
+LEAD_STATS = sa.Table(
+    'lead_stats', METADATA,
+    sa.Column('city', sa.Text),
+    sa.Column('niche', sa.Text),
+    sa.Column('attribute', sa.Text),
+    sa.Column('reason', sa.Text),
+    sa.Column('lead_score', sa.SmallInteger),
+    sa.Column('leads', sa.Integer, nullable=False),
+)
+STATS_KEY_COLUMNS = [LEADS.c.city, LEADS.c.niche, LEADS.c.attribute, LEADS.c.reason, LEADS.c.lead_score]
+
+# One row per completed load (written by refresh_facets); the newest version
+# keys the dashboard's page cursors and export cache, like a file version does
+LEAD_LOADS = sa.Table(
+    'lead_loads', METADATA,
+    sa.Column('version', sa.Integer, primary_key=True, autoincrement=True),
+    sa.Column('loaded_at', sa.DateTime, nullable=False),
+)
+
+FILTER_COLUMNS = {'City': LEADS.c.city, 'Niche': LEADS.c.niche,
+                  'Reason to Contact': LEADS.c.reason, 'Attribute': LEADS.c.attribute}
+UPDATE_COLUMNS = list(COLUMN_MAP.values())
+
+# Replace-mode loads go here first and are swapped into `leads` in one
+# transaction (see begin_replace), so readers never see a half-loaded table
+LEADS_LOAD = sa.Table(
+    'leads_load', sa.MetaData(),
+    sa.Column('lead_key', sa.Text, primary_key=True),
+    *[sa.Column(c.name, c.type) for c in LEADS.c if c.name in UPDATE_COLUMNS],
+)
+
+
+def lead_keys(df):
+    """Upsert identity per lead: normalized phone, else email, else (name, city)."""
+    email = df['Email'].astype(str).str.strip().str.lower()
+    name_city = df['Business Name'].astype(str).str.strip().str.lower() + '|' + df['City'].astype(str).str.lower()
+    key = 'n:' + name_city
+    key = key.mask(email.str.contains('@', regex=False), 'e:' + email)
+    if 'phone_e164' in df.columns:
+        phone = df['phone_e164']
+        key = key.mask(phone.notna() & (phone.astype(str) != ''), 'p:' + phone.astype(str))
+    return key
+
+
+def _sqlite_on_connect(dbapi_conn, _record):
+    # WAL lets the dashboard read while the pipeline writes
+    cursor = dbapi_conn.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
+
+class LeadRepository:
+    """Verified leads in a SQL database (SQLite locally and in CI, Postgres in production).
+
+    Writes are bulk upserts keyed on lead_key (multi-row executemany on
+    SQLite, COPY into a staging table on Postgres). Reads mirror the
+    in-memory FilterEngine/InventoryQuery interface (count, options, page),
+    so the dashboard can use either; filters are exact matches, as in
+    FilterEngine and InventoryStats, and the composite (city, niche[,
+    reason], lead_score DESC) indexes serve them.
+    """
+
+    COUNT_CAP = 100000 # Totals above this are shown as approximate
+
+    def __init__(self, url, pool_size=5, upsert_chunk_size=50000):
+        self.url = url
+        self.upsert_chunk_size = upsert_chunk_size
+        if url.startswith('sqlite'):
+            path = url.split(':///', 1)[-1]
+            if path and path != ':memory:':
+                os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+            self.engine = sa.create_engine(url, pool_size=pool_size, max_overflow=pool_size)
+            sa.event.listen(self.engine, 'connect', _sqlite_on_connect)
+        else:
+            self.engine = sa.create_engine(url, pool_size=pool_size, max_overflow=pool_size, pool_pre_ping=True)
+        self.is_postgres = self.engine.dialect.name == 'postgresql'
+        self.load_table = LEADS # LEADS_LOAD while a replace-mode load is open
+
+    @classmethod
+    def from_config(cls, db_config):
+        # LEAD_DB_URL keeps Postgres credentials out of config.yaml
+        url = os.environ.get('LEAD_DB_URL') or db_config['URL']
+        return cls(url, db_config.get('POOL_SIZE', 5), db_config.get('UPSERT_CHUNK_SIZE', 50000))
+
+    def create_schema(self):
+        METADATA.create_all(self.engine)
+        return self
+
+    def dispose(self):
+        self.engine.dispose()
+
+    # --- WRITES ---
+
+    def _records(self, df):
+        out = pd.DataFrame({'lead_key': lead_keys(df)}, index=df.index)
+        for frame_col, sql_col in COLUMN_MAP.items():
+            out[sql_col] = df[frame_col] if frame_col in df.columns else None
+        out['lead_score'] = pd.to_numeric(out['lead_score'], errors='coerce').round().astype('Int64')
+        # Text in SQLAlchemy's SQLite DateTime format, which Postgres also parses
+        out['scraped_date'] = pd.to_datetime(out['scraped_date'], errors='coerce').dt.strftime('%Y-%m-%d %H:%M:%S.%f')
+        # Later rows win within a batch, as they would across batches
+        out = out.drop_duplicates('lead_key', keep='last')
+        return out.astype(object).where(out.notna(), None)
+
+    def upsert(self, df):
+        """Inserts new leads and refreshes existing ones (same lead_key); returns rows written.
+        
+        Call refresh_facets() once the whole batch is loaded (after
+        commit_replace() in replace mode).
+        """
+        if df.empty:
+            return 0
+        records = self._records(df)
+        for start in range(0, len(records), self.upsert_chunk_size):
+            chunk = records.iloc[start:start + self.upsert_chunk_size]
+            if self.is_postgres:
+                self._copy_upsert(chunk)
+            else:
+                self._executemany_upsert(chunk)
+        return len(records)
+
+    def _executemany_upsert(self, chunk):
+        """SQLite: one prepared INSERT ... ON CONFLICT run by the driver's executemany.
+        
+        Goes straight to the DBAPI cursor with plain tuples; per-row parameter
+        processing in SQLAlchemy roughly doubled the load time.
+        """
+        columns = ['lead_key'] + UPDATE_COLUMNS
+        updates = ', '.join(f"{c} = excluded.{c}" for c in UPDATE_COLUMNS)
+        sql = (f"INSERT INTO {self.load_table.name} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+               f"ON CONFLICT (lead_key) DO UPDATE SET {updates}")
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            cursor.execute("PRAGMA cache_size=-262144") # 256 MB of page cache for index updates
+            cursor.executemany(sql, chunk[columns].itertuples(index=False, name=None))
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+
+    def _copy_upsert(self, chunk):
+        """Postgres: COPY the chunk into a temp table, then one INSERT ... ON CONFLICT."""
+        columns = ['lead_key'] + UPDATE_COLUMNS
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in chunk[columns].itertuples(index=False):
+            writer.writerow(['\\N' if v is None else v for v in row])
+        buffer.seek(0)
+
+        column_list = ', '.join(columns)
+        updates = ', '.join(f"{c} = EXCLUDED.{c}" for c in UPDATE_COLUMNS)
+        raw = self.engine.raw_connection()
+        try:
+            cursor = raw.cursor()
+            cursor.execute(f"CREATE TEMP TABLE leads_stage ON COMMIT DROP AS SELECT {column_list} FROM leads WITH NO DATA")
+            cursor.copy_expert(f"COPY leads_stage ({column_list}) FROM STDIN WITH (FORMAT csv, NULL '\\N')", buffer)
+            cursor.execute(
+                f"INSERT INTO {self.load_table.name} ({column_list}) SELECT {column_list} FROM leads_stage "
+                f"ON CONFLICT (lead_key) DO UPDATE SET {updates}"
+            )
+            raw.commit()
+        except Exception:
+            raw.rollback()
+            raise
+        finally:
+            raw.close()
+
+    def begin_replace(self):
+        """Starts a replace-mode load (the run's leads become the whole inventory).
+
+        Upserts go to the leads_load staging table until commit_replace(),
+        so the dashboard keeps reading the previous inventory meanwhile.
+        """
+        LEADS_LOAD.drop(self.engine, checkfirst=True) # Left over from a failed run
+        LEADS_LOAD.create(self.engine)
+        self.load_table = LEADS_LOAD
+
+    def commit_replace(self):
+        """Swaps the staged leads in for the current ones in one transaction.
+
+        The secondary indexes are dropped and rebuilt inside it: building an
+        index once from sorted data is far faster than growing it row by row.
+        """
+        columns = ', '.join(['lead_key'] + UPDATE_COLUMNS)
+        with self.engine.begin() as conn:
+            for index in LEADS.indexes:
+                index.drop(conn)
+            conn.execute(LEADS.delete())
+            conn.exec_driver_sql(f"INSERT INTO leads ({columns}) SELECT {columns} FROM leads_load")
+            for index in LEADS.indexes:
+                index.create(conn)
+        LEADS_LOAD.drop(self.engine)
+        self.load_table = LEADS
+
+    @property
+    def replacing(self):
+        return self.load_table is LEADS_LOAD
+
+    def refresh_facets(self):
+        """Recounts leads per City/Niche/Reason/Attribute value (one GROUP BY per column)
+        and rebuilds the summary cube (one GROUP BY over all of them plus the score).
+        
+        Also refreshes planner statistics: without them SQLite can pick the
+        Reason index for a City + Reason filter and scan far more rows, and
+        records the load as a new data_version().
+        """
+        with self.engine.begin() as conn:
+            conn.execute(LEAD_FACETS.delete())
+            for name, col in FILTER_COLUMNS.items():
+                counts = sa.select(sa.literal(name), col, sa.func.count()).where(col.is_not(None)).group_by(col)
+                conn.execute(LEAD_FACETS.insert().from_select(['column_name', 'value', 'lead_count'], counts))
+            conn.execute(LEAD_STATS.delete())
+            cube = sa.select(*STATS_KEY_COLUMNS, sa.func.count()).group_by(*STATS_KEY_COLUMNS)
+            conn.execute(LEAD_STATS.insert().from_select([c.name for c in STATS_KEY_COLUMNS] + ['leads'], cube))
+            conn.exec_driver_sql("ANALYZE leads")
+            conn.execute(LEAD_LOADS.insert().values(loaded_at=datetime.now()))
+
+    # --- READS (same interface as FilterEngine / InventoryQuery) ---
+
+    def count(self, column, value):
+        """Rows whose `column` equals `value` (a primary-key lookup in lead_facets)."""
+        stmt = sa.select(LEAD_FACETS.c.lead_count).where(
+            LEAD_FACETS.c.column_name == column, LEAD_FACETS.c.value == value)
+        with self.engine.connect() as conn:
+            return conn.execute(stmt).scalar() or 0
+
+    def options(self, column):
+        """Distinct values of a column, sorted."""
+        stmt = sa.select(LEAD_FACETS.c.value).where(LEAD_FACETS.c.column_name == column).order_by(LEAD_FACETS.c.value)
+        with self.engine.connect() as conn:
+            return conn.execute(stmt).scalars().all()
+
+    def stats_cube(self):
+        """The summary cube as a frame in inventory_stats' layout (frame column names)."""
+        with self.engine.connect() as conn:
+            cube = pd.DataFrame(conn.execute(sa.select(LEAD_STATS)).mappings().all(), columns=[c.name for c in LEAD_STATS.c])
+        return cube.rename(columns=FRAME_COLUMNS)
+
+    def _conditions(self, contains, min_score):
+        conditions = [FILTER_COLUMNS[col] == value for col, value in (contains or {}).items()]
+        if min_score is not None:
+            conditions.append(LEADS.c.lead_score >= min_score)
+        return conditions
+
+    def page(self, contains=None, min_score=None, descending=True, after=None, limit=50, columns=None):
+        """One page sorted by Lead Score, keyset-paginated on (lead_score, id)."""
+        conditions = self._conditions(contains, min_score)
+        key = sa.tuple_(LEADS.c.lead_score, LEADS.c.id)
+        page_conditions = list(conditions)
+        if after is not None:
+            page_conditions.append(key < after if descending else key > after)
+
+        order = [LEADS.c.lead_score.desc(), LEADS.c.id.desc()] if descending else [LEADS.c.lead_score, LEADS.c.id]
+        sql_columns = [LEADS.c[COLUMN_MAP[c]] for c in (columns or COLUMN_MAP)]
+        rows_stmt = sa.select(LEADS.c.id, *sql_columns).where(*page_conditions).order_by(*order).limit(limit + 1)
+
+        # Bounded count: stops scanning at COUNT_CAP matches
+        capped = sa.select(sa.literal(1)).select_from(LEADS).where(*conditions).limit(self.COUNT_CAP + 1).subquery()
+        count_stmt = sa.select(sa.func.count()).select_from(capped)
+
+        with self.engine.connect() as conn:
+            rows = pd.DataFrame(conn.execute(rows_stmt).mappings().all())
+            total = conn.execute(count_stmt).scalar_one()
+
+        has_more = len(rows) > limit
+        rows = rows.iloc[:limit]
+        next_cursor = None
+        if has_more:
+            next_cursor = (int(rows['lead_score'].iloc[-1]), int(rows['id'].iloc[-1]))
+
+        if rows.empty:
+            rows = pd.DataFrame(columns=['id'] + [c.name for c in sql_columns])
+        rows = rows.drop(columns='id').rename(columns=FRAME_COLUMNS)
+        return Page(rows, next_cursor, min(total, self.COUNT_CAP), total <= self.COUNT_CAP)
+
+    def data_version(self):
+        """Version of the loaded inventory: changes with every completed load (None before the first)."""
+        with self.engine.connect() as conn:
+            return conn.execute(sa.select(sa.func.max(LEAD_LOADS.c.version))).scalar()
+
+    def is_empty(self):
+        with self.engine.connect() as conn:
+            return conn.execute(sa.select(LEADS.c.id).limit(1)).first() is None
+
+    def total(self):
+        with self.engine.connect() as conn:
+            return conn.execute(sa.select(sa.func.count()).select_from(LEADS)).scalar_one()
@@ -0,0 +1,180 @@
+import fcntl
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Raw signals the scraper collects per business (missing columns count as unknown)
+FEATURE_COLUMNS = ['Website', 'Years in Business', 'Review Count']
+
+# Why a lead is worth contacting, in contribution order (ties go to the first)
+REASONS = ['New Business in Your Area', 'No Website', 'High Conversion Potential']
+ATTRIBUTES = ['New Businesses', 'No Website', 'High Conversion']
+NEUTRAL_REASON = 2 # Leads no signal speaks for (established, or nothing known) are not "new businesses"
+MODEL_VERSION = 2 # Bump when compute() changes, so cached results from the old model are rescored
+
+CACHE_COLUMNS = ['key', 'fingerprint', 'has_website', 'years', 'reviews', 'score', 'reason']
+
+
+def business_keys(df):
+    """Stable 64-bit key per business: (Business Name, City)."""
+    return pd.util.hash_pandas_object(df[['Business Name', 'City']].astype(str), index=False).to_numpy()
+
+
+class LeadScorer:
+    """Deterministic lead scoring: niche prior + website / business age / review signals.
+
+    Features are computed for a whole batch at once with NumPy. Each business's
+    features and score are cached on disk under its key; on later runs only
+    businesses whose features (or niche) changed are rescored.
+    """
+
+    def __init__(self, default_prior, niche_priors=None, weights=None, new_business_years=2,
+                 review_saturation=500, cache_path=None):
+        self.default_prior = default_prior
+        self.niche_priors = {niche.lower(): prior for niche, prior in (niche_priors or {}).items()}
+        weights = weights or {}
+        self.w_new_business = weights.get('NEW_BUSINESS', 12)
+        self.w_no_website = weights.get('NO_WEBSITE', 15)
+        self.w_reviews = weights.get('REVIEWS', 15)
+        self.new_business_years = new_business_years
+        self.review_scale = np.log1p(review_saturation)
+
+        # Cached scores are only valid for the model that produced them
+        model = json.dumps([MODEL_VERSION, default_prior, sorted(self.niche_priors.items()), sorted(weights.items()),
+                            new_business_years, review_saturation])
+        self.model_salt = np.uint64(int.from_bytes(hashlib.sha1(model.encode()).digest()[:8], 'big'))
+
+        self.cache_path = cache_path
+        self.cache = self._load_cache()
+        self._cache_index = pd.Index(self.cache['key'])
+        self._pending = []
+        self.stats = {'scored': 0, 'reused': 0}
+
+    @classmethod
+    def from_config(cls, scoring_config):
+        return cls(
+            default_prior=scoring_config['DEFAULT_PRIOR'],
+            niche_priors=scoring_config.get('NICHE_PRIORS'),
+            weights=scoring_config.get('WEIGHTS'),
+            new_business_years=scoring_config['NEW_BUSINESS_YEARS'],
+            review_saturation=scoring_config['REVIEW_SATURATION'],
+            cache_path=scoring_config.get('CACHE_PATH'),
+        )
+
+    # --- FEATURES ---
+
+    def features(self, df):
+        """Numeric feature arrays for a batch (NaN = unknown)."""
+        n = len(df)
+        if 'Website' in df.columns:
+            website = df['Website']
+            has_website = (website.notna() & (website.astype(str).str.strip() != '')).to_numpy(dtype=np.float64)
+        else:
+            has_website = np.full(n, np.nan)
+        years = pd.to_numeric(df['Years in Business'], errors='coerce').to_numpy(dtype=np.float64) if 'Years in Business' in df.columns else np.full(n, np.nan)
+        reviews = pd.to_numeric(df['Review Count'], errors='coerce').to_numpy(dtype=np.float64) if 'Review Count' in df.columns else np.full(n, np.nan)
+        return has_website, years, reviews
+
+    def priors(self, niches):
+        """Niche prior per row, mapped once per distinct niche."""
+        codes, uniques = pd.factorize(niches.astype(str).str.lower())
+        table = np.array([self.niche_priors.get(u, self.default_prior) for u in uniques] + [self.default_prior], dtype=np.float64)
+        return table[codes] # code -1 (missing niche) picks the trailing default
+
+    def fingerprints(self, df, has_website, years, reviews):
+        frame = pd.DataFrame({'niche': df['Niche'].astype(str).to_numpy(), 'has_website': has_website,
+                              'years': years, 'reviews': reviews})
+        return pd.util.hash_pandas_object(frame, index=False).to_numpy() ^ self.model_salt
+
+    # --- MODEL ---
+
+    def compute(self, priors, has_website, years, reviews):
+        """Scores (int8, 0-100) and reason codes (index into REASONS) for feature arrays."""
+        contributions = np.column_stack([
+            self.w_new_business * (years < self.new_business_years),
+            self.w_no_website * (has_website == 0),
+            self.w_reviews * np.minimum(np.log1p(np.nan_to_num(reviews)) / self.review_scale, 1.0),
+        ])
+        score = np.clip(np.rint(priors + contributions.sum(axis=1)), 0, 100).astype(np.int8)
+        reason = np.where(contributions.max(axis=1) > 0, contributions.argmax(axis=1), NEUTRAL_REASON).astype(np.int8)
+        return score, reason
+
+    def score(self, df):
+        """Adds Lead Score / Reason to Contact / Attribute to a raw scrape batch (returns a new frame).
+
+        Frames without any raw signals (older scrapes) keep the enrichment they already have.
+        """
+        if df.empty or ('Lead Score' in df.columns and not any(c in df.columns for c in FEATURE_COLUMNS)):
+            return df
+
+        keys = business_keys(df)
+        has_website, years, reviews = self.features(df)
+        fingerprints = self.fingerprints(df, has_website, years, reviews)
+
+        score = np.zeros(len(df), dtype=np.int8)
+        reason = np.zeros(len(df), dtype=np.int8)
+
+        # Businesses whose features are unchanged since they were last scored reuse the cached result
+        positions = self._cache_index.get_indexer(keys) if len(self._cache_index) else np.full(len(df), -1)
+        hit = positions >= 0
+        hit[hit] = self.cache['fingerprint'].to_numpy()[positions[hit]] == fingerprints[hit]
+        score[hit] = self.cache['score'].to_numpy()[positions[hit]]
+        reason[hit] = self.cache['reason'].to_numpy()[positions[hit]]
+
+        changed = ~hit
+        if changed.any():
+            score[changed], reason[changed] = self.compute(
+                self.priors(df['Niche'][changed]), has_website[changed], years[changed], reviews[changed]
+            )
+            self._pending.append(pd.DataFrame({
+                'key': keys[changed], 'fingerprint': fingerprints[changed],
+                'has_website': has_website[changed], 'years': years[changed], 'reviews': reviews[changed],
+                'score': score[changed], 'reason': reason[changed],
+            }))
+
+        self.stats['reused'] += int(hit.sum())
+        self.stats['scored'] += int(changed.sum())
+
+        df = df.copy()
+        df['Lead Score'] = score
+        df['Reason to Contact'] = np.asarray(REASONS, dtype=object)[reason]
+        df['Attribute'] = np.asarray(ATTRIBUTES, dtype=object)[reason]
+        return df
+
+    # --- PERSISTENCE ---
+
+    def _empty_cache(self):
+        return pd.DataFrame({c: pd.Series(dtype='uint64' if c in ('key', 'fingerprint') else 'float64') for c in CACHE_COLUMNS})
+
+    def _load_cache(self):
+        if self.cache_path and os.path.exists(self.cache_path):
+            try:
+                cache = pd.read_parquet(self.cache_path)
+                return cache.drop_duplicates('key', keep='last').reset_index(drop=True)
+            except Exception as e:
+                print(f"Warning: ignoring unreadable score cache {self.cache_path}: {e}")
+        return self._empty_cache()
+
+    def save(self):
+        """Merges this run's rescored businesses into the on-disk cache (under a lock, like the scrape cache)."""
+        if not self.cache_path or not self._pending:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        tmp_path = self.cache_path + f'.{os.getpid()}.tmp'
+        with open(self.cache_path + '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            cache = pd.concat([self._load_cache()] + self._pending, ignore_index=True)
+            cache = cache.drop_duplicates('key', keep='last').reset_index(drop=True)
+            cache.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, self.cache_path)
+        self.cache = cache
+        self._cache_index = pd.Index(cache['key'])
+        self._pending = []
+
+    def summary(self):
+        total = self.stats['scored'] + self.stats['reused']
+        rate = self.stats['reused'] / total if total else 0.0
+        return f"Lead scoring: {self.stats['scored']} scored, {self.stats['reused']} unchanged ({rate:.0%} reused from cache)"
@@ -0,0 +1,216 @@
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+# --- LEAD SCHEMA ---
+# Low-cardinality text is dictionary-encoded; the score fits in a small integer.
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+LEAD_SCHEMA = pa.schema([
+    ('Business Name', pa.string()),
+    ('Phone', pa.string()),
+    ('phone_e164', pa.string()), # Normalized by the verifier; null in raw scrapes
+    ('Email', pa.string()),
+    ('City', CATEGORY),
+    ('Niche', CATEGORY),
+    ('Lead Score', pa.int8()),
+    ('Reason to Contact', CATEGORY),
+    ('Attribute', CATEGORY),
+    ('source_url', pa.string()),
+    ('scraped_date', pa.timestamp('ms')), # Parquet has no seconds unit
+    ('phone_masked', pa.string()), # Trial-view masks, precomputed by the verifier
+    ('email_masked', pa.string()),
+])
+
+LEAD_COLUMNS = LEAD_SCHEMA.names
+EXPORT_COLUMNS = [c for c in LEAD_COLUMNS if c not in ('phone_masked', 'email_masked')] # Customer CSV layout
+PARTITION_COLUMNS = ['City', 'Niche']
+
+
+def to_lead_table(df):
+    """Casts a lead DataFrame to LEAD_SCHEMA (extra columns are dropped, missing ones become null)."""
+    df = df.reindex(columns=LEAD_COLUMNS)
+    for col in ['City', 'Niche', 'Reason to Contact', 'Attribute']:
+        df[col] = df[col].astype(object).fillna('N/A').astype(str)
+    df['Phone'] = df['Phone'].astype(str)
+    df['Email'] = df['Email'].astype(str)
+    df['Lead Score'] = pd.to_numeric(df['Lead Score'], errors='coerce').fillna(0).clip(0, 100).astype('int8')
+    df['scraped_date'] = pd.to_datetime(df['scraped_date'], errors='coerce')
+    return pa.Table.from_pandas(df, schema=LEAD_SCHEMA, preserve_index=False)
+
+
+def _to_frame(table):
+    """Back to pandas, in schema column order, with dictionary columns as categoricals."""
+    columns = [name for name in LEAD_COLUMNS if name in table.column_names]
+    return table.select(columns).to_pandas()
+
+
+# --- RAW HAND-OFF (single file) ---
+
+def write_raw(df, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    pq.write_table(to_lead_table(df), path)
+
+
+def read_raw(path):
+    return _to_frame(pq.read_table(path))
+
+
+def iter_raw_chunks(path, chunk_size):
+    """Yields the raw scrape `chunk_size` rows at a time (Parquet or legacy CSV)."""
+    if path.endswith('.parquet'):
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype={'Phone': str, 'Email': str})
+
+
+# --- VERIFIED INVENTORY (partitioned by City/Niche) ---
+
+def _partitioning():
+    return ds.partitioning(pa.schema([LEAD_SCHEMA.field(c) for c in PARTITION_COLUMNS]), flavor='hive')
+
+
+def _swap_in(tmp_root, root):
+    """Replaces `root` with the finished tree so readers never see a partially written one.
+
+    The old tree is renamed aside and only deleted once the new one is in
+    place, so `root` is missing for two renames rather than a whole rmtree.
+    """
+    os.makedirs(tmp_root, exist_ok=True) # An empty frame writes no files
+    old_root = root + '.old'
+    shutil.rmtree(old_root, ignore_errors=True) # Left over from an interrupted swap
+    if os.path.exists(root):
+        os.replace(root, old_root)
+    os.replace(tmp_root, root)
+    shutil.rmtree(old_root, ignore_errors=True)
+
+
+def _run_tag():
+    return datetime.now().strftime('%Y%m%d%H%M%S%f')
+
+
+def write_verified(df, root):
+    """Replaces the verified dataset with `df`, partitioned as City=.../Niche=.../part-0.parquet."""
+    tmp_root = root + '.tmp'
+    shutil.rmtree(tmp_root, ignore_errors=True)
+
+    ds.write_dataset(
+        to_lead_table(df), tmp_root,
+        format='parquet',
+        partitioning=_partitioning(),
+        basename_template='part-{i}.parquet',
+    )
+    _swap_in(tmp_root, root)
+
+
+def append_verified(df, root):
+    """Adds `df` to the existing dataset as new files, leaving earlier runs' files untouched."""
+    if df.empty:
+        return
+    ds.write_dataset(
+        to_lead_table(df), root,
+        format='parquet',
+        partitioning=_partitioning(),
+        basename_template=f'part-{_run_tag()}-{{i}}.parquet',
+        existing_data_behavior='overwrite_or_ignore',
+    )
+
+
+class VerifiedDatasetWriter:
+    """Incremental version of write_verified + export_csv for streaming verification.
+
+    Each `write()` adds one chunk's files and appends to the CSV export. In
+    replace mode the chunks go to a fresh tree that `close()` swaps into place;
+    in append mode they are added to the existing inventory directly.
+    """
+
+    def __init__(self, root, csv_path, append=False):
+        self.root = root
+        self.append = append
+        self.target_root = root if append else root + '.tmp'
+        self.csv_path = csv_path
+        self.run_tag = _run_tag()
+        self.chunks_written = 0
+        self.rows_written = 0
+        if not append:
+            shutil.rmtree(self.target_root, ignore_errors=True)
+
+    def write(self, df):
+        if df.empty:
+            return
+        ds.write_dataset(
+            to_lead_table(df), self.target_root,
+            format='parquet',
+            partitioning=_partitioning(),
+            basename_template=f'part-{self.run_tag}-{self.chunks_written}-{{i}}.parquet',
+            existing_data_behavior='overwrite_or_ignore',
+        )
+        export_csv(df, self.csv_path, append=self.append or self.chunks_written > 0)
+        self.chunks_written += 1
+        self.rows_written += len(df)
+
+    def close(self):
+        if self.chunks_written == 0 and not (self.append and os.path.exists(self.csv_path)):
+            # Write headers based on the final expected columns for stability
+            pd.DataFrame(columns=EXPORT_COLUMNS).to_csv(self.csv_path, index=False)
+        if not self.append:
+            _swap_in(self.target_root, self.root)
+        return self.rows_written
+
+
+def read_verified(root, cities=None, niches=None, columns=None):
+    """Reads the verified dataset, opening only the City/Niche partitions that match the filters."""
+    dataset = ds.dataset(root, format='parquet', partitioning=ds.HivePartitioning.discover(infer_dictionary=True))
+    # Files written before a column was added to LEAD_SCHEMA read it back as null
+    partition_fields = [dataset.schema.field(c) for c in PARTITION_COLUMNS if c in dataset.schema.names]
+    data_fields = [f for f in LEAD_SCHEMA if f.name not in PARTITION_COLUMNS]
+    dataset = dataset.replace_schema(pa.schema(data_fields + partition_fields))
+
+    condition = None
+    if cities:
+        condition = ds.field('City').isin(list(cities))
+    if niches:
+        niche_condition = ds.field('Niche').isin(list(niches))
+        condition = niche_condition if condition is None else condition & niche_condition
+
+    return _to_frame(dataset.to_table(columns=columns, filter=condition))
+
+
+def verified_exists(root):
+    return os.path.isdir(root) and any(os.scandir(root))
+
+
+# --- CUSTOMER EXPORT ---
+
+def to_export_frame(df):
+    """`df` in the customer layout (EXPORT_COLUMNS that it has), with scraped_date as text."""
+    out = df[[c for c in EXPORT_COLUMNS if c in df.columns]].copy()
+    if 'scraped_date' in out.columns:
+        out['scraped_date'] = pd.to_datetime(out['scraped_date']).dt.strftime('%Y-%m-%d %H:%M:%S')
+    return out
+
+
+def export_csv(df, path, append=False):
+    """Plain CSV for customers, with the same column layout as verified_leads.csv."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    out = to_export_frame(df)
+
+    if append and os.path.exists(path):
+        if out.empty:
+            return
+        with open(path, 'r') as f:
+            header = f.readline().strip()
+        if header != ','.join(out.columns):
+            # Older layout on disk: rewrite once with the current columns
+            out = pd.concat([pd.read_csv(path), out], ignore_index=True)[out.columns]
+            append = False
+    else:
+        append = False
+
+    out.to_csv(path, index=False, mode='a' if append else 'w', header=not append)
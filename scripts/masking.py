@@ -0,0 +1,39 @@
+# Trial users see leads with the phone tail and most of the email username hidden.
+# These are column-at-a-time versions of the dashboard's original per-row masks.
+
+
+def mask_phone_series(phones):
+    """'+1 675-359-2520' -> '+1 675-3***-2520' (numbers of 8 chars or fewer are left as-is)."""
+    phones = phones.astype(str)
+    masked = phones.str.slice(0, 8) + '***-' + phones.str.slice(-4)
+    return masked.where(phones.str.len() > 8, phones)
+
+
+def mask_email_series(emails):
+    """'test_lead_0@x.com' -> 'te****@x.com' (usernames of 4 chars or fewer are left as-is)."""
+    return emails.astype(str).str.replace(r'^([^@]{2})[^@]{3,}@([^@]*)$', r'\1****@\2', regex=True)
+
+
+def add_masked_columns(df):
+    """Stores the trial-view masks next to the raw Phone/Email columns."""
+    df['phone_masked'] = mask_phone_series(df['Phone'])
+    df['email_masked'] = mask_email_series(df['Email'])
+    return df
+
+
+def select_contact_columns(df, is_premium):
+    """Points Phone/Email at the raw or masked columns for the given plan (no per-row work
+    unless some rows predate the masked columns)."""
+    if is_premium:
+        return df
+
+    for raw_col, masked_col, mask_fn in [('Phone', 'phone_masked', mask_phone_series),
+                                         ('Email', 'email_masked', mask_email_series)]:
+        if masked_col not in df.columns:
+            df[raw_col] = mask_fn(df[raw_col])
+            continue
+        missing = df[masked_col].isna()
+        if missing.any():
+            df.loc[missing, masked_col] = mask_fn(df.loc[missing, raw_col])
+        df[raw_col] = df[masked_col]
+    return df
@@ -0,0 +1,192 @@
+import atexit
+import json
+import numbers
+import os
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+
+import yaml
+
+PROMETHEUS_PREFIX = 'leadpipe'
+
+
+def prometheus_value(value):
+    """Exact sample value: integral counts as integers (':g' would round 1234567 to 1.23457e+06)."""
+    if isinstance(value, numbers.Integral) or float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def prometheus_label(value):
+    """Label value with backslash, double quote and newline escaped, as the text format requires."""
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _NullSpan:
+    """What span() returns when metrics are off: entering and leaving it does nothing."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **labels):
+        pass
+
+
+NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    def __init__(self, metrics, name, labels):
+        self.metrics = metrics
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        if exc_type is not None:
+            self.labels['error'] = exc_type.__name__
+        self.metrics.record_span(self.name, seconds, self.labels)
+        return False
+
+    def set(self, **labels):
+        """Adds labels known only inside the span (e.g. rows produced)."""
+        self.labels.update(labels)
+
+
+class Metrics:
+    """Span timers and counters for one pipeline process.
+
+    Spans are appended to a JSON-lines file as they finish; counter totals
+    (plus per-span sums) are written to the same file and to an optional
+    Prometheus text file when the process flushes or exits. Disabled metrics
+    cost one attribute check per call.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.component = None
+        self.path = None
+        self.prometheus_dir = None
+        self.run_id = None
+        self.counters = defaultdict(float)
+        self.span_totals = defaultdict(lambda: [0, 0.0]) # name -> [count, seconds]
+        self._lock = threading.Lock() # Targets are scraped from worker threads
+        self._file = None
+        self._counters_changed = False
+
+    def configure(self, metrics_config, component):
+        """Turns metrics on for this process if METRICS.ENABLED (or the METRICS_ENABLED env var) says so."""
+        if self.component is not None:
+            return self # First component to configure names the process
+        self.component = component
+        self.enabled = bool(metrics_config.get('ENABLED')) or os.environ.get('METRICS_ENABLED', '') in ('1', 'true')
+        if not self.enabled:
+            return self
+        self.path = metrics_config['PATH']
+        self.prometheus_dir = metrics_config.get('PROMETHEUS_DIR')
+        self.run_id = os.environ.get('GITHUB_RUN_ID') or f"{datetime.now():%Y%m%d-%H%M%S}-{os.getpid()}"
+        atexit.register(self.flush)
+        return self
+
+    def configure_from_file(self, component, config_path='config/config.yaml'):
+        try:
+            with open(config_path, 'r') as f:
+                metrics_config = yaml.safe_load(f).get('METRICS') or {}
+        except FileNotFoundError:
+            metrics_config = {}
+        return self.configure(metrics_config, component)
+
+    # --- RECORDING ---
+
+    def span(self, name, **labels):
+        """Context manager timing one stage or target: `with METRICS.span('verify', rows=n): ...`."""
+        if not self.enabled:
+            return NULL_SPAN
+        return _Span(self, name, labels)
+
+    def inc(self, name, value=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] += value
+            self._counters_changed = True
+
+    def inc_each(self, name, values, label):
+        """One counter series per entry of a stats dict, e.g. inc_each('leads_rejected', rejections, 'rule')."""
+        if not self.enabled:
+            return
+        for key, value in values.items():
+            self.inc(name, value, **{label: key})
+
+    def record_span(self, name, seconds, labels):
+        with self._lock:
+            totals = self.span_totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+            self._write({'type': 'span', 'name': name, 'seconds': round(seconds, 6), 'labels': labels})
+
+    # --- OUTPUT ---
+
+    def _write(self, event):
+        """Appends one event (caller holds the lock)."""
+        if self._file is None:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            self._file = open(self.path, 'a', buffering=1) # Line-buffered: complete lines even if the run dies
+        event = {'ts': datetime.now().isoformat(timespec='milliseconds'), 'run_id': self.run_id,
+                 'component': self.component, **event}
+        self._file.write(json.dumps(event, default=str) + '\n')
+
+    def flush(self):
+        """Writes counter totals to the JSON-lines file and refreshes the Prometheus file."""
+        if not self.enabled:
+            return
+        with self._lock:
+            if self._counters_changed: # Totals so far; a later flush supersedes them
+                for (name, labels), value in sorted(self.counters.items()):
+                    self._write({'type': 'counter', 'name': name, 'value': value, 'labels': dict(labels)})
+                self._counters_changed = False
+            if self._file is not None:
+                self._file.flush()
+            if self.prometheus_dir:
+                self._write_prometheus()
+
+    def _write_prometheus(self):
+        """Text exposition format, one file per component (e.g. for node_exporter's textfile collector)."""
+        def labels_text(labels):
+            labels = {'component': self.component, **labels}
+            return '{' + ','.join(f'{k}="{prometheus_label(v)}"' for k, v in labels.items()) + '}'
+
+        lines = []
+        counter_names = sorted({name for name, _ in self.counters})
+        for name in counter_names:
+            metric = f"{PROMETHEUS_PREFIX}_{name}_total"
+            lines.append(f"# TYPE {metric} counter")
+            for (series, labels), value in sorted(self.counters.items()):
+                if series == name:
+                    lines.append(f"{metric}{labels_text(dict(labels))} {prometheus_value(value)}")
+
+        metric = f"{PROMETHEUS_PREFIX}_span_seconds"
+        lines.append(f"# TYPE {metric} summary")
+        for name, (count, seconds) in sorted(self.span_totals.items()):
+            lines.append(f"{metric}_sum{labels_text({'span': name})} {seconds:.6f}")
+            lines.append(f"{metric}_count{labels_text({'span': name})} {count}")
+
+        os.makedirs(self.prometheus_dir, exist_ok=True)
+        path = os.path.join(self.prometheus_dir, f"{self.component}.prom")
+        with open(path + '.tmp', 'w') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(path + '.tmp', path)
+
+
+# One instance per process, shared by every module that imports it
+METRICS = Metrics()
@@ -0,0 +1,141 @@
+import argparse
+import hashlib
+import os
+import re
+import time
+from datetime import datetime
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+import yaml
+
+from lead_scoring import LeadScorer
+from lead_storage import LEAD_SCHEMA, to_lead_table
+
+# Usage (from the repo root):
+#   python scripts/mock_data.py --rows 10000000 --duplicate-rate 0.1 --invalid-rate 0.05
+#   python scripts/clean_verify.py --stream          # then load-test verification / the dashboard
+# Writes a reproducible synthetic raw scrape (same --seed -> same rows) in the
+# schema clean_verify.py reads. execute_scrape uses the same generator per target.
+
+DEFAULT_CITIES = ['Dallas, Texas', 'Austin, Texas', 'Houston, Texas', 'Phoenix, Arizona', 'Denver, Colorado',
+                  'Pune, India', 'Mumbai, India', 'Bangalore, India', 'London, UK', 'Toronto, Canada']
+DEFAULT_NICHES = ['HVAC Services', 'Grocery Stores', 'Plumbing', 'Roofing', 'Dentists',
+                  'Landscaping', 'Auto Repair', 'Real Estate', 'Bakeries', 'Fitness Studios']
+
+# Columns copied from an earlier row to make a duplicate (same business, new listing)
+IDENTITY_COLUMNS = ['Business Name', 'Niche', 'City', 'Phone', 'Email']
+
+
+def stable_seed(*parts):
+    """Seed that is the same in every process (unlike hash(), which PYTHONHASHSEED salts)."""
+    return int.from_bytes(hashlib.sha1('|'.join(str(p) for p in parts).encode()).digest()[:8], 'big')
+
+
+def email_domain(city):
+    return re.sub(r'[^a-z0-9]', '', city.lower()) # "Dallas, Texas" -> "dallastexas"
+
+
+def generate_leads(n_rows, niches, cities, seed, id_offset=0, duplicate_rate=0.0, invalid_rate=0.0, scraped_at=None):
+    """`n_rows` synthetic raw leads, every column generated with NumPy / Arrow kernels in one pass.
+
+    Niche and City are drawn uniformly from the given lists. `duplicate_rate` of
+    the rows repeat an earlier row's business; `invalid_rate` of the rows get a
+    too-short phone or a malformed email. Lead IDs start at `id_offset`.
+    """
+    rng = np.random.default_rng(seed)
+    ids = pa.array(np.arange(id_offset, id_offset + n_rows)).cast(pa.string())
+
+    def join(*parts):
+        return pc.binary_join_element_wise(*parts, '')
+
+    def digits(low, high):
+        return pa.array(rng.integers(low, high, n_rows)).cast(pa.string())
+
+    niche_codes = pa.array(rng.integers(0, len(niches), n_rows))
+    city_codes = pa.array(rng.integers(0, len(cities), n_rows))
+    prefixes = pa.array([n.title().split()[0] for n in niches]).take(niche_codes)
+    domains = pa.array([email_domain(c) for c in cities]).take(city_codes)
+
+    columns = {
+        'Business Name': join(prefixes, ' Lead ', ids),
+        'Niche': pa.array(niches).take(niche_codes),
+        'City': pa.array(cities).take(city_codes),
+        'Phone': join('+1 ', digits(100, 1000), '-', digits(100, 1000), '-', digits(1000, 10000)),
+        'Email': join('test_lead_', ids, '@', domains, '.com'),
+        # Raw signals for the scoring stage
+        'Website': pc.if_else(rng.random(n_rows) < 0.7, join('http://lead', ids, '.', domains, '.com'), ''),
+        'Years in Business': np.round(rng.uniform(0, 25, n_rows), 1),
+        'Review Count': rng.exponential(40, n_rows).astype(np.int64),
+        'source_url': join('http://source.com/lead_', ids),
+        'scraped_date': pa.array([(scraped_at or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')]).take(np.zeros(n_rows, dtype=np.int64)),
+    }
+
+    if duplicate_rate > 0:
+        rows = np.arange(n_rows)
+        duplicate = rng.random(n_rows) < duplicate_rate
+        duplicate[:1] = False # Nothing earlier to repeat
+        # Each duplicate copies an original (non-duplicate) row before it, so it
+        # really repeats a business that is in the output
+        originals = np.flatnonzero(~duplicate)
+        earlier = np.searchsorted(originals, np.flatnonzero(duplicate)) # Originals before each duplicate (>= 1)
+        rows[duplicate] = originals[(rng.random(len(earlier)) * earlier).astype(np.int64)]
+        for col in IDENTITY_COLUMNS:
+            columns[col] = columns[col].take(rows)
+
+    if invalid_rate > 0:
+        invalid = rng.random(n_rows) < invalid_rate
+        bad_phone = invalid & (rng.random(n_rows) < 0.5)
+        bad_email = invalid & ~bad_phone
+        columns['Phone'] = pc.if_else(bad_phone, pc.utf8_slice_codeunits(columns['Phone'], -4), columns['Phone']) # Fails MIN_PHONE_LENGTH
+        columns['Email'] = pc.if_else(bad_email, pc.replace_substring(columns['Email'], '.com', ''), columns['Email']) # No TLD
+    return pa.table(columns).to_pandas()
+
+
+def write_mock_raw(path, n_rows, niches, cities, seed, scorer, duplicate_rate=0.0, invalid_rate=0.0, chunk_size=250_000):
+    """Streams `n_rows` generated, scored leads into a raw Parquet file, `chunk_size` rows at a time."""
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    scraped_at = datetime.now()
+    with pq.ParquetWriter(path, LEAD_SCHEMA) as writer:
+        for chunk, start in enumerate(range(0, n_rows, chunk_size)):
+            df = generate_leads(
+                min(chunk_size, n_rows - start), niches, cities, seed=stable_seed(seed, chunk), id_offset=start,
+                duplicate_rate=duplicate_rate, invalid_rate=invalid_rate, scraped_at=scraped_at,
+            )
+            writer.write_table(to_lead_table(scorer.score(df)))
+
+
+def names(defaults, count):
+    """`count` names: the defaults first, then numbered copies of them."""
+    return [defaults[i % len(defaults)] + (f" {i // len(defaults)}" if i >= len(defaults) else '') for i in range(count)]
+
+
+# --------------------------------------------------
+# MAIN WORKFLOW EXECUTION
+# --------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Reproducible synthetic raw scrape for load testing.")
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--cities', type=int, default=len(DEFAULT_CITIES), help="Distinct cities")
+    parser.add_argument('--niches', type=int, default=len(DEFAULT_NICHES), help="Distinct niches")
+    parser.add_argument('--duplicate-rate', type=float, default=0.0, help="Share of rows repeating an earlier business")
+    parser.add_argument('--invalid-rate', type=float, default=0.0, help="Share of rows with a bad phone or email")
+    parser.add_argument('--chunk-size', type=int, default=250_000)
+    parser.add_argument('--output', default='data/raw/latest_raw_scrape.parquet')
+    args = parser.parse_args()
+
+    with open('config/config.yaml', 'r') as f:
+        scoring_config = dict(yaml.safe_load(f)['LEAD_SCORING'], CACHE_PATH=None) # Synthetic businesses: no score cache
+
+    start = time.perf_counter()
+    write_mock_raw(
+        args.output, args.rows, names(DEFAULT_NICHES, args.niches), names(DEFAULT_CITIES, args.cities), args.seed,
+        LeadScorer.from_config(scoring_config),
+        duplicate_rate=args.duplicate_rate, invalid_rate=args.invalid_rate, chunk_size=args.chunk_size,
+    )
+    elapsed = time.perf_counter() - start
+    print(f"Wrote {args.rows} synthetic raw leads to {args.output} in {elapsed:.1f}s ({args.rows / elapsed * 60:,.0f} rows/min).")
@@ -0,0 +1,207 @@
+import os
+import socket
+import sqlite3
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+ORDER_COLUMNS = ['id', 'timestamp', 'niche', 'location', 'max_count', 'user_id', 'status', 'priority', 'fulfilled']
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class OrderQueue:
+    """Custom lead orders in SQLite (WAL), shared by the dashboard and scraper workers.
+
+    Every operation is its own short transaction on a fresh connection, so
+    concurrent submitters never interleave rows and Streamlit threads never
+    share a connection. claim() moves PENDING_SCRAPE orders to SCRAPING under
+    an immediate write lock: two workers can never claim the same order.
+    `fulfilled` counts listing rows scraped for the order so far (before
+    validation and dedup); an order that a run only partly fills goes back
+    to PENDING_SCRAPE for the next one.
+    """
+
+    PENDING = 'PENDING_SCRAPE'
+    CLAIMED = 'SCRAPING'
+    COMPLETE = 'SCRAPE_COMPLETE'
+
+    def __init__(self, path):
+        self.path = str(path)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL") # Readers never block the writer (persists in the file)
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS orders (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    niche TEXT NOT NULL,
+                    location TEXT NOT NULL,
+                    max_count INTEGER NOT NULL,
+                    user_id TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    claimed_by TEXT,
+                    claimed_at TEXT,
+                    updated_at TEXT,
+                    priority INTEGER NOT NULL DEFAULT 0,
+                    fulfilled INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS idx_orders_user ON orders (user_id, id);
+                CREATE INDEX IF NOT EXISTS idx_orders_status ON orders (status, id);
+            """)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(orders)")}
+            for column in ('priority', 'fulfilled'): # Queues created before partial fulfillment
+                if column not in columns:
+                    conn.execute(f"ALTER TABLE orders ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_orders_claim ON orders (status, priority DESC, id)")
+        finally:
+            conn.close()
+
+    @classmethod
+    def from_config(cls, queue_config):
+        return cls(queue_config['PATH'])
+
+    def _connect(self):
+        # isolation_level=None: transactions are opened explicitly where needed
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _now(self):
+        return datetime.now().strftime(TIME_FORMAT)
+
+    # --- DASHBOARD SIDE ---
+
+    def submit(self, niche, location, max_count, user_id, priority=0):
+        """Adds a PENDING_SCRAPE order; returns its id."""
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                "INSERT INTO orders (timestamp, niche, location, max_count, user_id, status, priority) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (self._now(), niche, location, int(max_count), user_id, self.PENDING, int(priority)),
+            )
+            return cursor.lastrowid
+        finally:
+            conn.close()
+
+    def orders_for_user(self, user_id, limit=3):
+        """The user's `limit` most recent orders, oldest first (an index range scan)."""
+        conn = self._connect()
+        try:
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(ORDER_COLUMNS)} FROM orders WHERE user_id = ? ORDER BY id DESC LIMIT ?",
+                conn, params=(user_id, limit),
+            )
+        finally:
+            conn.close()
+        return df.iloc[::-1].reset_index(drop=True)
+
+    def import_csv(self, csv_path):
+        """One-time migration of the old order_queue.csv (skipped once the queue has orders)."""
+        if not os.path.exists(csv_path):
+            return 0
+        conn = self._connect()
+        try:
+            if conn.execute("SELECT 1 FROM orders LIMIT 1").fetchone() is not None:
+                return 0
+            df = pd.read_csv(csv_path)
+            rows = df[['timestamp', 'niche', 'location', 'max_count', 'user_id', 'status']].itertuples(index=False, name=None)
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT INTO orders (timestamp, niche, location, max_count, user_id, status) VALUES (?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+            return len(df)
+        finally:
+            conn.close()
+
+    # --- WORKER SIDE ---
+
+    def claim(self, worker_id=None, limit=100):
+        """Atomically takes up to `limit` PENDING_SCRAPE orders for this worker, highest priority then oldest first.
+
+        Returns the claimed orders as a DataFrame (ORDER_COLUMNS).
+        """
+        worker_id = worker_id or default_worker_id()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE") # Take the write lock before reading, so claims cannot overlap
+            df = pd.read_sql_query(
+                f"SELECT {', '.join(ORDER_COLUMNS)} FROM orders WHERE status = ? ORDER BY priority DESC, id LIMIT ?",
+                conn, params=(self.PENDING, limit),
+            )
+            now = self._now()
+            conn.executemany(
+                "UPDATE orders SET status = ?, claimed_by = ?, claimed_at = ?, updated_at = ? WHERE id = ?",
+                [(self.CLAIMED, worker_id, now, now, int(i)) for i in df['id']],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        df['status'] = self.CLAIMED
+        return df
+
+    def set_status(self, order_ids, status):
+        """Sets the status of the given orders in one transaction; returns the number updated."""
+        order_ids = [int(i) for i in order_ids]
+        if not order_ids:
+            return 0
+        conn = self._connect()
+        try:
+            now = self._now()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "UPDATE orders SET status = ?, updated_at = ? WHERE id = ?",
+                    [(status, now, i) for i in order_ids],
+                )
+            return len(order_ids)
+        finally:
+            conn.close()
+
+    def record_fulfillment(self, updates):
+        """Applies (order_id, fulfilled, status) updates in one transaction; returns the number updated."""
+        updates = [(int(fulfilled), status, int(order_id)) for order_id, fulfilled, status in updates]
+        if not updates:
+            return 0
+        conn = self._connect()
+        try:
+            now = self._now()
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "UPDATE orders SET fulfilled = ?, status = ?, updated_at = ? WHERE id = ?",
+                    [(fulfilled, status, now, order_id) for fulfilled, status, order_id in updates],
+                )
+            return len(updates)
+        finally:
+            conn.close()
+
+    def release(self, order_ids):
+        """Hands claimed orders back to the queue (e.g. their scrape failed)."""
+        return self.set_status(order_ids, self.PENDING)
+
+    def requeue_stale(self, max_age_minutes):
+        """Returns claims older than `max_age_minutes` to PENDING_SCRAPE (their worker died)."""
+        cutoff = (datetime.now() - timedelta(minutes=max_age_minutes)).strftime(TIME_FORMAT)
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                cursor = conn.execute(
+                    "UPDATE orders SET status = ?, claimed_by = NULL, claimed_at = NULL, updated_at = ? "
+                    "WHERE status = ? AND claimed_at < ?",
+                    (self.PENDING, self._now(), self.CLAIMED, cutoff),
+                )
+            return cursor.rowcount
+        finally:
+            conn.close()
@@ -0,0 +1,191 @@
+import fcntl
+import json
+import os
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+# One run's schedule. `targets` are scraped, each with `max_count` set to its
+# share of the budget; `from_inventory` orders are already covered by fresh
+# verified leads; `deferred` orders got no share this run and stay pending.
+SchedulePlan = namedtuple('SchedulePlan', ['targets', 'from_inventory', 'deferred'])
+
+
+def segment_key(niche, city):
+    return (str(niche).strip().lower(), str(city).strip().lower())
+
+
+def fresh_inventory(dataset_root, max_age_hours, now=None):
+    """Verified leads scraped in the last `max_age_hours`, per segment_key (reads 3 columns)."""
+    from lead_storage import read_verified, verified_exists
+    if not verified_exists(dataset_root):
+        return {}
+    df = read_verified(dataset_root, columns=['City', 'Niche', 'scraped_date'])
+    df = df[df['scraped_date'] >= (now or datetime.now()) - timedelta(hours=max_age_hours)]
+    if df.empty:
+        return {}
+    niches = df['Niche'].astype(str).str.strip().str.lower()
+    cities = df['City'].astype(str).str.strip().str.lower()
+    return df.groupby([niches, cities]).size().to_dict()
+
+
+def order_age_days(timestamp, now):
+    """Days since the order was placed (0 if the timestamp is missing or unreadable)."""
+    placed = pd.to_datetime(timestamp, errors='coerce')
+    if pd.isna(placed):
+        return 0.0
+    return max((now - placed).total_seconds() / 86400, 0.0)
+
+
+class MaintenanceCursor:
+    """Where the maintenance target's next scrape starts in its listing, per segment (a small JSON file).
+
+    Orders keep their place in `fulfilled`; the maintenance target has no
+    order row, so its place is kept here. Re-scraping the top of the listing
+    every run would only return businesses the verifier already has (and
+    drops), leaving the segment stale forever; instead each run takes the
+    next page, and the cursor wraps to the top once the listing runs out.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def start(self, niche, city):
+        return int(self._load().get('|'.join(segment_key(niche, city)), 0))
+
+    def advance(self, target, count):
+        """Moves past the `count` leads a scrape of `target` returned (merged under a lock, like the scrape cache)."""
+        key = '|'.join(segment_key(target['niche'], target['city']))
+        position = 0 if count < target['max_count'] else target.get('start', 0) + count
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = self.path + f'.{os.getpid()}.tmp'
+        with open(self.path + '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            positions = self._load()
+            positions[key] = position
+            with open(tmp_path, 'w') as f:
+                json.dump(positions, f)
+            os.replace(tmp_path, self.path)
+        return position
+
+
+def allocate(owed, weights, budget, min_allocation):
+    """Leads per order for one run.
+
+    Orders are visited heaviest first (ties keep queue order), and each gets
+    a first slice of min(owed, min_allocation) while the budget lasts; an
+    order whose slice no longer fits waits for the next run. What is left is
+    shared in proportion to weight, capped at what each order is still owed.
+    """
+    alloc = [0] * len(owed)
+    ranked = sorted(range(len(owed)), key=lambda i: -weights[i])
+    remaining = budget
+    for i in ranked:
+        first = min(owed[i], min_allocation)
+        if 0 < first <= remaining:
+            alloc[i] = first
+            remaining -= first
+
+    active = [i for i in ranked if 0 < alloc[i] < owed[i]]
+    while remaining > 0 and active:
+        total_weight = sum(weights[i] for i in active)
+        spent = 0
+        for i in active:
+            share = min(owed[i] - alloc[i], int(remaining * weights[i] / total_weight))
+            alloc[i] += share
+            spent += share
+        if spent == 0: # Shares rounded down to nothing: the last few leads go one each, by rank
+            for i in active[:remaining]:
+                alloc[i] += 1
+                spent += 1
+        remaining -= spent
+        active = [i for i in active if alloc[i] < owed[i]]
+    return alloc
+
+
+class OrderScheduler:
+    """Splits one run's lead budget (MAX_LEADS_PER_RUN) across the maintenance
+    target and pending orders.
+
+    An order's weight is PRIORITY_FACTOR ** priority * (1 + age in days), so
+    higher priorities get bigger shares and old orders are never starved.
+    Orders carry `fulfilled` (listing rows scraped for them by earlier runs,
+    counted before validation and dedup) and are only allocated what they
+    are still owed; each target's `start` tells the scraper where in the
+    listing the last run stopped (for maintenance, see MaintenanceCursor). Fresh verified leads
+    (scraped within FRESH_HOURS) spare a scrape: the maintenance target is
+    skipped if its segment has any, an order completes if its segment has
+    as many as it asked for.
+    """
+
+    def __init__(self, budget, maintenance_leads=50, min_allocation=25, priority_factor=2.0):
+        self.budget = budget
+        self.maintenance_leads = maintenance_leads
+        self.min_allocation = min_allocation
+        self.priority_factor = priority_factor
+
+    @classmethod
+    def from_config(cls, scheduler_config, max_leads_per_run):
+        return cls(
+            max_leads_per_run,
+            maintenance_leads=scheduler_config['MAINTENANCE_LEADS'],
+            min_allocation=scheduler_config['MIN_ALLOCATION'],
+            priority_factor=scheduler_config['PRIORITY_FACTOR'],
+        )
+
+    def weight(self, order, now):
+        return self.priority_factor ** order.get('priority', 0) * (1 + order_age_days(order.get('timestamp'), now))
+
+    def plan(self, maintenance, orders, fresh=None, now=None):
+        """SchedulePlan for the maintenance target (or None, `start` optional) and order targets.
+
+        Order targets come in queue order with `max_count` = leads ordered;
+        scheduled ones get `ordered` (that total), `start` (= fulfilled) and
+        `max_count` (this run's share). `fresh` maps segment_key -> fresh
+        verified leads (see fresh_inventory).
+        """
+        fresh = fresh or {}
+        now = now or datetime.now()
+        targets, from_inventory, pending = [], [], []
+        budget = self.budget
+
+        if maintenance is not None and budget > 0:
+            leads = min(self.maintenance_leads, budget)
+            if not fresh.get(segment_key(maintenance['niche'], maintenance['city'])): # Not refreshed within FRESH_HOURS
+                targets.append(dict(maintenance, max_count=leads, start=maintenance.get('start', 0)))
+                budget -= leads
+
+        for order in orders:
+            ordered = int(order['max_count'])
+            owed = ordered - int(order.get('fulfilled', 0))
+            if owed <= 0 or fresh.get(segment_key(order['niche'], order['city']), 0) >= ordered:
+                from_inventory.append(order)
+            else:
+                pending.append((order, owed))
+
+        shares = allocate([owed for _, owed in pending], [self.weight(o, now) for o, _ in pending],
+                          budget, self.min_allocation)
+        deferred = []
+        for (order, _), share in zip(pending, shares):
+            if share:
+                fulfilled = int(order.get('fulfilled', 0))
+                targets.append(dict(order, ordered=int(order['max_count']), start=fulfilled, max_count=share))
+            else:
+                deferred.append(order)
+        return SchedulePlan(targets, from_inventory, deferred)
+
+    def summary(self, plan):
+        scheduled = [t for t in plan.targets if t['order_status_index'] != -1]
+        maintenance = [t for t in plan.targets if t['order_status_index'] == -1]
+        text = f"Scheduled {len(scheduled)} orders ({sum(t['max_count'] for t in scheduled)} leads)"
+        text += f" + maintenance ({maintenance[0]['max_count']} leads)" if maintenance else " (maintenance target is fresh)"
+        return (f"{text} of a {self.budget}-lead budget; {len(plan.from_inventory)} orders covered by fresh "
+                f"inventory, {len(plan.deferred)} deferred to the next run.")
@@ -0,0 +1,475 @@
+import asyncio
+import hashlib
+import json
+import os
+import queue
+import re
+import smtplib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from email.message import EmailMessage
+from functools import lru_cache
+
+from lead_export import iter_query_chunks
+from scrape_executor import DomainRateLimiter
+
+TIME_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Recipient domains that share one mailbox provider's limits; any other
+# domain (a business's own mail server) is its own provider.
+PROVIDER_DOMAINS = {
+    'gmail.com': 'google', 'googlemail.com': 'google',
+    'outlook.com': 'microsoft', 'hotmail.com': 'microsoft', 'live.com': 'microsoft', 'msn.com': 'microsoft',
+    'yahoo.com': 'yahoo', 'ymail.com': 'yahoo', 'aol.com': 'yahoo',
+    'icloud.com': 'apple', 'me.com': 'apple',
+}
+PROVIDER_RATES = {'google': 20, 'microsoft': 10, 'yahoo': 10, 'apple': 5} # Messages/second per provider
+DEFAULT_PROVIDER_RATE = 5 # Messages/second to any other domain
+
+
+# --- TEMPLATES ---
+
+@lru_cache(maxsize=1)
+def _environment():
+    # Templates are typed in by customers: the sandbox blocks attribute access
+    # that reaches Python internals (__globals__, __class__, ...) with a
+    # SecurityError at render time. Plain-text email, so no autoescaping.
+    from jinja2.sandbox import ImmutableSandboxedEnvironment
+    return ImmutableSandboxedEnvironment(autoescape=False, keep_trailing_newline=True)
+
+
+@lru_cache(maxsize=64)
+def compile_template(text):
+    """Jinja2 template for `text`, compiled once per process (raises ValueError on a syntax error)."""
+    import jinja2
+    try:
+        return _environment().from_string(text)
+    except jinja2.TemplateSyntaxError as e:
+        raise ValueError(f"line {e.lineno}: {e.message}") from None
+
+
+def check_template(text):
+    """Compiles `text` and renders it once without lead fields, so templates the
+    sandbox refuses are rejected before a campaign starts (raises ValueError)."""
+    from jinja2.sandbox import SecurityError
+    template = compile_template(text)
+    try:
+        template.render({})
+    except SecurityError as e:
+        raise ValueError(str(e)) from None
+    except Exception:
+        pass # Errors that depend on lead values surface when the campaign renders them
+    return template
+
+
+def template_field(column):
+    """Template variable for a lead column: 'Business Name' -> BusinessName, 'Reason to Contact' -> ReasonToContact."""
+    return ''.join(part[:1].upper() + part[1:] for part in re.split(r'[^0-9A-Za-z]+', column))
+
+
+def render_batch(subject, body, frame):
+    """(email, subject, body) for every row of a lead frame; missing values render as ''."""
+    fields = frame.astype(object).where(frame.notna(), '').rename(columns=template_field)
+    return [(lead['Email'], subject.render(lead), body.render(lead)) for lead in fields.to_dict('records')]
+
+
+def provider_of(email):
+    domain = email.rpartition('@')[2].lower()
+    return PROVIDER_DOMAINS.get(domain, domain)
+
+
+def smtp_settings(environ):
+    """SMTPPool arguments from SMTP_HOST / SMTP_PORT / SMTP_USER / SMTP_PASSWORD (None without SMTP_HOST)."""
+    if not environ.get('SMTP_HOST'):
+        return None
+    return {
+        'host': environ['SMTP_HOST'],
+        'port': int(environ.get('SMTP_PORT', 587)),
+        'username': environ.get('SMTP_USER'),
+        'password': environ.get('SMTP_PASSWORD'),
+    }
+
+
+# --- SMTP ---
+
+class SMTPPool:
+    """Up to `size` open SMTP connections, each reused for `max_messages` sends.
+
+    send() blocks, so it is called from `size` worker threads; a connection
+    that drops is reopened once before the message counts as failed.
+    STARTTLS is used whenever the server offers it.
+    """
+
+    def __init__(self, host, port=587, username=None, password=None, size=4, max_messages=100, timeout=30):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.max_messages = max_messages
+        self.timeout = timeout
+        self._idle = queue.Queue()
+        for _ in range(size):
+            self._idle.put(None) # Opened on first use
+
+    def _open(self):
+        conn = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        conn.ehlo()
+        if conn.has_extn('starttls'):
+            conn.starttls()
+            conn.ehlo()
+        if self.username:
+            conn.login(self.username, self.password or '')
+        return [conn, 0]
+
+    def send(self, message):
+        slot = self._idle.get()
+        try:
+            for attempt in range(2):
+                if slot is None:
+                    slot = self._open()
+                try:
+                    slot[0].send_message(message)
+                    break
+                except (smtplib.SMTPServerDisconnected, ConnectionError):
+                    self._close(slot)
+                    slot = None
+                    if attempt:
+                        raise
+            slot[1] += 1
+            if slot[1] >= self.max_messages: # Servers cap messages per session
+                self._close(slot)
+                slot = None
+        except smtplib.SMTPResponseException as e:
+            if e.smtp_code == 421: # Server is closing the session
+                self._close(slot)
+                slot = None
+            raise
+        finally:
+            self._idle.put(slot)
+
+    def _close(self, slot):
+        if slot is None:
+            return
+        try:
+            slot[0].quit()
+        except (smtplib.SMTPException, OSError):
+            slot[0].close()
+
+    def close(self):
+        for _ in range(self.size):
+            self._close(self._idle.get())
+            self._idle.put(None)
+
+
+def build_message(from_address, to, subject, body):
+    message = EmailMessage()
+    message['From'] = from_address
+    message['To'] = to
+    message['Subject'] = subject
+    message.set_content(body)
+    return message
+
+
+# --- SEND LOG ---
+
+class SendLog:
+    """Outreach campaigns and every message they sent, in SQLite (WAL).
+
+    It doubles as each user's dedup list: an address that one of the user's
+    campaigns sent to, or that the server refused outright (5xx), is never
+    emailed again by that user (other customers can still reach the lead);
+    other failures are retried by the next campaign. Rows are written in small batches as
+    sends finish, so a campaign cut short resumes where it stopped.
+    """
+
+    SENT = 'sent'
+    REFUSED = 'refused' # Permanent: the recipient does not exist
+    FAILED = 'failed'
+
+    def __init__(self, path):
+        self.path = str(path)
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        conn = self._connect()
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS campaigns (
+                    id TEXT PRIMARY KEY,
+                    spec TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL
+                );
+                CREATE TABLE IF NOT EXISTS messages (
+                    campaign_id TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    email TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    error TEXT,
+                    sent_at TEXT NOT NULL,
+                    PRIMARY KEY (campaign_id, email)
+                );
+                CREATE INDEX IF NOT EXISTS idx_messages_user_done ON messages (user_id, email) WHERE status IN ('sent', 'refused');
+            """)
+        finally:
+            conn.close()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _now(self):
+        return datetime.now().strftime(TIME_FORMAT)
+
+    def start_campaign(self, campaign_id, spec):
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT INTO campaigns (id, spec, status, created_at, updated_at) VALUES (?, ?, 'running', ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET status = 'running', error = NULL, updated_at = excluded.updated_at",
+                (campaign_id, json.dumps(spec), self._now(), self._now()),
+            )
+        finally:
+            conn.close()
+
+    def finish_campaign(self, campaign_id, status, error=None):
+        conn = self._connect()
+        try:
+            conn.execute("UPDATE campaigns SET status = ?, error = ?, updated_at = ? WHERE id = ?",
+                         (status, error, self._now(), campaign_id))
+        finally:
+            conn.close()
+
+    def unfinished(self, user_id):
+        """(campaign_id, spec) of the user's campaigns still 'running': their process stopped mid-send."""
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                "SELECT id, spec FROM campaigns WHERE status = 'running' AND json_extract(spec, '$.user_id') = ? "
+                "ORDER BY created_at", (user_id,)
+            ).fetchall()
+        finally:
+            conn.close()
+        return [(campaign_id, json.loads(spec)) for campaign_id, spec in rows]
+
+    def contacted(self, user_id, emails):
+        """The subset of `emails` (lowercase) already sent to, or refused, in any of the user's campaigns."""
+        emails = list(emails)
+        found = set()
+        conn = self._connect()
+        try:
+            for i in range(0, len(emails), 900): # SQLite bound-parameter limit
+                chunk = emails[i:i + 900]
+                rows = conn.execute(
+                    f"SELECT email FROM messages WHERE user_id = ? AND status IN ('sent', 'refused') "
+                    f"AND email IN ({','.join('?' * len(chunk))})", [user_id] + chunk
+                )
+                found.update(email for (email,) in rows)
+        finally:
+            conn.close()
+        return found
+
+    def record(self, campaign_id, user_id, results):
+        """Stores (email, status, error) results in one transaction."""
+        if not results:
+            return
+        now = self._now()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("BEGIN IMMEDIATE")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO messages (campaign_id, user_id, email, status, error, sent_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    ((campaign_id, user_id, email, status, error, now) for email, status, error in results),
+                )
+        finally:
+            conn.close()
+
+
+# --- BACKGROUND CAMPAIGNS ---
+
+def campaign_key(spec):
+    """Same sender, filters and templates = same campaign (resubmitting continues it)."""
+    return hashlib.sha1(json.dumps(spec, sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+
+class OutreachJob:
+    """One campaign's progress, updated by the worker and read by the page."""
+
+    def __init__(self, key):
+        self.key = key
+        self.status = 'queued' # queued -> running -> done / failed
+        self.total = None
+        self.sent = 0
+        self.skipped = 0 # Already contacted, duplicate or missing address
+        self.failed = 0
+        self.error = None
+        self.seconds = None
+
+    @property
+    def running(self):
+        return self.status in ('queued', 'running')
+
+    @property
+    def progress(self):
+        if not self.total:
+            return 1.0 if self.status == 'done' else 0.0
+        return min((self.sent + self.skipped + self.failed) / self.total, 1.0)
+
+
+class OutreachManager:
+    """Sends templated emails to every lead matching a filter, on a background thread.
+
+    Leads are read in keyset pages of `render_batch`, filtered against the
+    send log, rendered with templates compiled once, and sent concurrently
+    over a pooled SMTP connection. Each recipient provider is held to its
+    own rate (PROVIDER_RATES); a throttled provider only holds its own
+    messages back, never a connection. At most `max_in_flight` messages are
+    rendered but unsent at any time. Campaigns run one at a time.
+    """
+
+    def __init__(self, log_path, smtp=None, from_address=None, render_batch=1000, max_in_flight=500,
+                 pool_size=4, provider_rates=None, default_rate=DEFAULT_PROVIDER_RATE, log_every=200):
+        self.log = SendLog(log_path)
+        self.smtp = smtp
+        self.from_address = from_address
+        self.render_batch = render_batch
+        self.max_in_flight = max_in_flight
+        self.pool_size = pool_size
+        self.provider_rates = PROVIDER_RATES if provider_rates is None else provider_rates
+        self.default_rate = default_rate
+        self.log_every = log_every
+        self.jobs = OrderedDict() # key -> OutreachJob, newest last
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="outreach")
+        self._resumed = set() # Users whose interrupted campaigns were requeued
+
+    def job(self, key):
+        return self.jobs.get(key)
+
+    def submit(self, query, contains, min_score, subject, body, user_id):
+        """The campaign for these filters and templates: in progress, or newly queued.
+
+        Raises ValueError if a template does not compile or is rejected by the sandbox.
+        """
+        check_template(subject)
+        check_template(body)
+        spec = {'user_id': user_id, 'contains': dict(contains or {}), 'min_score': min_score,
+                'subject': subject, 'body': body}
+        return self._submit(campaign_key(spec), query, spec)
+
+    def _submit(self, key, query, spec):
+        with self._lock:
+            job = self.jobs.get(key)
+            if job is not None and job.running:
+                return job
+            job = OutreachJob(key)
+            self._executor.submit(self._run, job, query, spec)
+            self.jobs[key] = job
+            self.jobs.move_to_end(key)
+            while len(self.jobs) > 50:
+                self.jobs.popitem(last=False)
+        return job
+
+    def resume(self, query, user_id):
+        """Requeues the user's campaigns a stopped process left unfinished (once per user and manager)."""
+        with self._lock:
+            if user_id in self._resumed or self.smtp is None:
+                return []
+            self._resumed.add(user_id)
+        return [self._submit(key, query, spec) for key, spec in self.log.unfinished(user_id)]
+
+    def _run(self, job, query, spec):
+        job.status = 'running'
+        start = time.perf_counter()
+        started = False
+        try:
+            if self.smtp is None or not self.from_address:
+                raise RuntimeError("Outreach needs the SMTP_HOST and OUTREACH_FROM settings")
+            self.log.start_campaign(job.key, spec)
+            started = True
+            asyncio.run(self._send_campaign(job, query, spec))
+            job.status = 'done'
+        except Exception as e:
+            job.error = str(e) or type(e).__name__
+            job.status = 'failed'
+        if started: # A failed campaign continues from the log when it is submitted again
+            self.log.finish_campaign(job.key, job.status, job.error)
+        job.seconds = time.perf_counter() - start
+
+    def _recipients(self, frame, seen, user_id):
+        """Rows with an address the user has not contacted yet (by the log, or earlier in this run)."""
+        emails = frame['Email'].fillna('').astype(str).str.strip()
+        keys = emails.str.lower()
+        fresh = (emails.str.contains('@', regex=False) & ~keys.duplicated()).to_numpy()
+        candidates = set(keys[fresh]) - seen
+        candidates -= self.log.contacted(user_id, candidates)
+        fresh = fresh & keys.isin(candidates).to_numpy()
+        seen.update(candidates)
+        return frame[fresh].assign(Email=emails[fresh])
+
+    async def _send_campaign(self, job, query, spec):
+        subject, body = compile_template(spec['subject']), compile_template(spec['body'])
+        pool = SMTPPool(size=self.pool_size, **self.smtp)
+        limiter = DomainRateLimiter(self.default_rate, self.provider_rates)
+        in_flight = asyncio.Semaphore(self.max_in_flight)
+        loop = asyncio.get_running_loop()
+        senders = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="smtp")
+        results = []
+        tasks = set()
+        seen = set()
+
+        async def send_one(email, subject_text, body_text):
+            try:
+                await limiter.wait(provider_of(email))
+                message = build_message(self.from_address, email, subject_text, body_text)
+                await loop.run_in_executor(senders, pool.send, message)
+                results.append((email.lower(), SendLog.SENT, None))
+                job.sent += 1
+            except smtplib.SMTPRecipientsRefused as e:
+                code, reason = next(iter(e.recipients.values()))
+                status = SendLog.REFUSED if 500 <= code < 600 else SendLog.FAILED
+                results.append((email.lower(), status, f"{code} {reason.decode(errors='replace')}"))
+                job.failed += 1
+            except (smtplib.SMTPException, OSError, ValueError) as e:
+                results.append((email.lower(), SendLog.FAILED, str(e)))
+                job.failed += 1
+            finally:
+                in_flight.release()
+
+        def flush():
+            batch = results[:]
+            del results[:len(batch)]
+            self.log.record(job.key, spec['user_id'], batch)
+
+        try:
+            for page in iter_query_chunks(query, spec['contains'], spec['min_score'], True, self.render_batch):
+                if job.total is None:
+                    job.total = page.total
+                recipients = self._recipients(page.rows, seen, spec['user_id'])
+                job.skipped += len(page.rows) - len(recipients)
+                try:
+                    rendered = render_batch(subject, body, recipients)
+                except Exception as e: # e.g. the sandbox refusing an attribute only some leads reach
+                    raise ValueError(f"Template error: {e}") from None
+                for email, subject_text, body_text in rendered:
+                    await in_flight.acquire()
+                    task = asyncio.create_task(send_one(email, subject_text, body_text))
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+                    if len(results) >= self.log_every:
+                        flush()
+        finally:
+            # Also when the campaign fails part-way: sends already handed to the
+            # pool may be delivered, so they finish and are logged, never resent
+            await asyncio.gather(*tasks, return_exceptions=True)
+            flush()
+            await loop.run_in_executor(senders, pool.close)
+            senders.shutdown()
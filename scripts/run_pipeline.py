@@ -0,0 +1,228 @@
+import argparse
+import glob
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+import yaml
+
+from lead_storage import read_raw, write_raw
+
+# Usage (from the repo root):
+#   python scripts/run_pipeline.py --plan 4         # read the orders and schedule the run once (CI plan job)
+#   python scripts/run_pipeline.py --shard 0/4      # scrape one shard of that plan (one CI matrix job)
+#   python scripts/run_pipeline.py --merge 4        # record fulfillment, combine the 4 shard outputs, then verify
+#   python scripts/run_pipeline.py --workers 4      # local: plan, all shards in a process pool, then merge
+# Extra arguments after -- are passed to clean_verify.py (e.g. -- --stream).
+
+# --- Load Configuration ---
+try:
+    with open('config/config.yaml', 'r') as f:
+        config = yaml.safe_load(f)
+except FileNotFoundError:
+    print("Error: config/config.yaml not found.")
+    exit(1)
+
+SHARD_DIR = config['PIPELINE']['SHARD_DIR']
+RAW_OUTPUT_PATH = 'data/raw/latest_raw_scrape.parquet'
+PLAN_PATH = os.path.join(SHARD_DIR, 'plan.json')
+VERIFY_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'clean_verify.py')
+
+
+# --- SHARDING ---
+
+def shard_of(target, num_shards):
+    """Stable shard for a (niche, city) target: the same on every run, machine and process.
+
+    (Python's hash() is salted per process, so it cannot be used here.)
+    """
+    key = f"{target['niche']}|{target['city']}".strip().lower().encode()
+    return int.from_bytes(hashlib.sha1(key).digest()[:8], 'big') % num_shards
+
+
+def shard_targets(targets, shard_index, num_shards):
+    """(plan index, target) pairs of this shard. Every target, local-queue orders included, comes
+    from the one plan, so no two shards scrape the same order.
+    """
+    return [(i, t) for i, t in enumerate(targets) if shard_of(t, num_shards) == shard_index]
+
+
+def shard_path(shard_index, num_shards, ext='parquet'):
+    return os.path.join(SHARD_DIR, f"shard-{shard_index}-of-{num_shards}.{ext}")
+
+
+def parse_shard(value):
+    """'2/4' -> (2, 4)."""
+    index, total = (int(x) for x in value.split('/'))
+    if not 0 <= index < total:
+        raise argparse.ArgumentTypeError(f"shard index must be in 0..{total - 1}: {value}")
+    return index, total
+
+
+def clear_shard_dir():
+    """Removes an earlier run's plan and shard outputs, so they are never merged again."""
+    for path in glob.glob(os.path.join(SHARD_DIR, '*.parquet')) + glob.glob(os.path.join(SHARD_DIR, '*.json')):
+        os.remove(path)
+
+
+# --- STAGES ---
+
+def plan_run(num_shards):
+    """Reads the orders and splits the run budget once, for every shard; writes the plan to PLAN_PATH.
+
+    Returns (plan, RunOrders). Side effects of planning (claims, releases of
+    deferred local orders) happen here only, never in the shards.
+    """
+    from scrape_sources import get_scraping_targets
+
+    targets, orders = get_scraping_targets()
+    plan = {'num_shards': num_shards, 'targets': targets, 'from_inventory': orders.from_inventory}
+    clear_shard_dir()
+    os.makedirs(SHARD_DIR, exist_ok=True)
+    with open(PLAN_PATH, 'w') as f:
+        json.dump(plan, f, default=str) # Order timestamps may be datetimes
+    print(f"Planned {len(targets)} targets across {num_shards} shards -> {PLAN_PATH}")
+    return plan, orders
+
+
+def load_plan(num_shards):
+    """The plan written by --plan for `num_shards` shards (None if missing or for another shard count)."""
+    try:
+        with open(PLAN_PATH) as f:
+            plan = json.load(f)
+    except FileNotFoundError:
+        return None
+    return plan if plan['num_shards'] == num_shards else None
+
+
+def run_shard(shard_index, num_shards, targets):
+    """Scrapes this shard's slice of the planned `targets` into its own raw file.
+
+    No order bookkeeping here: the counts (plan index -> leads scraped, None
+    = failed) are returned and written next to the raw file, and recorded
+    once for the whole run (record_run).
+    """
+    from scrape_sources import scrape_and_save
+
+    start = time.perf_counter()
+    output_path = shard_path(shard_index, num_shards)
+    indexed = shard_targets(targets, shard_index, num_shards)
+    print(f"[shard {shard_index}/{num_shards}] {len(indexed)} targets")
+
+    counts = scrape_and_save([t for _, t in indexed], output_path=output_path) if indexed else []
+    total = sum(c or 0 for c in counts)
+    if total == 0:
+        # Always leave a file so the merge can tell "empty shard" from "missing shard"
+        write_raw(pd.DataFrame(), output_path)
+    with open(shard_path(shard_index, num_shards, 'json'), 'w') as f:
+        json.dump([[i, count] for (i, _), count in zip(indexed, counts)], f)
+    print(f"[shard {shard_index}/{num_shards}] {total} raw leads in {time.perf_counter() - start:.1f}s -> {output_path}")
+    return {i: count for (i, _), count in zip(indexed, counts)}
+
+
+def read_shard_counts(num_shards):
+    """Plan index -> leads scraped, from every shard that reported (a missing shard's targets count as failed)."""
+    counts = {}
+    for shard_index in range(num_shards):
+        try:
+            with open(shard_path(shard_index, num_shards, 'json')) as f:
+                counts.update({i: count for i, count in json.load(f)})
+        except FileNotFoundError:
+            pass
+    return counts
+
+
+def record_run(plan, counts, orders=None):
+    """Order bookkeeping for the whole sharded run, once: one status write for every shard's orders.
+
+    `orders` is the planner's RunOrders when planning ran in this process;
+    otherwise the order sheet is opened again.
+    """
+    from scrape_sources import record_fulfillment, reopen_orders
+
+    if orders is None:
+        orders = reopen_orders(plan['from_inventory'])
+    record_fulfillment(orders, plan['targets'], [counts.get(i) for i in range(len(plan['targets']))])
+
+
+def merge_shards(num_shards):
+    """Combines the shard outputs into the raw file clean_verify.py reads; returns the row count."""
+    frames = []
+    for shard_index in range(num_shards):
+        path = shard_path(shard_index, num_shards)
+        if not os.path.exists(path):
+            print(f"Warning: shard {shard_index}/{num_shards} output missing ({path}); merging the rest.")
+            continue
+        frames.append(read_raw(path))
+
+    stale = set(glob.glob(os.path.join(SHARD_DIR, '*.parquet'))) - {shard_path(i, num_shards) for i in range(num_shards)}
+    if stale:
+        print(f"Warning: ignoring {len(stale)} shard files from a different shard count.")
+
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        print("No data was generated by any shard.")
+        return 0
+    df_combined_raw = pd.concat(frames, ignore_index=True)
+    write_raw(df_combined_raw, RAW_OUTPUT_PATH)
+    print(f"Merged {len(frames)} shard outputs: {len(df_combined_raw)} raw leads -> {RAW_OUTPUT_PATH}")
+    return len(df_combined_raw)
+
+
+def verify(extra_args):
+    subprocess.run([sys.executable, VERIFY_SCRIPT] + extra_args, check=True)
+
+
+# --------------------------------------------------
+# MAIN WORKFLOW EXECUTION
+# --------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sharded scrape + verify pipeline runner.")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--plan', type=int, metavar='N', help="Read the orders and schedule the run once for N shards")
+    mode.add_argument('--shard', type=parse_shard, help="Scrape only shard i of N of the plan, e.g. 0/4")
+    mode.add_argument('--merge', type=int, metavar='N', help="Record fulfillment, merge the outputs of N shards, then verify")
+    mode.add_argument('--workers', type=int, metavar='N', help="Plan, run N shards in a local process pool, then merge and verify")
+    parser.add_argument('verify_args', nargs=argparse.REMAINDER, help="Arguments for clean_verify.py (after --)")
+    args = parser.parse_args()
+    verify_args = [a for a in args.verify_args if a != '--']
+
+    if args.plan:
+        plan_run(args.plan)
+        exit(0)
+
+    if args.shard:
+        plan = load_plan(args.shard[1])
+        if plan is None:
+            print(f"Error: no plan for {args.shard[1]} shards in {PLAN_PATH}; run --plan {args.shard[1]} first.")
+            exit(1)
+        run_shard(*args.shard, plan['targets'])
+        exit(0)
+
+    if args.workers:
+        num_shards = args.workers
+        plan, orders = plan_run(num_shards)
+        start = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=num_shards) as pool:
+            results = list(pool.map(run_shard, range(num_shards), [num_shards] * num_shards, [plan['targets']] * num_shards))
+        counts = {i: count for result in results for i, count in result.items()}
+        print(f"Scraped {sum(c or 0 for c in counts.values())} raw leads across {num_shards} shards in {time.perf_counter() - start:.1f}s")
+        record_run(plan, counts, orders)
+    else:
+        num_shards = args.merge
+        plan = load_plan(num_shards)
+        if plan is None:
+            print(f"Warning: no plan for {num_shards} shards in {PLAN_PATH}; order statuses are not updated.")
+        else:
+            record_run(plan, read_shard_counts(num_shards))
+
+    if merge_shards(num_shards) == 0:
+        exit(0)
+    verify(verify_args)
+    exit(0)
@@ -0,0 +1,154 @@
+import fcntl
+import hashlib
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+
+class ScrapeCache:
+    """Persistent on-disk cache of scraped pages, keyed by source_url.
+
+    Each entry stores the page's content hash, its ETag / Last-Modified
+    validators and when it was last fetched, plus the lead rows extracted from
+    it. Entries stay fresh for a per-niche TTL; a fresh entry is served without
+    fetching, and a refetch whose content hash is unchanged reuses the stored rows.
+
+    A fresh hit re-emits the rows exactly as stored, so their scraped_date is
+    when the page was actually fetched, not the current run; the inventory's
+    freshness checks (order_scheduler) rely on that. A refetch or revalidation
+    that confirms the content stamps the reused rows with the new fetch time.
+    """
+
+    def __init__(self, cache_dir, default_ttl_hours, niche_ttl_hours=None):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self.pages_dir = os.path.join(cache_dir, 'pages')
+        self.default_ttl = default_ttl_hours * 3600
+        self.niche_ttl = {niche.lower(): hours * 3600 for niche, hours in (niche_ttl_hours or {}).items()}
+
+        self._lock = threading.Lock() # Targets are scraped from worker threads
+        self.entries = self._load_index()
+        self.stats = {'hits': 0, 'unchanged': 0, 'misses': 0}
+
+    @classmethod
+    def from_config(cls, cache_config):
+        return cls(
+            cache_dir=cache_config['DIR'],
+            default_ttl_hours=cache_config['DEFAULT_TTL_HOURS'],
+            niche_ttl_hours=cache_config.get('NICHE_TTL_HOURS'),
+        )
+
+    # --- PERSISTENCE ---
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save(self):
+        """Writes the index atomically so an interrupted run never leaves it half-written.
+        
+        Entries saved meanwhile by other processes (pipeline shards sharing the
+        cache dir) are merged in under a file lock rather than overwritten.
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.index_path + f'.{os.getpid()}.tmp'
+        with open(self.index_path + '.lock', 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            with self._lock:
+                entries = self._load_index()
+                entries.update(self.entries)
+                self.entries = entries
+                with open(tmp_path, 'w') as f:
+                    json.dump(entries, f)
+            os.replace(tmp_path, self.index_path)
+
+    def _rows_path(self, source_url):
+        return os.path.join(self.pages_dir, hashlib.sha1(source_url.encode()).hexdigest() + '.csv')
+
+    # --- LOOKUPS ---
+
+    def ttl_for(self, niche):
+        return self.niche_ttl.get(str(niche).lower(), self.default_ttl)
+
+    def lookup(self, source_url, niche, now=None):
+        """Returns the cached rows if the entry is still within its niche TTL, else None."""
+        now = now or time.time()
+        with self._lock:
+            entry = self.entries.get(source_url)
+            if not (entry and now - entry['fetched_at'] < self.ttl_for(niche) and os.path.exists(self._rows_path(source_url))):
+                return None
+            self.stats['hits'] += 1
+        return pd.read_csv(self._rows_path(source_url))
+
+    def conditional_headers(self, source_url):
+        """HTTP validators for a conditional refetch (If-None-Match / If-Modified-Since)."""
+        entry = self.entries.get(source_url) or {}
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    # --- UPDATES ---
+
+    def revalidate(self, source_url):
+        """Marks an entry as fetched now (e.g. after a 304) and returns its stored rows."""
+        with self._lock:
+            fetched_at = time.time()
+            self.entries[source_url]['fetched_at'] = fetched_at
+            self.stats['unchanged'] += 1
+        rows = pd.read_csv(self._rows_path(source_url))
+        rows['scraped_date'] = datetime.fromtimestamp(fetched_at).strftime('%Y-%m-%d %H:%M:%S')
+        return rows
+
+    def store(self, source_url, niche, rows, content_hash, etag=None, last_modified=None):
+        """Records a fresh fetch. Returns the rows to use: the stored ones if the content is unchanged."""
+        previous = self.entries.get(source_url)
+        unchanged = (
+            previous is not None
+            and previous['content_hash'] == content_hash
+            and os.path.exists(self._rows_path(source_url))
+        )
+
+        if not unchanged:
+            os.makedirs(self.pages_dir, exist_ok=True)
+            rows.to_csv(self._rows_path(source_url), index=False)
+
+        with self._lock:
+            self.entries[source_url] = {
+                'niche': niche,
+                'content_hash': content_hash,
+                'etag': etag,
+                'last_modified': last_modified,
+                'fetched_at': time.time(),
+            }
+            self.stats['unchanged' if unchanged else 'misses'] += 1
+
+        if not unchanged:
+            return rows
+        stored = pd.read_csv(self._rows_path(source_url))
+        stored['scraped_date'] = rows['scraped_date'].to_numpy() # Same content, fetched this run
+        return stored
+
+    @staticmethod
+    def content_hash(content):
+        if isinstance(content, str):
+            content = content.encode()
+        return hashlib.sha256(content).hexdigest()
+
+    def summary(self):
+        total = sum(self.stats.values())
+        served = self.stats['hits'] + self.stats['unchanged']
+        rate = served / total if total else 0.0
+        return (
+            f"Scrape cache: {self.stats['hits']} fresh hits, {self.stats['unchanged']} unchanged, "
+            f"{self.stats['misses']} misses ({rate:.0%} served from cache)"
+        )
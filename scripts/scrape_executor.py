@@ -0,0 +1,75 @@
+import asyncio
+import time
+
+
+# --- RATE LIMITING ---
+
+class DomainRateLimiter:
+    """Spaces out requests so no single domain sees more than `rate` requests/second.
+
+    `rates` overrides the rate for specific domains (0 = unlimited).
+    """
+
+    def __init__(self, rate, rates=None):
+        self.interval = 1.0 / rate if rate else 0.0
+        self.intervals = {domain: 1.0 / r if r else 0.0 for domain, r in (rates or {}).items()}
+        self._next_slot = {}
+
+    async def wait(self, domain):
+        interval = self.intervals.get(domain, self.interval)
+        if not interval:
+            return
+
+        # Reserve the next free slot for this domain (no await in between, so this is race-free)
+        now = time.monotonic()
+        slot = max(now, self._next_slot.get(domain, now))
+        self._next_slot[domain] = slot + interval
+
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+# --- LEAD ID ALLOCATION ---
+
+def assign_lead_offsets(targets, block_size):
+    """First lead ID of each target's block, fixed per (niche, city) listing.
+
+    The block depends only on the listing (stable_seed of niche and city),
+    not on completion order or the target's place in this run, so a business
+    at a given listing position keeps its lead ID on every run. Targets of
+    the same listing share its block; IDs within it are listing positions,
+    which must stay below `block_size`.
+    """
+    from mock_data import stable_seed
+    blocks = (2 ** 63 - 1) // block_size # Largest ID still fits in an int64
+    return [stable_seed(t['niche'], t['city']) % blocks * block_size for t in targets]
+
+
+def target_domain(target, default_domain):
+    """Domain used as the rate-limit key for a target."""
+    return target.get('domain') or default_domain
+
+
+# --- EXECUTOR ---
+
+async def run_targets(targets, scrape_fn, max_concurrency, per_domain_rps, lead_id_block, default_domain):
+    """Runs `scrape_fn(target, offset)` for every target concurrently.
+
+    At most `max_concurrency` targets are in flight at once, and each domain is
+    throttled to `per_domain_rps`. Results come back in target order; a target
+    that raised is reported and returned as None so the rest of the run survives.
+    """
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+    limiter = DomainRateLimiter(per_domain_rps)
+    offsets = assign_lead_offsets(targets, lead_id_block)
+
+    async def run_one(target, offset):
+        async with semaphore:
+            await limiter.wait(target_domain(target, default_domain))
+            try:
+                return await scrape_fn(target, offset)
+            except Exception as e:
+                print(f"ERROR: Scrape failed for {target['niche']} in {target['city']}: {e}")
+                return None
+
+    return await asyncio.gather(*(run_one(t, o) for t, o in zip(targets, offsets)))
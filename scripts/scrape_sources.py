@@ -1,11 +1,23 @@
 import pandas as pd
+import numpy as np
 import time
-import random
 import yaml
 import os
-from datetime import datetime
 import gspread # CRITICAL: GSheets library
 import json # CRITICAL: JSON handling for the secret
+import asyncio
+from collections import namedtuple
+from urllib.parse import quote_plus
+from scrape_executor import run_targets
+from browser_pool import BrowserPool
+from scrape_cache import ScrapeCache
+from sheets_client import with_backoff, read_columns, batch_update_rows, batch_update_status
+from lead_storage import write_raw
+from order_queue import OrderQueue
+from order_scheduler import OrderScheduler, MaintenanceCursor, fresh_inventory
+from lead_scoring import LeadScorer
+from mock_data import generate_leads, stable_seed
+from metrics import METRICS
 
 # --- CONFIGURATION & PATHS ---
 try:
@@ -15,172 +27,426 @@ except FileNotFoundError:
     print("Error: config/config.yaml not found.")
     exit(1)
 
+# Span timers / counters (no-ops unless METRICS is enabled)
+METRICS.configure(config['METRICS'], 'scrape')
+
 # Paths for the workflow
-RAW_OUTPUT_PATH = 'data/raw/latest_raw_scrape.csv'
+RAW_OUTPUT_PATH = 'data/raw/latest_raw_scrape.parquet'
+VERIFIED_DATASET_PATH = 'data/verified/leads' # Read for segment freshness only
+
+# Mock scraper output (scripts/mock_data.py generates the rows)
+MOCK_DATA_CONFIG = config['MOCK_DATA']
+
+# Concurrency settings for the async executor
+EXECUTOR_CONFIG = config['EXECUTOR']
+
+# Persistent per-source_url cache (None when disabled)
+SCRAPE_CACHE = ScrapeCache.from_config(config['SCRAPE_CACHE']) if config['SCRAPE_CACHE']['ENABLED'] else None
 
 # --- GSheets Connection Details for GitHub Actions ---
 GSPREAD_SERVICE_ACCOUNT_JSON = os.environ.get("GSPREAD_SERVICE_ACCOUNT")
 GSPREAD_SHEET_NAME = "Micro Lead Custom Orders"
+ORDER_COLUMNS = ['niche', 'location', 'max_count', 'status'] # Only these are read from the sheet
+OPTIONAL_ORDER_COLUMNS = ['timestamp', 'priority', 'fulfilled'] # Also read when the sheet has them
+
+# Local alternative to the sheet: orders are claimed atomically, so several workers can share it
+ORDER_QUEUE_CONFIG = config['ORDER_QUEUE']
+ORDER_QUEUE = OrderQueue.from_config(ORDER_QUEUE_CONFIG) if ORDER_QUEUE_CONFIG['SOURCE'] == 'local' else None
+
+# Enrichment between scraping and verification: Lead Score / Reason to Contact / Attribute
+SCORER = LeadScorer.from_config(config['LEAD_SCORING'])
+
+# Splits MAX_LEADS_PER_RUN across the maintenance target and pending orders
+SCHEDULER_CONFIG = config['SCHEDULER']
+SCHEDULER = OrderScheduler.from_config(SCHEDULER_CONFIG, config['SCRAPING_CONFIG']['MAX_LEADS_PER_RUN'])
+MAINTENANCE_CURSOR = MaintenanceCursor(SCHEDULER_CONFIG['MAINTENANCE_CURSOR_PATH'])
 # ---------------------------------------------------
 
 
 # --- TARGET MANAGEMENT ---
 
-def get_scraping_targets():
-    """Reads the order queue from GSheets and prepares a list of pending scrape targets."""
-    targets = []
-    worksheet = None # Initialize worksheet object
-
-    # 1. Add Default Target (Maintenance run - always added first)
-    targets.append({
-        'niche': config['SCRAPING_CONFIG']['PRIMARY_NICHE'],
-        'city': config['SCRAPING_CONFIG']['PRIMARY_CITY'],
-        'max_count': 50,
-        'order_status_index': -1 
-    })
-
-    # 2. Read Custom Orders from GSheets
-    if GSPREAD_SERVICE_ACCOUNT_JSON:
-        try:
-            # Authenticate using the secret
-            service_account_json = json.loads(GSPREAD_SERVICE_ACCOUNT_JSON)
-            gc = gspread.service_account_from_dict(service_account_json)
-            worksheet = gc.open(GSPREAD_SHEET_NAME).sheet1
-            
-            # Get all data as a list of dictionaries (Pandas-compatible)
-            # This data includes the header row, so the index starts at 0 for data rows
-            df_orders = pd.DataFrame(worksheet.get_all_records())
-            
-            # Filter for PENDING orders only
-            pending_orders = df_orders[df_orders['status'] == 'PENDING_SCRAPE']
-            
-            for index, row in pending_orders.iterrows():
-                targets.append({
-                    'niche': row['niche'],
-                    'city': row['location'],
-                    'max_count': row['max_count'],
-                    # The index here is the Pandas DataFrame index
-                    'order_status_index': index 
-                })
-            
-            # Return targets, the full DataFrame, and the worksheet object
-            return targets, df_orders, worksheet
+# Where this run's orders came from, and the bookkeeping still owed at its end.
+# `worksheet`/`header` are the order sheet and its header row (None for the
+# local queue or without credentials); `from_inventory` orders are covered by
+# fresh verified leads and are completed in the same write as the scraped ones.
+RunOrders = namedtuple('RunOrders', ['worksheet', 'header', 'from_inventory'])
+
+
+def open_order_sheet():
+    """The custom-order worksheet and its header row, or (None, None) without credentials."""
+    if not GSPREAD_SERVICE_ACCOUNT_JSON:
+        return None, None
+    # Authenticate using the secret
+    service_account_json = json.loads(GSPREAD_SERVICE_ACCOUNT_JSON)
+    gc = gspread.service_account_from_dict(service_account_json)
+    worksheet = gc.open(GSPREAD_SHEET_NAME).sheet1
+    return worksheet, with_backoff(worksheet.row_values, 1)
+
+
+def reopen_orders(from_inventory):
+    """RunOrders for bookkeeping in a process other than the one that read the orders (a sharded run's merge)."""
+    if ORDER_QUEUE is not None:
+        return RunOrders(None, None, from_inventory)
+    try:
+        worksheet, header = open_order_sheet()
+    except Exception as e:
+        print(f"FATAL: GSheets API Read Failed. Ensure key is valid and sheet is shared. Error: {e}")
+        worksheet, header = None, None
+    return RunOrders(worksheet, header, from_inventory)
+
+
+def read_pending_orders():
+    """Reads PENDING_SCRAPE orders from the order queue (GSheets, or the local queue) as order targets.
+
+    Returns (orders, worksheet, header); orders keep queue order.
+    """
+    orders = []
+
+    # Claim Custom Orders from the local queue (no other worker gets the same orders)
+    if ORDER_QUEUE is not None:
+        ORDER_QUEUE.requeue_stale(ORDER_QUEUE_CONFIG['CLAIM_TIMEOUT_MINUTES'])
+        df_orders = ORDER_QUEUE.claim(limit=ORDER_QUEUE_CONFIG['CLAIM_LIMIT'])
+        for index, row in df_orders.iterrows():
+            orders.append({
+                'niche': row['niche'],
+                'city': row['location'],
+                'max_count': int(row['max_count']),
+                'order_status_index': index,
+                'order_id': int(row['id']),
+                'timestamp': row['timestamp'],
+                'priority': int(row['priority']),
+                'fulfilled': int(row['fulfilled']),
+            })
+        print(f"Claimed {len(df_orders)} pending orders from the local order queue.")
+        return orders, None, None
+
+    # Read Custom Orders from GSheets
+    try:
+        worksheet, header = open_order_sheet()
+        if worksheet is None:
+            return orders, None, None
+        
+        # The header (read with the sheet), then only the columns we need: 2 API calls total
+        # Row i of the DataFrame is sheet row i + 2 (1-based, plus header row)
+        columns = ORDER_COLUMNS + [c for c in OPTIONAL_ORDER_COLUMNS if c in header]
+        df_orders = pd.DataFrame(read_columns(worksheet, header, columns))
+        if df_orders.empty:
+            return orders, worksheet, header
+        for col in ['max_count', 'priority', 'fulfilled']:
+            values = df_orders[col] if col in df_orders.columns else pd.Series(0, index=df_orders.index)
+            df_orders[col] = pd.to_numeric(values, errors='coerce').fillna(0).astype(int)
+        
+        # Filter for PENDING orders only
+        pending_orders = df_orders[df_orders['status'] == 'PENDING_SCRAPE']
+        
+        for index, row in pending_orders.iterrows():
+            orders.append({
+                'niche': row['niche'],
+                'city': row['location'],
+                'max_count': int(row['max_count']),
+                # The index here is the Pandas DataFrame index
+                'order_status_index': index,
+                'timestamp': row.get('timestamp'),
+                'priority': int(row['priority']),
+                'fulfilled': int(row['fulfilled']),
+            })
         
-        except Exception as e:
-            print(f"FATAL: GSheets API Read Failed. Ensure key is valid and sheet is shared. Error: {e}")
-            return targets, pd.DataFrame(), None
+        # Return orders plus the worksheet and header the status write reuses
+        return orders, worksheet, header
     
-    return targets, pd.DataFrame(), None
+    except Exception as e:
+        print(f"FATAL: GSheets API Read Failed. Ensure key is valid and sheet is shared. Error: {e}")
+        return orders, None, None
+
+
+def get_scraping_targets():
+    """This run's scrape targets: the maintenance target and pending orders, scheduled within MAX_LEADS_PER_RUN.
+    
+    Returns (targets, RunOrders). Orders already covered by fresh verified
+    leads are completed by record_fulfillment, together with the scraped
+    ones; local orders left out of this run are handed back to the queue.
+    """
+    niche, city = config['SCRAPING_CONFIG']['PRIMARY_NICHE'], config['SCRAPING_CONFIG']['PRIMARY_CITY']
+    maintenance = {
+        'niche': niche,
+        'city': city,
+        'max_count': SCHEDULER.maintenance_leads,
+        'start': MAINTENANCE_CURSOR.start(niche, city), # Next page of the listing, not the same leads again
+        'order_status_index': -1
+    }
+    orders, worksheet, header = read_pending_orders()
+    
+    plan = SCHEDULER.plan(maintenance, orders, fresh_inventory(VERIFIED_DATASET_PATH, SCHEDULER_CONFIG['FRESH_HOURS']))
+    print(SCHEDULER.summary(plan))
+    METRICS.inc('orders_scheduled', len(plan.targets) - sum(t['order_status_index'] == -1 for t in plan.targets), result='scraped')
+    METRICS.inc('orders_scheduled', len(plan.from_inventory), result='from_inventory')
+    METRICS.inc('orders_scheduled', len(plan.deferred), result='deferred')
+    
+    if ORDER_QUEUE is not None and plan.deferred:
+        ORDER_QUEUE.release([order['order_id'] for order in plan.deferred])
+    return plan.targets, RunOrders(worksheet, header, plan.from_inventory)
 
 
 def update_order_status(worksheet, df_orders, targets_to_update, status):
-    """Updates the status of processed orders in the Google Sheet (CRITICAL)."""
+    """Updates the status of processed orders in the Google Sheet or local queue (CRITICAL)."""
+    
+    if ORDER_QUEUE is not None:
+        updated = ORDER_QUEUE.set_status([target['order_id'] for target in targets_to_update], status)
+        print(f"Successfully updated {updated} order statuses to {status} in the local order queue.")
+        return
     
     if worksheet is None or df_orders.empty:
         print("Warning: Skipping status update (No worksheet or empty orders).")
         return
         
     try:
-        # Get the header row to find column index
-        header = worksheet.row_values(1)
-        status_col_index = header.index('status') + 1 # GSheets is 1-indexed
-
-        for target in targets_to_update:
-            # The row number is the Pandas index + 2 (1 for 1-based, 1 for header row)
-            row_number = target['order_status_index'] + 2
-            
-            # Update the cell (row, column, value)
-            worksheet.update_cell(row_number, status_col_index, status)
+        # The row number is the Pandas index + 2 (1 for 1-based, 1 for header row)
+        row_numbers = [target['order_status_index'] + 2 for target in targets_to_update]
+        
+        # One batch_update for every row (contiguous rows share a range), with a last_updated stamp
+        updated = batch_update_status(worksheet, row_numbers, status)
                 
-        print(f"Successfully updated {len(targets_to_update)} order statuses to {status} in Google Sheets.")
+        print(f"Successfully updated {updated} order statuses to {status} in Google Sheets.")
         
     except Exception as e:
         print(f"FATAL: GSheets status update failed: {e}")
 
 
+def save_fulfillment(orders, updates):
+    """Stores (order target, leads fulfilled, status) updates in the local queue or the sheet.
+    
+    In the sheet, status, `fulfilled` and `last_updated` of every order are
+    written in one batch_update, using the header read with the orders.
+    """
+    if not updates:
+        return
+    
+    if ORDER_QUEUE is not None:
+        updated = ORDER_QUEUE.record_fulfillment([(target['order_id'], fulfilled, status) for target, fulfilled, status in updates])
+        print(f"Recorded fulfillment for {updated} orders in the local order queue.")
+        return
+    
+    if orders.worksheet is None:
+        print("Warning: Skipping status update (No worksheet).")
+        return
+    try:
+        # Progress of partly fulfilled orders lives in a 'fulfilled' column (created on first use)
+        rows = {target['order_status_index'] + 2: {'status': status, 'fulfilled': fulfilled} for target, fulfilled, status in updates}
+        updated = batch_update_rows(orders.worksheet, rows, header=orders.header)
+        print(f"Successfully updated {updated} order statuses in Google Sheets.")
+    except Exception as e:
+        print(f"FATAL: GSheets status update failed: {e}")
+
+
+def record_fulfillment(orders, targets, counts):
+    """Order bookkeeping after a scrape; `counts` holds the leads scraped per target (None = failed).
+    
+    Progress counts scraped listing rows, before validation and dedup (the
+    verifier runs later, often in another process), so a complete order can
+    hold fewer verified leads than it asked for. An order is complete once
+    that many rows were scraped for it, or when its listing ran out (fewer
+    leads than its share came back). Otherwise it goes back to
+    PENDING_SCRAPE with its progress saved, and the next run continues from
+    there. Orders covered by fresh inventory (`orders.from_inventory`)
+    complete in the same write. Failed local orders are released unchanged.
+    The maintenance target's listing position moves on the same way.
+    """
+    updates = [(order, order['max_count'], 'SCRAPE_COMPLETE') for order in orders.from_inventory]
+    failed = []
+    for target, count in zip(targets, counts):
+        if target['order_status_index'] == -1:
+            if count is not None:
+                MAINTENANCE_CURSOR.advance(target, count)
+            continue
+        if count is None:
+            failed.append(target)
+            continue
+        fulfilled = target.get('start', 0) + count
+        complete = fulfilled >= target.get('ordered', target['max_count']) or count < target['max_count']
+        updates.append((target, fulfilled, 'SCRAPE_COMPLETE' if complete else 'PENDING_SCRAPE'))
+    
+    partial = sum(status == 'PENDING_SCRAPE' for _, _, status in updates)
+    if updates:
+        print(f"Orders: {len(updates) - partial} complete ({len(orders.from_inventory)} from inventory), "
+              f"{partial} partly fulfilled (continued next run).")
+    save_fulfillment(orders, updates)
+    
+    # Claimed local orders that were not fulfilled go back to the queue
+    if ORDER_QUEUE is not None and failed:
+        ORDER_QUEUE.release([target['order_id'] for target in failed])
+        print(f"Released {len(failed)} unfulfilled orders back to PENDING_SCRAPE.")
+
+
 # --- SCRAPING FUNCTION (Remains the same as the stable version) ---
 def execute_scrape(target, scrape_count_offset):
-    """MOCK: Generates data using the exact schema the Verifier expects."""
+    """MOCK: Generates data using the exact schema the Verifier expects.
+    
+    Each (niche, city) has a seeded listing of LISTING_SIZE businesses; a
+    target scrapes up to `max_count` of them from position `start`, so it
+    yields the same leads on every run and machine, and an order continued
+    over several runs gets new leads each time until the listing runs out.
+    Lead IDs are the listing's ID block (`scrape_count_offset`, see
+    assign_lead_offsets) plus the listing position.
+    """
     niche = target['niche']
     city = target['city']
     max_count = target['max_count']
+    start = target.get('start', 0)
     
-    seed = (hash(niche) + hash(city)) % 1000
-    random.seed(seed)
-    
-    count_scraped = min(random.randint(max_count // 5, max_count // 2), 50)
-    
-    print(f"--- SCRAPING TARGET: {niche} in {city} (Scraping {count_scraped} leads) ---")
+    rng = np.random.default_rng(stable_seed(niche, city))
+    listing_size = int(rng.integers(MOCK_DATA_CONFIG['LISTING_SIZE'][0], MOCK_DATA_CONFIG['LISTING_SIZE'][1] + 1))
+    count_scraped = max(min(max_count, listing_size - start), 0)
+    if start + count_scraped > EXECUTOR_CONFIG['LEAD_ID_BLOCK']:
+        # Lead IDs are block start + listing position; past the block they would collide with another listing's
+        raise ValueError(f"listing position {start + count_scraped} is beyond LEAD_ID_BLOCK ({EXECUTOR_CONFIG['LEAD_ID_BLOCK']})")
     
-    scraped_leads = []
-    for i in range(count_scraped): 
-        
-        # CRITICAL FIX: Use the exact capitalized column names
-        scraped_leads.append({
-            'Business Name': f"{niche.title().split()[0]} Lead {scrape_count_offset + i}",
-            'Niche': niche,                        
-            'City': city,                   
-            'Phone': f"+1 {random.randint(100, 999)}-{random.randint(100, 999)}-{random.randint(1000, 9999)}",     
-            'Email': f"test_lead_{scrape_count_offset + i}@{city.lower().replace(' ', '')}.com", 
-            
-            # ENRICHMENT COLUMNS (MOCKING them here)
-            'Lead Score': random.randint(65, 95),
-            'Reason to Contact': random.choice(['New Business in Your Area', 'No Website', 'High Conversion Potential']),
-            'Attribute': random.choice(['New Businesses', 'No Website', 'High Conversion']), 
-            
-            'source_url': f"http://source.com/lead_{scrape_count_offset + i}",
-            'scraped_date': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        })
-
-    return pd.DataFrame(scraped_leads)
+    print(f"--- SCRAPING TARGET: {niche} in {city} (Scraping {count_scraped} leads from #{start}) ---")
+    return generate_leads(
+        count_scraped, [niche], [city], seed=stable_seed(niche, city, 'leads', start), id_offset=scrape_count_offset + start,
+        duplicate_rate=MOCK_DATA_CONFIG['DUPLICATE_RATE'], invalid_rate=MOCK_DATA_CONFIG['INVALID_RATE'],
+    )
+
+
+def listing_url(target):
+    """Source URL of the slice of a listing a target scrapes (the cache key).
+
+    The slice (start/limit) is part of the URL even for an explicit
+    `source_url`, so an order for more leads than a recent scrape of the
+    same segment never gets that smaller scrape from the cache.
+    """
+    if target.get('source_url'):
+        base = target['source_url']
+    else:
+        domain = target.get('domain') or EXECUTOR_CONFIG['DEFAULT_DOMAIN']
+        base = f"http://{domain}/search?niche={quote_plus(target['niche'])}&city={quote_plus(target['city'])}"
+    return f"{base}{'&' if '?' in base else '?'}start={target.get('start', 0)}&limit={target['max_count']}"
+
+
+def scrape_target_cached(target, scrape_count_offset):
+    """Serves a target from the scrape cache while fresh; otherwise scrapes and fingerprints it."""
+    with METRICS.span('scrape_target', niche=target['niche'], city=target['city']) as span:
+        if SCRAPE_CACHE is None:
+            df = execute_scrape(target, scrape_count_offset)
+            source = 'scrape'
+        else:
+            url = listing_url(target)
+            df = SCRAPE_CACHE.lookup(url, target['niche'])
+            source = 'cache'
+            if df is not None:
+                print(f"--- CACHE HIT: {target['niche']} in {target['city']} ({len(df)} leads) ---")
+            else:
+                df_scraped = execute_scrape(target, scrape_count_offset)
+                # Fingerprint the page content only; scraped_date changes on every run
+                content = df_scraped.drop(columns=['scraped_date']).to_csv(index=False)
+                df = SCRAPE_CACHE.store(url, target['niche'], df_scraped, ScrapeCache.content_hash(content))
+                source = 'scrape'
+        span.set(rows=len(df), source=source)
+        METRICS.inc('leads_scraped', len(df), source=source)
+        return df
+
+
+async def scrape_target_async(target, scrape_count_offset):
+    """Async wrapper so the blocking scrape runs off the event loop."""
+    return await asyncio.to_thread(scrape_target_cached, target, scrape_count_offset)
+
+
+async def _execute_targets(targets, scrape_fn):
+    return await run_targets(
+        targets,
+        scrape_fn,
+        max_concurrency=EXECUTOR_CONFIG['MAX_CONCURRENCY'],
+        per_domain_rps=EXECUTOR_CONFIG['PER_DOMAIN_RPS'],
+        lead_id_block=EXECUTOR_CONFIG['LEAD_ID_BLOCK'],
+        default_domain=EXECUTOR_CONFIG['DEFAULT_DOMAIN'],
+    )
+
+
+def run_all_targets(targets, scrape_fn=scrape_target_async):
+    """Scrapes every target concurrently using the EXECUTOR limits from config.yaml."""
+    return asyncio.run(_execute_targets(targets, scrape_fn))
+
+
+def run_all_targets_in_browser(targets, scrape_page_fn):
+    """Real-scrape entry point: `scrape_page_fn(lease, target, offset)` gets a pooled page per target."""
+    async def run():
+        async with BrowserPool.from_config(config['BROWSER_POOL']) as pool:
+            async def scrape(target, scrape_count_offset):
+                async with pool.lease(f"{target['niche']} | {target['city']}") as lease:
+                    return await scrape_page_fn(lease, target, scrape_count_offset)
+
+            results = await _execute_targets(targets, scrape)
+            pool.print_report()
+            return results
+
+    return asyncio.run(run())
 
 
 # --------------------------------------------------
 # MAIN WORKFLOW EXECUTION
 # --------------------------------------------------
 
-if __name__ == "__main__":
-    
-    all_raw_data = []
-    processed_order_indices = []
-    scrape_count_offset = 0 
-    
-    # NEW: Now retrieves the worksheet object as well
-    targets, df_orders, worksheet = get_scraping_targets() 
+def scrape_and_save(targets, orders=None, output_path=RAW_OUTPUT_PATH):
+    """Scrapes `targets`, writes their combined raw leads to `output_path` and records order fulfillment.
     
-    if not targets:
-        print("No scraping targets found. Exiting.")
-        exit(0)
+    Without `orders` the bookkeeping is left to the caller (a sharded run
+    records every shard's results once, see run_pipeline.py). Returns the
+    leads scraped per target (None = failed).
+    """
 
     print(f"Pipeline running for {len(targets)} target groups.")
 
-    # 1. Execute all scraping jobs
-    for target in targets:
-        df_scrape_output = execute_scrape(target, scrape_count_offset) 
-        
-        all_raw_data.append(df_scrape_output)
-        scrape_count_offset += len(df_scrape_output)
-        
-        # Track which custom orders successfully ran
-        if target['order_status_index'] != -1:
-            processed_order_indices.append(target) # Store the entire target dict
+    # 1. Execute all scraping jobs concurrently (lead IDs come from per-listing blocks)
+    with METRICS.span('scrape', targets=len(targets)):
+        results = run_all_targets(targets)
+    METRICS.inc('targets', sum(r is not None for r in results), result='ok')
+    METRICS.inc('targets', sum(r is None for r in results), result='failed')
+    
+    # Failed targets (None) leave their orders PENDING for the next run
+    all_raw_data = [df for df in results if df is not None]
+    counts = [None if df is None else len(df) for df in results]
+
+    if SCRAPE_CACHE is not None:
+        SCRAPE_CACHE.save()
+        print(SCRAPE_CACHE.summary())
+        METRICS.inc_each('scrape_cache_requests', SCRAPE_CACHE.stats, 'result')
 
     # 2. Combine all raw data
     if all_raw_data:
         df_combined_raw = pd.concat(all_raw_data, ignore_index=True)
+        with METRICS.span('score', rows=len(df_combined_raw)):
+            df_combined_raw = SCORER.score(df_combined_raw)
+            SCORER.save()
+        print(SCORER.summary())
+        METRICS.inc_each('leads_scored', SCORER.stats, 'result')
         
         # Ensure directories exist
-        os.makedirs(os.path.dirname(RAW_OUTPUT_PATH), exist_ok=True)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
         
-        # Save combined raw data (ready for clean_verify.py)
-        df_combined_raw.to_csv(RAW_OUTPUT_PATH, index=False)
+        # Save combined raw data as typed Parquet (ready for clean_verify.py)
+        with METRICS.span('write_raw', rows=len(df_combined_raw)):
+            write_raw(df_combined_raw, output_path)
         print(f"Scrape phase complete. Total raw leads saved: {len(df_combined_raw)}")
-        
-        # 3. Update the status of the orders that were just scraped in Google Sheets
-        if processed_order_indices:
-            update_order_status(worksheet, df_orders, processed_order_indices, 'SCRAPE_COMPLETE')
-            
     else:
         print("No data was generated by the scraper targets.")
-        
+    
+    # 3. Record what each order received: complete, partly fulfilled, or released after a failure
+    if orders is not None:
+        with METRICS.span('update_order_status', orders=sum(t['order_status_index'] != -1 for t in targets)):
+            record_fulfillment(orders, targets, counts)
+    
+    return counts
+
+
+if __name__ == "__main__":
+    
+    # NEW: Now retrieves the orders' worksheet (and the bookkeeping they still need) as well
+    with METRICS.span('get_scraping_targets'):
+        targets, orders = get_scraping_targets() 
+    
+    if not targets:
+        print("No scraping targets found. Exiting.")
+        record_fulfillment(orders, [], []) # Orders covered by fresh inventory still complete
+        exit(0)
+
+    scrape_and_save(targets, orders)
     exit(0)
@@ -0,0 +1,139 @@
+import json
+import time
+from datetime import datetime
+
+import gspread
+from gspread.exceptions import APIError
+from gspread.utils import Dimension, ValueRenderOption, rowcol_to_a1
+
+from metrics import METRICS
+
+# Google Sheets quota errors worth retrying
+RETRYABLE_STATUS_CODES = {429, 500, 503}
+
+
+def with_backoff(fn, *args, retries=5, base_delay=1.0, **kwargs):
+    """Calls a Sheets API function, retrying quota (429) and transient errors with exponential backoff."""
+    method = getattr(fn, '__name__', 'call')
+    for attempt in range(retries + 1):
+        try:
+            with METRICS.span('sheets_api', method=method, attempt=attempt):
+                start = time.perf_counter()
+                result = fn(*args, **kwargs)
+                latency = time.perf_counter() - start
+            METRICS.inc('sheets_api_calls', method=method)
+            METRICS.inc('sheets_api_seconds', latency, method=method) # Per-method latency for Prometheus
+            return result
+        except APIError as e:
+            METRICS.inc('sheets_api_errors', method=method, code=e.code)
+            if e.code not in RETRYABLE_STATUS_CODES or attempt == retries:
+                raise
+            delay = base_delay * (2 ** attempt)
+            print(f"Warning: Sheets API returned {e.code}; retrying in {delay:.0f}s...")
+            time.sleep(delay)
+
+
+def service_account_client(service_account_json):
+    """gspread client for a service-account key passed as JSON text (a CI secret or env var)."""
+    return gspread.service_account_from_dict(json.loads(service_account_json))
+
+
+def group_contiguous_rows(row_numbers):
+    """Collapses row numbers into inclusive (start, end) runs, e.g. [2, 3, 4, 7] -> [(2, 4), (7, 7)]."""
+    runs = []
+    for row in sorted(set(row_numbers)):
+        if runs and row == runs[-1][1] + 1:
+            runs[-1] = (runs[-1][0], row)
+        else:
+            runs.append((row, row))
+    return runs
+
+
+# --- READS ---
+
+def read_columns(worksheet, header, columns):
+    """Reads only the named columns (below the header) in one API call.
+
+    Returns a dict of column name -> list of values, all padded to the same length.
+    """
+    col_indices = [header.index(name) + 1 for name in columns]
+    ranges = [f"{rowcol_to_a1(2, c)}:{rowcol_to_a1(worksheet.row_count, c)}" for c in col_indices]
+
+    value_ranges = with_backoff(
+        worksheet.batch_get, ranges,
+        major_dimension=Dimension.cols,
+        value_render_option=ValueRenderOption.unformatted,
+    )
+
+    values = [vr[0] if vr else [] for vr in value_ranges]
+    n_rows = max((len(v) for v in values), default=0)
+    return {name: v + [''] * (n_rows - len(v)) for name, v in zip(columns, values)}
+
+
+# --- WRITES ---
+
+def batch_update_rows(worksheet, values_by_row, header=None, timestamp_column='last_updated'):
+    """Writes per-row values (row number -> {column: value}) in a single batch_update.
+
+    Every row also gets a `timestamp_column` stamp (None = no stamp). Contiguous
+    rows share one range per column, and missing columns are created on first
+    use. Costs two API calls (header read + batch write) regardless of the
+    number of rows and columns, or one when the caller passes the `header`
+    row it already read.
+    """
+    if not values_by_row:
+        return 0
+
+    header = list(header) if header is not None else with_backoff(worksheet.row_values, 1)
+    if timestamp_column:
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        values_by_row = {row: dict(values, **{timestamp_column: timestamp}) for row, values in values_by_row.items()}
+    columns = list(dict.fromkeys(column for values in values_by_row.values() for column in values))
+    updates = []
+
+    missing = [column for column in columns if column not in header]
+    if len(header) + len(missing) > worksheet.col_count:
+        with_backoff(worksheet.add_cols, len(header) + len(missing) - worksheet.col_count)
+    for column in missing:
+        header.append(column)
+        updates.append({'range': rowcol_to_a1(1, len(header)), 'values': [[column]]})
+
+    for column in columns:
+        col = header.index(column) + 1
+        rows = [row for row, values in values_by_row.items() if column in values]
+        for start, end in group_contiguous_rows(rows):
+            updates.append({
+                'range': f"{rowcol_to_a1(start, col)}:{rowcol_to_a1(end, col)}",
+                'values': [[values_by_row[row][column]] for row in range(start, end + 1)],
+            })
+
+    with_backoff(worksheet.batch_update, updates)
+    return len(values_by_row)
+
+
+def batch_update_status(worksheet, row_numbers, status, status_column='status', timestamp_column='last_updated'):
+    """Writes `status` and a timestamp to every given row in a single batch_update (see batch_update_rows)."""
+    return batch_update_rows(worksheet, {row: {status_column: status} for row in row_numbers},
+                             timestamp_column=timestamp_column)
+
+
+def batch_update_column(worksheet, column, values_by_row):
+    """Writes one value per row (row number -> value) into `column` in a single batch_update (see batch_update_rows)."""
+    return batch_update_rows(worksheet, {row: {column: value} for row, value in values_by_row.items()},
+                             timestamp_column=None)
+
+
+def write_rows(worksheet, start_row, rows):
+    """Writes `rows` (lists of cell values) from column A of `start_row` in one values_update call.
+
+    The grid is extended first if the block runs past its last row. Values
+    are written RAW, so text like "+1 555-..." is never parsed as a formula.
+    """
+    if not rows:
+        return 0
+    end_row = start_row + len(rows) - 1
+    if end_row > worksheet.row_count:
+        with_backoff(worksheet.add_rows, end_row - worksheet.row_count)
+    cell_range = f"'{worksheet.title}'!{rowcol_to_a1(start_row, 1)}:{rowcol_to_a1(end_row, max(len(r) for r in rows))}"
+    with_backoff(worksheet.spreadsheet.values_update, cell_range, params={'valueInputOption': 'RAW'}, body={'values': rows})
+    return len(rows)
@@ -0,0 +1,250 @@
+import argparse
+import asyncio
+import json
+import os
+import queue
+import threading
+import time
+
+import clean_verify as cv
+import scrape_sources as ss
+from inventory_stats import InventoryStatsWriter
+from lead_storage import VerifiedDatasetWriter
+from metrics import METRICS
+
+# Usage (from the repo root):
+#   python scripts/streaming_pipeline.py [--queue-size 4] [--metrics-path data/state/stream_metrics.json]
+# Scrapes and verifies in one process: each target's leads are verified and
+# appended to the inventory while later targets are still being scraped.
+
+_DONE = object() # Sentinel: no more scrape results
+
+
+# --- METRICS ---
+
+class StageMetrics:
+    """Work done by one pipeline stage: batches, rows in/out and time spent busy."""
+
+    def __init__(self, name):
+        self.name = name
+        self.batches = 0
+        self.rows_in = 0
+        self.rows_out = 0
+        self.busy_seconds = 0.0
+
+    def record(self, rows_in, rows_out, seconds):
+        self.batches += 1
+        self.rows_in += rows_in
+        self.rows_out += rows_out
+        self.busy_seconds += seconds
+
+    def as_dict(self, wall_seconds):
+        return {
+            'batches': self.batches,
+            'rows_in': self.rows_in,
+            'rows_out': self.rows_out,
+            'busy_seconds': round(self.busy_seconds, 3),
+            'rows_per_second': round(self.rows_in / wall_seconds, 1) if wall_seconds else 0.0,
+        }
+
+
+class QueueMetrics:
+    """Depth of the scrape -> verify queue, sampled on every put, and time producers spent blocked."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.samples = 0
+        self.depth_total = 0
+        self.max_depth = 0
+        self.blocked_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record_put(self, depth, blocked_seconds):
+        with self._lock:
+            self.samples += 1
+            self.depth_total += depth
+            self.max_depth = max(self.max_depth, depth)
+            self.blocked_seconds += blocked_seconds
+
+    def as_dict(self):
+        return {
+            'maxsize': self.maxsize,
+            'max_depth': self.max_depth,
+            'mean_depth': round(self.depth_total / self.samples, 2) if self.samples else 0.0,
+            'producer_blocked_seconds': round(self.blocked_seconds, 3),
+        }
+
+
+class PipelineMetrics:
+    def __init__(self, queue_size):
+        self.scrape = StageMetrics('scrape')
+        self.verify = StageMetrics('verify')
+        self.queue = QueueMetrics(queue_size)
+        self.started = time.perf_counter()
+        self.wall_seconds = 0.0
+
+    def finish(self):
+        self.wall_seconds = time.perf_counter() - self.started
+
+    def as_dict(self):
+        wall = self.wall_seconds or (time.perf_counter() - self.started)
+        serial = self.scrape.busy_seconds + self.verify.busy_seconds
+        return {
+            'wall_seconds': round(wall, 3),
+            # > 1 means the stages overlapped (1 = no better than running them back to back)
+            'overlap_factor': round(serial / wall, 2) if wall else 0.0,
+            'scrape': self.scrape.as_dict(wall),
+            'queue': self.queue.as_dict(),
+            'verify': self.verify.as_dict(wall),
+        }
+
+    def summary(self):
+        m = self.as_dict()
+        return (
+            f"Streaming pipeline: {m['wall_seconds']}s wall (overlap x{m['overlap_factor']}); "
+            f"scrape {m['scrape']['rows_in']} rows in {m['scrape']['batches']} targets "
+            f"({m['scrape']['rows_per_second']} rows/s); "
+            f"queue max depth {m['queue']['max_depth']}/{m['queue']['maxsize']}, "
+            f"producers blocked {m['queue']['producer_blocked_seconds']}s; "
+            f"verify {m['verify']['rows_in']} -> {m['verify']['rows_out']} rows "
+            f"({m['verify']['busy_seconds']}s busy)"
+        )
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.as_dict(), f, indent=2)
+
+
+# --- STAGES ---
+
+def verify_batches(batches, writers, metrics):
+    """Verify stage: scores, verifies and appends each scraped batch as it arrives, until _DONE.
+    
+    Every writer (dataset + CSV, summary cube) gets each verified batch.
+    """
+    seen_keys = set()
+    while True:
+        df_raw = batches.get()
+        if df_raw is _DONE:
+            return
+        start = time.perf_counter()
+        df_verified = cv.verify_chunk(ss.SCORER.score(df_raw), seen_keys)
+        for writer in writers:
+            writer.write(df_verified)
+        if cv.DEDUP_INDEX is not None:
+            cv.DEDUP_INDEX.add(df_verified)
+        cv.load_into_repository(df_verified, refresh=False)
+        metrics.verify.record(len(df_raw), len(df_verified), time.perf_counter() - start)
+
+
+def run_overlapped(targets, queue_size=4):
+    """Scrapes `targets` concurrently and verifies each result while the rest are still scraping.
+
+    Scraping runs in a background thread; verification stays on the calling
+    thread (the dedup index and MX cache are not shared across threads). The
+    queue between them is bounded: when verification falls behind, scrapers
+    wait instead of piling raw frames up in memory. Returns (per-target row
+    counts with None for failures, rows written, metrics).
+    """
+    metrics = PipelineMetrics(queue_size)
+    batches = queue.Queue(maxsize=queue_size)
+    stopped = threading.Event() # Set if verification fails, so blocked scrapers give up
+    outcome = {}
+
+    def put(df):
+        start = time.perf_counter()
+        while not stopped.is_set():
+            try:
+                batches.put(df, timeout=0.5)
+                break
+            except queue.Full:
+                continue
+        metrics.queue.record_put(batches.qsize(), time.perf_counter() - start)
+
+    async def scrape_and_enqueue(target, scrape_count_offset):
+        start = time.perf_counter()
+        df = await ss.scrape_target_async(target, scrape_count_offset)
+        metrics.scrape.record(len(df), len(df), time.perf_counter() - start)
+        await asyncio.to_thread(put, df) # Blocks (off the event loop) while the queue is full
+        return len(df) # Only the count is kept: the frame now belongs to the verify stage
+
+    def scrape_all():
+        try:
+            outcome['counts'] = ss.run_all_targets(targets, scrape_fn=scrape_and_enqueue)
+        except BaseException as e:
+            outcome['error'] = e
+        finally:
+            if not stopped.is_set():
+                batches.put(_DONE)
+
+    if cv.LEAD_REPOSITORY is not None and cv.DEDUP_INDEX is None:
+        cv.LEAD_REPOSITORY.begin_replace() # Replace mode: this run's leads become the whole inventory, swapped in at the end
+    writer = VerifiedDatasetWriter(cv.VERIFIED_DATASET_PATH, cv.VERIFIED_CSV_PATH, append=cv.DEDUP_INDEX is not None)
+    stats_writer = InventoryStatsWriter(cv.VERIFIED_STATS_PATH, append=cv.DEDUP_INDEX is not None)
+    scraper = threading.Thread(target=scrape_all, name="scrape-stage")
+    scraper.start()
+    try:
+        verify_batches(batches, [writer, stats_writer], metrics)
+    except BaseException:
+        stopped.set()
+        raise
+    finally:
+        scraper.join()
+    if 'error' in outcome:
+        raise outcome['error']
+    rows_written = writer.close()
+    stats_writer.close()
+    metrics.finish()
+    return outcome['counts'], rows_written, metrics
+
+
+# --------------------------------------------------
+# MAIN WORKFLOW EXECUTION
+# --------------------------------------------------
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Overlapped scrape -> verify pipeline.")
+    parser.add_argument('--queue-size', type=int, default=4, help="Scraped batches allowed to wait for verification")
+    parser.add_argument('--metrics-path', default='data/state/stream_metrics.json', help="Where to write the stage metrics (JSON)")
+    args = parser.parse_args()
+    METRICS.component = 'stream' # Both stages run in this process
+
+    with METRICS.span('get_scraping_targets'):
+        targets, orders = ss.get_scraping_targets()
+    if not targets:
+        print("No scraping targets found. Exiting.")
+        ss.record_fulfillment(orders, [], []) # Orders covered by fresh inventory still complete
+        exit(0)
+    print(f"Pipeline running for {len(targets)} target groups (overlapped scrape + verify).")
+
+    os.makedirs('data/verified', exist_ok=True)
+    if cv.DEDUP_INDEX is not None:
+        cv.prepare_inventory()
+
+    with METRICS.span('stream', targets=len(targets)):
+        counts, rows_written, metrics = run_overlapped(targets, args.queue_size)
+
+    # Same bookkeeping as the batch pipeline: caches, then order statuses
+    ss.SCORER.save()
+    print(ss.SCORER.summary())
+    if ss.SCRAPE_CACHE is not None:
+        ss.SCRAPE_CACHE.save()
+        print(ss.SCRAPE_CACHE.summary())
+    if cv.VALIDATOR.mx_cache is not None:
+        cv.VALIDATOR.mx_cache.save()
+    cv.finish_repository_load()
+
+    ss.record_fulfillment(orders, targets, counts)
+
+    if cv.DEDUP_INDEX is not None:
+        print(cv.DEDUP_INDEX.summary())
+    print(cv.VALIDATOR.summary())
+    cv.record_run_metrics()
+    METRICS.inc_each('leads_scored', ss.SCORER.stats, 'result')
+    if ss.SCRAPE_CACHE is not None:
+        METRICS.inc_each('scrape_cache_requests', ss.SCRAPE_CACHE.stats, 'result')
+    print(f"Saved {rows_written} verified leads to {cv.VERIFIED_DATASET_PATH} and {cv.VERIFIED_CSV_PATH}.")
+    print(metrics.summary())
+    metrics.save(args.metrics_path)
+    exit(0)
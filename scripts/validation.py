@@ -0,0 +1,218 @@
+import json
+import os
+import re
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+# National significant number lengths per country calling code (E.164)
+COUNTRY_NUMBER_LENGTHS = {
+    '1': [10],       # US, Canada (NANP)
+    '7': [10],       # Russia, Kazakhstan
+    '20': [10],      # Egypt
+    '27': [9],       # South Africa
+    '33': [9],       # France
+    '34': [9],       # Spain
+    '39': [9, 10],   # Italy
+    '44': [10],      # United Kingdom
+    '49': [10, 11],  # Germany
+    '52': [10],      # Mexico
+    '55': [10, 11],  # Brazil
+    '61': [9],       # Australia
+    '65': [8],       # Singapore
+    '81': [9, 10],   # Japan
+    '86': [11],      # China
+    '91': [10],      # India
+    '971': [8, 9],   # United Arab Emirates
+}
+
+REJECTION_RULES = ['phone_too_short', 'phone_unknown_country', 'phone_bad_length', 'email_format', 'email_no_mx']
+
+
+# --- MX LOOKUPS ---
+
+class StubResolver:
+    """Offline MX resolver for local runs and CI: answers from fixed domain lists instead of DNS."""
+
+    def __init__(self, mx_domains=(), no_mx_domains=(), default=True):
+        self.mx_domains = {d.lower() for d in mx_domains}
+        self.no_mx_domains = {d.lower() for d in no_mx_domains}
+        self.default = default
+
+    def __call__(self, domain):
+        if domain in self.no_mx_domains:
+            return False
+        if domain in self.mx_domains:
+            return True
+        return self.default
+
+
+def dns_mx_resolver(domain):
+    """Live MX lookup (needs the optional dnspython package)."""
+    import dns.resolver
+    try:
+        return len(dns.resolver.resolve(domain, 'MX')) > 0
+    except Exception:
+        return False
+
+
+class MXCache:
+    """Remembers which email domains accept mail, so each domain is resolved at most once."""
+
+    def __init__(self, resolver, path=None):
+        self.resolver = resolver
+        self.path = path
+        self.domains = {}
+        self.stats = {'hits': 0, 'lookups': 0}
+        if path and os.path.exists(path):
+            with open(path, 'r') as f:
+                self.domains = json.load(f)
+
+    def has_mx(self, domains):
+        """Vectorized over a Series of domains: one resolver call per new unique domain."""
+        for domain in pd.unique(domains):
+            if domain in self.domains:
+                self.stats['hits'] += 1
+            else:
+                self.domains[domain] = bool(self.resolver(domain))
+                self.stats['lookups'] += 1
+        return domains.map(self.domains).fillna(False).astype(bool)
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'w') as f:
+            json.dump(self.domains, f)
+
+
+# --- VALIDATION ENGINE ---
+
+class ValidationEngine:
+    """Column-at-a-time phone and email validation.
+
+    Every rule is a pandas string op or NumPy mask over the whole column; the
+    only per-item Python work is one MX lookup per unseen domain. Rejections
+    are counted per rule across all calls (a row can fail several rules).
+    """
+
+    def __init__(self, email_regex, min_phone_length, default_country_code='1',
+                 country_lengths=None, mx_cache=None):
+        re.compile(email_regex) # Fail fast on a bad pattern in config.yaml
+        self.email_regex = email_regex
+        self.min_phone_length = min_phone_length
+        self.default_country_code = str(default_country_code)
+        self.country_lengths = {str(k): v for k, v in (country_lengths or COUNTRY_NUMBER_LENGTHS).items()}
+        self.mx_cache = mx_cache
+
+        # Longest calling codes first so '971' wins over '97'-style prefixes
+        self._codes = sorted(self.country_lengths, key=len, reverse=True)
+        self.rejections = Counter({rule: 0 for rule in REJECTION_RULES})
+        self.rows_checked = 0
+        self.rows_passed = 0
+
+    @classmethod
+    def from_config(cls, verification_config):
+        mx_config = verification_config.get('MX_CHECK') or {}
+        mx_cache = None
+        if mx_config.get('ENABLED'):
+            if mx_config.get('RESOLVER') == 'dns':
+                resolver = dns_mx_resolver
+            else:
+                resolver = StubResolver(no_mx_domains=mx_config.get('NO_MX_DOMAINS', []))
+            mx_cache = MXCache(resolver, mx_config.get('CACHE_PATH'))
+
+        return cls(
+            email_regex=verification_config['EMAIL_REGEX'],
+            min_phone_length=verification_config['MIN_PHONE_LENGTH'],
+            default_country_code=verification_config.get('DEFAULT_COUNTRY_CODE', '1'),
+            country_lengths=verification_config.get('PHONE_COUNTRY_LENGTHS'),
+            mx_cache=mx_cache,
+        )
+
+    def normalize_phones(self, phones):
+        """Returns (E.164 strings, per-rule failure masks) for a Series of raw phone numbers.
+
+        Numbers written with '+' or '00' keep their own calling code; anything
+        else is treated as a national number in the default country.
+        """
+        raw = phones.astype(str)
+        digits = raw.str.replace(r'[^0-9]+', '', regex=True)
+        international = raw.str.match(r'^\s*(?:\+|00)').to_numpy()
+        digits = digits.mask(raw.str.match(r'^\s*00').to_numpy(), digits.str.slice(2))
+
+        n = len(raw)
+        cc_index = np.full(n, -1)
+        unmatched = international.copy()
+        for i, code in enumerate(self._codes):
+            hit = unmatched & digits.str.startswith(code).to_numpy()
+            cc_index[hit] = i
+            unmatched &= ~hit
+
+        # National format: drop a trunk '0', and a leading default code written without '+'
+        dcc = self.default_country_code
+        default_lengths = self.country_lengths.get(dcc, [])
+        local_digits = digits.str.replace(r'^0', '', regex=True)
+        has_dcc = (
+            local_digits.str.startswith(dcc) & (local_digits.str.len() - len(dcc)).isin(default_lengths)
+        ).to_numpy()
+
+        # One calling-code index per row: matched prefix, or the default country for national numbers
+        dcc_index = self._codes.index(dcc) if dcc in self._codes else -1
+        cc_index[~international] = dcc_index
+        code_lengths = np.array([len(c) for c in self._codes] + [0])
+        cc_length = code_lengths[cc_index]
+        cc_length[~international & ~has_dcc] = 0
+
+        national = local_digits.where(~international, digits)
+        for k in np.unique(cc_length[cc_length > 0]):
+            national = national.mask(cc_length == k, national.str.slice(int(k)))
+
+        national_len = national.str.len().to_numpy()
+        length_ok = np.zeros(n, dtype=bool)
+        for i, code in enumerate(self._codes):
+            length_ok |= (cc_index == i) & np.isin(national_len, self.country_lengths[code])
+
+        failures = {
+            'phone_too_short': (digits.str.len() < self.min_phone_length).to_numpy(),
+            'phone_unknown_country': cc_index == -1,
+        }
+        failures['phone_bad_length'] = ~length_ok & ~failures['phone_unknown_country']
+
+        codes = np.array(self._codes + [''], dtype=object)[cc_index]
+        e164 = ('+' + pd.Series(codes, index=raw.index) + national).where(length_ok)
+        return e164, failures
+
+    def check_emails(self, emails):
+        """Per-rule failure masks for a Series of emails (format, then MX on well-formed ones)."""
+        emails = emails.astype(str).str.strip()
+        format_ok = emails.str.match(self.email_regex).fillna(False).to_numpy(dtype=bool)
+        failures = {'email_format': ~format_ok, 'email_no_mx': np.zeros(len(emails), dtype=bool)}
+
+        if self.mx_cache is not None and format_ok.any():
+            domains = emails[format_ok].str.replace(r'^.*@', '', regex=True).str.lower()
+            failures['email_no_mx'][format_ok] = ~self.mx_cache.has_mx(domains).to_numpy()
+        return failures
+
+    def validate(self, df):
+        """Returns (pass mask, E.164 phone Series) for a lead frame with Phone and Email columns."""
+        e164, phone_failures = self.normalize_phones(df['Phone'])
+        email_failures = self.check_emails(df['Email'])
+
+        rejected = np.zeros(len(df), dtype=bool)
+        for rule, failed in {**phone_failures, **email_failures}.items():
+            self.rejections[rule] += int(failed.sum())
+            rejected |= failed
+
+        passed = pd.Series(~rejected, index=df.index)
+        self.rows_checked += len(df)
+        self.rows_passed += int(passed.sum())
+        return passed, e164
+
+    def summary(self):
+        counts = ", ".join(f"{rule}={count}" for rule, count in self.rejections.items())
+        line = f"Validation: {self.rows_passed}/{self.rows_checked} passed; rejections by rule: {counts}"
+        if self.mx_cache is not None:
+            line += f" (MX cache: {self.mx_cache.stats['hits']} hits, {self.mx_cache.stats['lookups']} lookups)"
+        return line
@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# The pipeline modules import each other as top-level modules, as they do when run from scripts/,
+# and read config/config.yaml relative to the repo root at import time
+sys.path.insert(0, os.path.join(REPO_ROOT, 'scripts'))
+os.chdir(REPO_ROOT)
+
+
+class FakeWorksheet:
+    """Just enough of a gspread Worksheet for sheets_client: keeps the cells and logs every API call."""
+
+    def __init__(self, header, n_rows=10):
+        self.title = 'Sheet1'
+        self.cells = {(1, col): name for col, name in enumerate(header, start=1)}
+        self.row_count = n_rows + 1
+        self.col_count = len(header)
+        self.calls = []
+
+    def row_values(self, row):
+        self.calls.append('row_values')
+        last = max((col for (r, col) in self.cells if r == row), default=0)
+        return [self.cells.get((row, col), '') for col in range(1, last + 1)]
+
+    def add_cols(self, count):
+        self.calls.append('add_cols')
+        self.col_count += count
+
+    def batch_update(self, updates):
+        from gspread.utils import a1_range_to_grid_range
+        self.calls.append('batch_update')
+        for update in updates:
+            grid = a1_range_to_grid_range(update['range'])
+            for i, row_values in enumerate(update['values']):
+                for j, value in enumerate(row_values):
+                    self.cells[(grid['startRowIndex'] + i + 1, grid['startColumnIndex'] + j + 1)] = value
+
+    def column(self, name):
+        """Values of the named column, row number -> value (rows below the header)."""
+        col = self.header().index(name) + 1
+        return {row: value for (row, c), value in self.cells.items() if c == col and row > 1}
+
+    def header(self):
+        last = max((col for (r, col) in self.cells if r == 1), default=0)
+        return [self.cells.get((1, col), '') for col in range(1, last + 1)]
+
+
+@pytest.fixture
+def fake_worksheet():
+    return FakeWorksheet
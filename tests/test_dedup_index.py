@@ -0,0 +1,23 @@
+import pandas as pd
+
+from dedup_index import DedupIndex
+
+
+def leads(*names):
+    return pd.DataFrame({
+        'Business Name': list(names),
+        'Phone': [''] * len(names),
+        'Email': [''] * len(names),
+        'City': ['Austin, Texas'] * len(names),
+    })
+
+
+def test_re_adding_leads_keeps_one_name_per_block(tmp_path):
+    index = DedupIndex(str(tmp_path / 'index.sqlite'))
+    batch = leads("Joe's Plumbing LLC", 'Austin Roofing Co')
+    index.add(batch)
+    index.add(batch)
+    index.add(leads('Joes Plumbing, Inc.'))
+
+    assert index.conn.execute("SELECT COUNT(*) FROM name_blocks").fetchone() == (2,)
+    assert index.filter_new(leads('Joes Plumbingg', 'Lone Star HVAC'))['Business Name'].tolist() == ['Lone Star HVAC']
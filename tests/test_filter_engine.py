@@ -0,0 +1,109 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from filter_engine import FilterEngine
+from lead_query import InventoryQuery
+
+
+@pytest.fixture(scope='module')
+def leads():
+    # Few distinct scores, so most page boundaries fall inside a run of tied scores
+    rng = np.random.default_rng(7)
+    n = 400
+    df = pd.DataFrame({
+        'Business Name': [f'Business {i}' for i in range(n)],
+        'City': rng.choice(['Austin, Texas', 'Dallas, Texas', 'Dallas, Texas 1'], n),
+        'Niche': rng.choice(['Roofing', 'Plumbing', 'HVAC Services'], n),
+        'Reason to Contact': rng.choice(['No Website', 'New Business'], n),
+        'Lead Score': rng.choice([55.0, 70.0, 85.0, np.nan], n, p=[0.3, 0.3, 0.3, 0.1]),
+    })
+    return df.sort_values('Lead Score', ascending=False, kind='stable', na_position='last').reset_index(drop=True)
+
+
+FILTERS = [
+    ({}, None),
+    ({'City': 'Dallas, Texas'}, None),
+    ({'City': 'Dallas'}, None),
+    ({'Niche': 'Roofing', 'Reason to Contact': 'No Website'}, None),
+    ({}, 70),
+    ({'City': 'Austin, Texas', 'Niche': 'HVAC Services'}, 55),
+    ({'Niche': 'Roofing'}, 100),
+]
+
+
+def pandas_filter(df, contains, min_score):
+    mask = pd.Series(True, index=df.index)
+    for column, value in contains.items():
+        mask &= df[column] == value
+    if min_score is not None:
+        mask &= df['Lead Score'] >= min_score
+    return df[mask]
+
+
+def pandas_sorted(df, descending):
+    """The reference order: by Lead Score, ties in frame order (reversed entirely for ascending)."""
+    if descending:
+        return df.sort_values('Lead Score', ascending=False, kind='stable', na_position='last')
+    return df.sort_values('Lead Score', ascending=False, kind='stable', na_position='last').iloc[::-1]
+
+
+@pytest.mark.parametrize('contains, min_score', FILTERS)
+def test_select_matches_a_pandas_filter(leads, contains, min_score):
+    engine = FilterEngine(leads)
+    expected = pandas_filter(leads, contains, min_score)
+    assert engine.select(contains, min_score=min_score).tolist() == expected.index.tolist()
+
+
+def test_counts_and_options_match_pandas(leads):
+    engine = FilterEngine(leads)
+    for column in ['City', 'Niche', 'Reason to Contact']:
+        assert engine.options(column) == leads[column].unique().tolist()
+        counts = leads[column].value_counts()
+        assert {value: engine.count(column, value) for value in engine.options(column)} == counts.to_dict()
+    assert engine.count('City', 'Dallas') == 0
+
+
+@pytest.mark.parametrize('descending', [True, False])
+@pytest.mark.parametrize('limit', [1, 7, 40, 1000])
+@pytest.mark.parametrize('contains, min_score', FILTERS)
+def test_pages_match_a_pandas_sort(leads, contains, min_score, descending, limit):
+    query = InventoryQuery(leads, FilterEngine(leads))
+    expected = pandas_sorted(pandas_filter(leads, contains, min_score), descending)
+
+    pages, cursor = [], None
+    while True:
+        page = query.page(contains, min_score=min_score, descending=descending, after=cursor, limit=limit)
+        assert page.total == len(expected) and page.total_is_exact
+        pages.append(page.rows)
+        if page.next_cursor is None:
+            break
+        assert len(page.rows) == limit
+        cursor = page.next_cursor
+
+    names = pd.concat(pages)['Business Name'].tolist()
+    assert names == expected['Business Name'].tolist()
+    # No trailing empty page when the total is a multiple of the page size
+    assert len(pages) == max(-(-len(expected) // limit), 1)
+
+
+def test_pages_split_a_run_of_tied_scores(leads):
+    query = InventoryQuery(leads, FilterEngine(leads))
+    tied = leads.index[leads['Lead Score'] == 85.0]
+    assert len(tied) > 20
+
+    first = query.page(limit=10)
+    second = query.page(after=first.next_cursor, limit=10)
+    assert first.next_cursor == (85.0, tied[9])
+    assert first.rows.index.tolist() + second.rows.index.tolist() == tied[:20].tolist()
+
+
+def test_pages_project_columns(leads):
+    page = InventoryQuery(leads, FilterEngine(leads)).page({'City': 'Austin, Texas'}, limit=5, columns=['Business Name'])
+    assert page.rows.columns.tolist() == ['Business Name']
+
+
+def test_query_refuses_an_unsorted_frame(leads):
+    shuffled = leads.sample(frac=1, random_state=1).reset_index(drop=True)
+    with pytest.raises(ValueError):
+        InventoryQuery(shuffled, FilterEngine(shuffled))
@@ -0,0 +1,110 @@
+import time
+
+import pytest
+
+import lead_export
+from filter_engine import FilterEngine
+from lead_export import ExportManager
+from lead_query import InventoryQuery
+from mock_data import generate_leads
+
+
+class FakeSpreadsheet:
+    def __init__(self, client, title):
+        self.id = f"sheet{len(client.created)}"
+        self.url = f"https://docs.google.com/spreadsheets/d/{self.id}"
+        self.title = title
+        self.shared = []
+        self.sheet1 = self.worksheet = FakeExportWorksheet(self)
+        self.rows = 0
+
+    def share(self, email, perm_type, role, notify=True):
+        self.shared.append((email, perm_type, role))
+
+    def values_update(self, cell_range, params, body):
+        self.rows += len(body['values'])
+
+
+class FakeExportWorksheet:
+    def __init__(self, spreadsheet):
+        self.spreadsheet = spreadsheet
+        self.title = 'Sheet1'
+        self.row_count, self.col_count = 1000, 26
+
+    def update_title(self, title):
+        self.title = title
+
+    def resize(self, rows, cols):
+        self.row_count, self.col_count = rows, cols
+
+
+class FakeClient:
+    def __init__(self):
+        self.created = []
+        self.live = {}
+
+    def create(self, title, folder_id=None):
+        spreadsheet = FakeSpreadsheet(self, title)
+        self.created.append(spreadsheet)
+        self.live[spreadsheet.id] = spreadsheet
+        return spreadsheet
+
+    def del_spreadsheet(self, spreadsheet_id):
+        del self.live[spreadsheet_id]
+
+
+@pytest.fixture
+def query():
+    df = generate_leads(300, ['Roofing'], ['Austin, Texas'], seed=1)
+    df['Lead Score'], df['Reason to Contact'], df['Attribute'] = 50, 'No Website', 'No Website'
+    return InventoryQuery(df, FilterEngine(df))
+
+
+def finished(job):
+    while job.running:
+        time.sleep(0.01)
+    return job
+
+
+def test_sheet_exports_are_shared_and_deleted_on_eviction(tmp_path, query):
+    manager = ExportManager(str(tmp_path), chunk_size=100, max_files=2)
+    manager._client = client = FakeClient()
+
+    jobs = [finished(manager.submit(query, {}, None, True, 'sheet', version, share_with=' buyer@example.com '))
+            for version in range(3)]
+    manager._executor.shutdown(wait=True) # Eviction runs on the worker after the job is marked done
+
+    assert [job.status for job in jobs] == ['done'] * 3
+    assert client.created[0].shared == [('buyer@example.com', 'user', 'reader')]
+    assert client.created[0].rows == 301 # Header + leads
+    assert sorted(client.live) == ['sheet1', 'sheet2'] # The oldest export's spreadsheet went with its note
+    assert not jobs[0].available() and jobs[2].available()
+
+
+def test_failed_sheet_export_deletes_its_spreadsheet(tmp_path, query, monkeypatch):
+    manager = ExportManager(str(tmp_path), chunk_size=100)
+    manager._client = client = FakeClient()
+    cell_values = lead_export.cell_values
+    calls = []
+
+    def fail_on_second_chunk(frame):
+        calls.append(len(frame))
+        if len(calls) == 2:
+            raise RuntimeError("quota exceeded")
+        return cell_values(frame)
+
+    monkeypatch.setattr(lead_export, 'cell_values', fail_on_second_chunk)
+    job = finished(manager.submit(query, {}, None, True, 'sheet', 1, share_with='buyer@example.com'))
+
+    assert job.status == 'failed' and job.error == "quota exceeded"
+    assert len(client.created) == 1 and client.live == {}
+
+
+def test_exports_are_reused_only_within_a_data_version(tmp_path, query):
+    manager = ExportManager(str(tmp_path))
+    first = finished(manager.submit(query, {}, None, True, 'csv', 7))
+
+    assert manager.submit(query, {}, None, True, 'csv', 7) is first
+    assert manager.submit(query, {}, None, True, 'csv', 8) is not first
+    unversioned = finished(manager.submit(query, {}, None, True, 'csv', None))
+    assert manager.submit(query, {}, None, True, 'csv', None) is not unversioned
@@ -0,0 +1,76 @@
+import pytest
+
+from filter_engine import FilterEngine
+from inventory_stats import InventoryStats
+from lead_query import InventoryQuery
+from lead_repository import LeadRepository
+from lead_scoring import LeadScorer
+from mock_data import DEFAULT_CITIES, DEFAULT_NICHES, generate_leads, names
+
+SCORING = {'DEFAULT_PRIOR': 60, 'NICHE_PRIORS': {}, 'WEIGHTS': {'NEW_BUSINESS': 12, 'NO_WEBSITE': 15, 'REVIEWS': 15},
+           'NEW_BUSINESS_YEARS': 2, 'REVIEW_SATURATION': 500, 'CACHE_PATH': None}
+
+
+@pytest.fixture(scope='module')
+def leads():
+    # 'Dallas, Texas' is a substring of 'Dallas, Texas 1': only exact matching tells them apart
+    df = generate_leads(3000, names(DEFAULT_NICHES, 4), names(DEFAULT_CITIES, 12), seed=3)
+    df = LeadScorer.from_config(SCORING).score(df)
+    return df.sort_values('Lead Score', ascending=False, kind='stable').reset_index(drop=True)
+
+
+@pytest.fixture(scope='module')
+def repository(leads, tmp_path_factory):
+    repository = LeadRepository(f"sqlite:///{tmp_path_factory.mktemp('repo') / 'leads.db'}").create_schema()
+    repository.upsert(leads)
+    repository.refresh_facets()
+    yield repository
+    repository.dispose()
+
+
+def all_names(query, contains, min_score):
+    names, cursor = [], None
+    while True:
+        page = query.page(contains, min_score=min_score, after=cursor, limit=500)
+        names += page.rows['Business Name'].tolist()
+        if page.next_cursor is None:
+            return page.total, sorted(names)
+        cursor = page.next_cursor
+
+
+@pytest.mark.parametrize('contains, min_score', [
+    ({'City': 'Dallas, Texas'}, None),
+    ({'City': 'dallas, texas'}, None),
+    ({'City': 'Dallas'}, None),
+    ({'City': 'Austin, Texas 1', 'Niche': 'Plumbing'}, 40),
+    ({'Niche': 'Roofing', 'Reason to Contact': 'No Website'}, None),
+])
+def test_backends_agree_on_filters(leads, repository, contains, min_score):
+    memory_total, memory_names = all_names(InventoryQuery(leads, FilterEngine(leads)), contains, min_score)
+    sql_total, sql_names = all_names(repository, contains, min_score)
+
+    expected = leads
+    for column, value in contains.items():
+        expected = expected[expected[column] == value]
+    if min_score is not None:
+        expected = expected[expected['Lead Score'] >= min_score]
+
+    assert memory_names == sql_names == sorted(expected['Business Name'])
+    assert memory_total == sql_total == InventoryStats.from_frame(leads).total(contains, min_score) == len(expected)
+
+
+def test_data_version_changes_with_each_load(leads, tmp_path):
+    repository = LeadRepository(f"sqlite:///{tmp_path / 'leads.db'}").create_schema()
+    assert repository.data_version() is None
+
+    repository.upsert(leads.head(100))
+    repository.refresh_facets()
+    first = repository.data_version()
+    repository.begin_replace()
+    repository.upsert(leads.tail(100))
+    assert repository.data_version() == first # Not loaded until the replace commits
+    repository.commit_replace()
+    repository.refresh_facets()
+
+    assert first is not None and repository.data_version() != first
+    repository.dispose()
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+from lead_scoring import LeadScorer, REASONS
+
+
+def make_scorer():
+    return LeadScorer(default_prior=60, weights={'NEW_BUSINESS': 12, 'NO_WEBSITE': 15, 'REVIEWS': 15},
+                      new_business_years=2, review_saturation=500)
+
+
+def test_reason_follows_the_strongest_signal():
+    scorer = make_scorer()
+    _, reason = scorer.compute(np.array([60.0, 60.0, 60.0]), has_website=np.array([1.0, 0.0, 1.0]),
+                               years=np.array([1.0, 10.0, 10.0]), reviews=np.array([0.0, 0.0, 400.0]))
+    assert [REASONS[r] for r in reason] == ['New Business in Your Area', 'No Website', 'High Conversion Potential']
+
+
+def test_established_and_unknown_rows_are_not_new_businesses():
+    scorer = make_scorer()
+    score, reason = scorer.compute(np.array([60.0, 60.0]), has_website=np.array([1.0, np.nan]),
+                                   years=np.array([15.0, np.nan]), reviews=np.array([0.0, np.nan]))
+    assert [REASONS[r] for r in reason] == ['High Conversion Potential'] * 2
+    assert list(score) == [60, 60]
+
+
+def test_score_labels_established_business():
+    df = pd.DataFrame({'Business Name': ['Old Co'], 'City': ['Austin, Texas'], 'Niche': ['Plumbing'],
+                       'Website': ['http://old.example.com'], 'Years in Business': [15], 'Review Count': [0]})
+    scored = make_scorer().score(df)
+    assert scored['Reason to Contact'].tolist() == ['High Conversion Potential']
+    assert scored['Attribute'].tolist() == ['High Conversion']
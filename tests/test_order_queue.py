@@ -0,0 +1,74 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from order_queue import OrderQueue
+
+
+def queue_with_orders(tmp_path, n):
+    queue = OrderQueue(tmp_path / 'orders.db')
+    for i in range(n):
+        queue.submit('Roofing', f'City {i}, Texas', 50, 'user-1')
+    return queue
+
+
+def test_concurrent_claims_never_share_an_order(tmp_path):
+    queue = queue_with_orders(tmp_path, 60)
+    workers = 8
+    start = threading.Barrier(workers)
+
+    def claim(worker):
+        # Every worker queues up on the write lock at once, on its own connection
+        start.wait()
+        return set(queue.claim(worker_id=f'worker-{worker}', limit=10)['id'])
+
+    with ThreadPoolExecutor(workers) as pool:
+        claimed = list(pool.map(claim, range(workers)))
+
+    all_claimed = set().union(*claimed)
+    assert sum(len(ids) for ids in claimed) == len(all_claimed) == 60
+    assert queue.claim(limit=10).empty
+
+
+def test_claims_take_the_highest_priority_then_the_oldest(tmp_path):
+    queue = queue_with_orders(tmp_path, 3)
+    urgent = queue.submit('HVAC', 'Austin, Texas', 50, 'user-2', priority=1)
+
+    assert queue.claim(limit=2)['id'].tolist() == [urgent, 1]
+
+
+def test_requeue_stale_returns_only_old_claims(tmp_path):
+    queue = queue_with_orders(tmp_path, 2)
+    queue.claim(worker_id='dead-worker', limit=1)
+    queue.claim(worker_id='live-worker', limit=1)
+    with sqlite3.connect(queue.path) as conn:
+        conn.execute("UPDATE orders SET claimed_at = '2000-01-01 00:00:00' WHERE claimed_by = 'dead-worker'")
+
+    assert queue.requeue_stale(max_age_minutes=30) == 1
+    assert queue.claim(worker_id='next-worker')['id'].tolist() == [1]
+    assert queue.requeue_stale(max_age_minutes=30) == 0
+
+
+def test_import_csv_runs_once(tmp_path):
+    csv_path = tmp_path / 'order_queue.csv'
+    pd.DataFrame({
+        'timestamp': ['2026-01-01 09:00:00', '2026-01-01 10:00:00'],
+        'niche': ['Roofing', 'HVAC'],
+        'location': ['Austin, Texas', 'Dallas, Texas'],
+        'max_count': [50, 100],
+        'user_id': ['user-1', 'user-1'],
+        'status': ['PENDING_SCRAPE', 'SCRAPE_COMPLETE'],
+    }).to_csv(csv_path, index=False)
+    queue = OrderQueue(tmp_path / 'orders.db')
+
+    assert queue.import_csv(tmp_path / 'missing.csv') == 0
+    assert queue.import_csv(csv_path) == 2
+    assert queue.import_csv(csv_path) == 0
+
+    orders = queue.orders_for_user('user-1')
+    assert orders[['niche', 'status', 'fulfilled']].values.tolist() == [
+        ['Roofing', 'PENDING_SCRAPE', 0],
+        ['HVAC', 'SCRAPE_COMPLETE', 0],
+    ]
@@ -0,0 +1,89 @@
+import time
+
+import jinja2.sandbox
+import pytest
+
+import outreach
+from filter_engine import FilterEngine
+from lead_query import InventoryQuery
+from mock_data import generate_leads
+from outreach import OutreachManager, SendLog, check_template, compile_template, render_batch
+
+
+@pytest.mark.parametrize('text', [
+    "{{ cycler.__init__.__globals__.os.popen('id -u').read() }}",
+    "{{ BusinessName.__class__.__mro__ }}",
+    "{{ lipsum.__globals__.os }}",
+])
+def test_templates_cannot_reach_python_internals(text):
+    with pytest.raises(jinja2.sandbox.SecurityError):
+        compile_template(text).render({'BusinessName': 'Acme'})
+    with pytest.raises(ValueError):
+        check_template(text)
+
+
+def test_templates_render_lead_fields_as_plain_text():
+    template = check_template("Hi {{BusinessName}} in {{City}}")
+    assert template.render({'BusinessName': 'A & B <Co>', 'City': 'Austin'}) == "Hi A & B <Co> in Austin"
+
+
+def test_contacted_is_per_user(tmp_path):
+    log = SendLog(tmp_path / 'outreach.db')
+    log.record('c1', 'alice', [('lead@example.com', SendLog.SENT, None), ('gone@example.com', SendLog.REFUSED, '550'),
+                               ('later@example.com', SendLog.FAILED, 'timeout')])
+    emails = {'lead@example.com', 'gone@example.com', 'later@example.com'}
+    assert log.contacted('alice', emails) == {'lead@example.com', 'gone@example.com'}
+    assert log.contacted('bob', emails) == set()
+
+
+def test_unfinished_is_per_user(tmp_path):
+    log = SendLog(tmp_path / 'outreach.db')
+    log.start_campaign('c1', {'user_id': 'alice'})
+    log.start_campaign('c2', {'user_id': 'bob'})
+    log.start_campaign('c3', {'user_id': 'bob'})
+    log.finish_campaign('c3', 'done')
+    assert [key for key, _ in log.unfinished('bob')] == ['c2']
+
+
+class SlowPool:
+    """Stands in for SMTPPool: every send takes a while, so sends are in flight when a page fails."""
+    delivered = []
+
+    def __init__(self, size, **smtp):
+        pass
+
+    def send(self, message):
+        time.sleep(0.02)
+        SlowPool.delivered.append(message['To'].lower())
+
+    def close(self):
+        pass
+
+
+def test_sends_in_flight_are_logged_when_a_campaign_fails(tmp_path, monkeypatch):
+    df = generate_leads(40, ['Roofing'], ['Austin, Texas'], seed=1)
+    df['Lead Score'] = 50
+    query = InventoryQuery(df, FilterEngine(df))
+    pages = []
+
+    def render_first_page_only(subject, body, frame):
+        pages.append(len(frame))
+        if len(pages) == 2:
+            raise jinja2.sandbox.SecurityError("access to attribute '__class__' is unsafe")
+        return render_batch(subject, body, frame)
+
+    monkeypatch.setattr(outreach, 'SMTPPool', SlowPool)
+    monkeypatch.setattr(outreach, 'render_batch', render_first_page_only)
+    manager = OutreachManager(tmp_path / 'outreach.db', smtp={'host': 'localhost'}, from_address='me@example.com',
+                              render_batch=20, default_rate=0, provider_rates={})
+    job = manager.submit(query, {}, None, "Hi", "Hello {{BusinessName}}", 'alice')
+    manager._executor.shutdown(wait=True)
+
+    assert job.status == 'failed' and job.error.startswith("Template error")
+    assert len(SlowPool.delivered) == 20
+    assert manager.log.contacted('alice', SlowPool.delivered) == set(SlowPool.delivered)
+
+
+def test_templates_that_need_lead_values_are_accepted():
+    template = check_template("{{ (ReviewCount | int) + 1 }} reviews, {{ BusinessName.upper() }}")
+    assert template.render({'ReviewCount': '4', 'BusinessName': 'acme'}) == "5 reviews, ACME"
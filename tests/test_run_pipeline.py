@@ -0,0 +1,28 @@
+import scrape_sources as ss
+from run_pipeline import record_run, shard_targets
+
+
+def planned_targets():
+    cities = ['Austin, Texas', 'Miami, Florida', 'Denver, Colorado', 'Dallas, Texas']
+    targets = [{'niche': 'HVAC Services', 'city': 'Dallas, Texas', 'max_count': 50, 'order_status_index': -1}]
+    targets += [{'niche': niche, 'city': city, 'max_count': 25, 'order_status_index': i, 'order_id': i + 1}
+                for i, (niche, city) in enumerate((n, c) for n in ['Roofing', 'Plumbing'] for c in cities)]
+    return targets
+
+
+def test_each_planned_target_is_scraped_by_exactly_one_shard():
+    targets = planned_targets()
+    shards = [shard_targets(targets, i, 3) for i in range(3)]
+    assert sorted(i for shard in shards for i, _ in shard) == list(range(len(targets)))
+    assert all(targets[i] is target for shard in shards for i, target in shard)
+
+
+def test_record_run_books_every_shard_once(monkeypatch):
+    calls = []
+    monkeypatch.setattr(ss, 'record_fulfillment', lambda orders, targets, counts: calls.append((orders, targets, counts)))
+    plan = {'num_shards': 2, 'targets': planned_targets()[:4], 'from_inventory': []}
+    orders = ss.RunOrders(None, None, [])
+
+    record_run(plan, {0: 50, 2: 25, 3: 0}, orders) # Target 1's shard never reported
+
+    assert calls == [(orders, plan['targets'], [50, None, 25, 0])]
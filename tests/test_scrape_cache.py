@@ -0,0 +1,32 @@
+import pandas as pd
+
+from scrape_cache import ScrapeCache
+
+URL = 'http://example.test/search?niche=Roofing&city=Austin'
+
+
+def page(scraped_date):
+    return pd.DataFrame({'Business Name': ['Austin Roofing', 'Lone Star Roofs'], 'scraped_date': [scraped_date] * 2})
+
+
+def test_hits_keep_the_fetch_date_and_refetches_refresh_it(tmp_path):
+    cache = ScrapeCache(str(tmp_path), default_ttl_hours=24)
+    content_hash = ScrapeCache.content_hash('same page')
+    cache.store(URL, 'Roofing', page('2026-01-01 09:00:00'), content_hash)
+
+    hit = cache.lookup(URL, 'Roofing')
+    assert hit['scraped_date'].tolist() == ['2026-01-01 09:00:00'] * 2
+
+    refetched = cache.store(URL, 'Roofing', page('2026-01-02 09:00:00'), content_hash)
+    assert refetched['scraped_date'].tolist() == ['2026-01-02 09:00:00'] * 2
+    assert cache.stats == {'hits': 1, 'unchanged': 1, 'misses': 1}
+
+
+def test_stale_entries_are_not_served(tmp_path):
+    cache = ScrapeCache(str(tmp_path), default_ttl_hours=1, niche_ttl_hours={'Roofing': 48})
+    cache.store(URL, 'HVAC', page('2026-01-01 09:00:00'), ScrapeCache.content_hash('page'))
+    two_hours_on = cache.entries[URL]['fetched_at'] + 2 * 3600
+
+    assert cache.lookup(URL, 'HVAC', now=two_hours_on) is None
+    assert cache.lookup(URL, 'Roofing', now=two_hours_on) is not None
+    assert cache.stats['hits'] == 1
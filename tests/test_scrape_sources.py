@@ -0,0 +1,66 @@
+import pytest
+
+import scrape_sources as ss
+from order_scheduler import MaintenanceCursor
+
+HEADER = ['timestamp', 'niche', 'location', 'max_count', 'status']
+
+
+@pytest.fixture
+def sheet_mode(tmp_path, monkeypatch):
+    monkeypatch.setattr(ss, 'ORDER_QUEUE', None)
+    monkeypatch.setattr(ss, 'MAINTENANCE_CURSOR', MaintenanceCursor(str(tmp_path / 'cursor.json')))
+
+
+def order(index, max_count=100, **fields):
+    return dict({'niche': 'Roofing', 'city': 'Austin, Texas', 'max_count': max_count, 'order_status_index': index}, **fields)
+
+
+def test_one_sheet_write_per_run(sheet_mode, fake_worksheet):
+    worksheet = fake_worksheet(HEADER)
+    orders = ss.RunOrders(worksheet, HEADER, [order(4)])
+    targets = [
+        dict(order(-1, 50), start=0),
+        order(0, 40, ordered=100, start=10),
+        order(1, 40, ordered=50, start=10),
+        order(2, 40, ordered=100, start=0),
+    ]
+    ss.record_fulfillment(orders, targets, [50, 40, 40, None])
+
+    # The header came with the orders; status, fulfilled and last_updated go in one write
+    assert worksheet.calls == ['add_cols', 'batch_update']
+    assert worksheet.column('status') == {2: 'PENDING_SCRAPE', 3: 'SCRAPE_COMPLETE', 6: 'SCRAPE_COMPLETE'}
+    assert worksheet.column('fulfilled') == {2: 50, 3: 50, 6: 100}
+    assert set(worksheet.column('last_updated')) == {2, 3, 6}
+    assert ss.MAINTENANCE_CURSOR.start('Roofing', 'Austin, Texas') == 50
+
+
+def test_orders_from_inventory_complete_without_targets(sheet_mode, fake_worksheet):
+    worksheet = fake_worksheet(HEADER + ['fulfilled', 'last_updated'])
+    ss.record_fulfillment(ss.RunOrders(worksheet, None, [order(0), order(1, 30)]), [], [])
+
+    assert worksheet.calls == ['row_values', 'batch_update']
+    assert worksheet.column('status') == {2: 'SCRAPE_COMPLETE', 3: 'SCRAPE_COMPLETE'}
+    assert worksheet.column('fulfilled') == {2: 100, 3: 30}
+
+
+def test_lead_ids_do_not_depend_on_the_run(monkeypatch):
+    monkeypatch.setitem(ss.MOCK_DATA_CONFIG, 'LISTING_SIZE', [300, 300])
+
+    async def scrape(target, offset):
+        return ss.execute_scrape(target, offset)
+
+    roofing = {'niche': 'Roofing', 'city': 'Austin, Texas', 'max_count': 20, 'start': 40, 'order_status_index': 0}
+    plumbing = {'niche': 'Plumbing', 'city': 'Austin, Texas', 'max_count': 20, 'order_status_index': 1}
+    alone, = ss.run_all_targets([roofing], scrape)
+    _, behind = ss.run_all_targets([plumbing, roofing], scrape)
+
+    identity = ['Business Name', 'Email', 'source_url']
+    assert alone[identity].equals(behind[identity])
+
+
+def test_listing_beyond_the_id_block_fails(monkeypatch):
+    monkeypatch.setitem(ss.MOCK_DATA_CONFIG, 'LISTING_SIZE', [300, 300])
+    monkeypatch.setitem(ss.EXECUTOR_CONFIG, 'LEAD_ID_BLOCK', 250)
+    with pytest.raises(ValueError):
+        ss.execute_scrape(order(0, 100, start=200), 0)
@@ -0,0 +1,108 @@
+from types import SimpleNamespace
+
+import pytest
+from gspread.exceptions import APIError
+
+import sheets_client
+from sheets_client import batch_update_column, batch_update_status, group_contiguous_rows, with_backoff
+
+HEADER = ['timestamp', 'niche', 'location', 'max_count', 'status', 'last_updated']
+
+
+def api_error(code):
+    return APIError(SimpleNamespace(json=lambda: {'error': {'code': code, 'message': 'error', 'status': 'ERROR'}}, text=''))
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    delays = []
+    monkeypatch.setattr(sheets_client.time, 'sleep', delays.append)
+    return delays
+
+
+@pytest.mark.parametrize('rows, runs', [
+    ([], []),
+    ([5], [(5, 5)]),
+    ([2, 3, 4, 7], [(2, 4), (7, 7)]),
+    ([9, 3, 2, 8, 3], [(2, 3), (8, 9)]), # Unsorted, with a repeat
+    ([2, 4, 6], [(2, 2), (4, 4), (6, 6)]),
+])
+def test_group_contiguous_rows(rows, runs):
+    assert group_contiguous_rows(rows) == runs
+
+
+def test_status_updates_cost_one_read_and_one_write(fake_worksheet):
+    worksheet = fake_worksheet(HEADER, n_rows=1000)
+    rows = list(range(2, 500)) + list(range(600, 1001))
+
+    assert batch_update_status(worksheet, rows, 'SCRAPE_COMPLETE') == len(rows)
+    assert worksheet.calls == ['row_values', 'batch_update']
+    assert set(worksheet.column('status').values()) == {'SCRAPE_COMPLETE'}
+    assert sorted(worksheet.column('status')) == sorted(worksheet.column('last_updated')) == rows
+
+
+def test_status_ranges_follow_contiguous_runs(fake_worksheet, monkeypatch):
+    worksheet = fake_worksheet(HEADER)
+    writes = []
+    monkeypatch.setattr(worksheet, 'batch_update', writes.append)
+
+    batch_update_status(worksheet, [2, 3, 4, 7], 'SCRAPING')
+    (updates,) = writes
+    assert [update['range'] for update in updates] == ['E2:E4', 'E7:E7', 'F2:F4', 'F7:F7']
+
+
+def test_missing_columns_are_added_in_the_same_write(fake_worksheet):
+    worksheet = fake_worksheet(HEADER[:-2])
+
+    batch_update_status(worksheet, [2, 3], 'PENDING_SCRAPE')
+    assert worksheet.calls == ['row_values', 'add_cols', 'batch_update']
+    assert worksheet.header() == HEADER[:-2] + ['status', 'last_updated']
+
+    worksheet.calls.clear()
+    batch_update_column(worksheet, 'fulfilled', {2: 10, 3: 20})
+    assert worksheet.calls == ['row_values', 'add_cols', 'batch_update']
+    assert worksheet.column('fulfilled') == {2: 10, 3: 20}
+
+
+def test_no_rows_means_no_calls(fake_worksheet):
+    worksheet = fake_worksheet(HEADER)
+    assert batch_update_status(worksheet, [], 'SCRAPING') == 0
+    assert worksheet.calls == []
+
+
+@pytest.mark.parametrize('codes', [[429], [503], [429, 503, 429]])
+def test_backoff_retries_quota_and_unavailable_errors(sleeps, codes):
+    errors = [api_error(code) for code in codes]
+
+    def call():
+        if errors:
+            raise errors.pop(0)
+        return 'ok'
+
+    assert with_backoff(call, base_delay=0.5) == 'ok'
+    assert sleeps == [0.5 * 2 ** attempt for attempt in range(len(codes))]
+
+
+def test_backoff_gives_up_after_the_last_retry(sleeps):
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        raise api_error(429)
+
+    with pytest.raises(APIError):
+        with_backoff(call, retries=3)
+    assert len(attempts) == 4
+    assert sleeps == [1.0, 2.0, 4.0]
+
+
+def test_backoff_does_not_retry_client_errors(sleeps):
+    attempts = []
+
+    def call():
+        attempts.append(1)
+        raise api_error(400)
+
+    with pytest.raises(APIError):
+        with_backoff(call)
+    assert len(attempts) == 1 and sleeps == []
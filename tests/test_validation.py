@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from validation import MXCache, StubResolver, ValidationEngine
+
+EMAIL_REGEX = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
+
+
+def engine(default_country_code='1', mx_cache=None):
+    return ValidationEngine(EMAIL_REGEX, min_phone_length=8, default_country_code=default_country_code, mx_cache=mx_cache)
+
+
+@pytest.mark.parametrize('raw, e164', [
+    ('(512) 555-0142', '+15125550142'),
+    ('1-512-555-0142', '+15125550142'), # Default code written without '+'
+    ('+1 512 555 0142', '+15125550142'),
+    ('+44 20 7946 0958', '+442079460958'),
+    ('0044 20 7946 0958', '+442079460958'),
+    ('+49 30 12345678', '+493012345678'),
+    ('+33 1 23 45 67 89', '+33123456789'),
+    ('+91 98765 43210', '+919876543210'),
+    ('+971 4 123 4567', '+97141234567'), # Not read as a shorter code
+    ('+65 6123 4567', '+6561234567'),
+])
+def test_phones_normalize_to_e164(raw, e164):
+    normalized, failures = engine().normalize_phones(pd.Series([raw]))
+    assert normalized.tolist() == [e164]
+    assert not any(mask.any() for mask in failures.values())
+
+
+def test_national_numbers_use_the_default_country():
+    normalized, _ = engine(default_country_code='44').normalize_phones(pd.Series(['020 7946 0958', '20 7946 0958']))
+    assert normalized.tolist() == ['+442079460958', '+442079460958']
+
+
+def test_bad_phones_fail_their_rule():
+    raw = pd.Series(['+999 1234 5678', '+1 512 555 014', '+49 30 1234567', '5550142', '+15125550142'])
+    normalized, failures = engine().normalize_phones(raw)
+
+    assert normalized.isna().tolist() == [True, True, True, True, False]
+    assert failures['phone_unknown_country'].tolist() == [True, False, False, False, False]
+    assert failures['phone_bad_length'].tolist() == [False, True, True, True, False]
+    assert failures['phone_too_short'].tolist() == [False, False, False, True, False]
+
+
+class CountingResolver(StubResolver):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = []
+
+    def __call__(self, domain):
+        self.calls.append(domain)
+        return super().__call__(domain)
+
+
+def test_emails_are_checked_for_format_then_mx():
+    resolver = CountingResolver(no_mx_domains=['example.com'])
+    emails = pd.Series([' Info@RoofCo.com ', 'sales@roofco.com', 'owner@example.com', 'not-an-email', 'a@b'])
+    failures = engine(mx_cache=MXCache(resolver)).check_emails(emails)
+
+    assert failures['email_format'].tolist() == [False, False, False, True, True]
+    assert failures['email_no_mx'].tolist() == [False, False, True, False, False]
+    # Domains are lower-cased and resolved once each; malformed addresses are never resolved
+    assert sorted(resolver.calls) == ['example.com', 'roofco.com']
+
+
+def test_mx_answers_are_cached_across_calls_and_runs(tmp_path):
+    path = str(tmp_path / 'mx.json')
+    resolver = CountingResolver(no_mx_domains=['example.com'])
+    cache = MXCache(resolver, path)
+    validator = engine(mx_cache=cache)
+    emails = pd.Series(['info@roofco.com', 'owner@example.com'])
+
+    validator.check_emails(emails)
+    failures = validator.check_emails(emails)
+    assert failures['email_no_mx'].tolist() == [False, True]
+    assert len(resolver.calls) == 2
+    assert cache.stats == {'hits': 2, 'lookups': 2}
+
+    cache.save()
+    next_run = CountingResolver(default=False)
+    failures = engine(mx_cache=MXCache(next_run, path)).check_emails(emails)
+    assert failures['email_no_mx'].tolist() == [False, True]
+    assert next_run.calls == []
+
+
+def test_emails_pass_without_an_mx_cache():
+    failures = engine().check_emails(pd.Series(['owner@example.com']))
+    assert not np.any(failures['email_no_mx'])